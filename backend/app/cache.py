@@ -0,0 +1,392 @@
+"""
+HTTP response caching for anonymous reads.
+
+Every cached route declares the entities its response is derived from.
+Each entity has a version counter, kept in the cache_version table, that
+crud write functions bump through the `invalidates` decorator; a response
+is identified by its URL and the versions of its entities, which also make
+up its weak ETag. Changing any entity thus changes the ETag of every
+response built from it, and entries cached under the old versions are
+never served again. Since the versions are shared, every worker gives the
+same response the same ETag, and ETags stay valid across restarts.
+
+Only requests without an Authorization header are cached, since logged-in
+users see per-user fields such as isFavorited.
+
+Each worker mirrors the versions in memory, so that cache hits need no
+database round trip. Writes in one process (an API worker or the CLI) reach
+the mirrors of every other worker through Postgres: the bump also sends a
+NOTIFY on CHANNEL with the new versions, which each worker's
+InvalidationListener applies when it arrives. While a worker's listener is
+disconnected it cannot know about remote writes, so it serves no cached
+responses or 304s until it has reconnected and reloaded the versions;
+remote staleness is thus bounded by notification latency.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import psycopg
+
+import app.db as db
+
+logger = logging.getLogger(__name__)
+
+QUOTE = "quote"
+AUTHOR = "author"
+TAG = "tag"
+COLLECTION = "collection"
+FAVORITE = "favorite"
+ENTITIES = (QUOTE, AUTHOR, TAG, COLLECTION, FAVORITE)
+
+CHANNEL = "quoteweave_cache"
+LISTEN_RECONNECT_SECONDS = 2.0
+
+CACHE_TTL_SECONDS = float(os.environ.get("CACHE_TTL_SECONDS", "30"))
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "1024"))
+
+# This process's copy of the cache_version table.
+_versions_lock = threading.Lock()
+_versions: dict[str, int] = {}
+
+
+def versions(entities: tuple[str, ...]) -> tuple[int, ...]:
+    with _versions_lock:
+        return tuple(_versions.get(entity, 0) for entity in entities)
+
+
+def _advance(new_versions: dict[str, int]) -> None:
+    # Versions only grow: a notification may arrive after a table read
+    # that already includes it.
+    with _versions_lock:
+        for entity, version in new_versions.items():
+            if entity in ENTITIES and version > _versions.get(entity, 0):
+                _versions[entity] = version
+
+
+def load_versions(conn: psycopg.Connection) -> None:
+    """Catches up with the shared versions, e.g. after missed notifications."""
+    rows = conn.execute("SELECT entity, version FROM cache_version").fetchall()
+    _advance(dict(rows))
+
+
+def publish(conn: psycopg.Connection, entities: tuple[str, ...]) -> None:
+    """
+    Marks `entities` as changed for every process: bumps their shared
+    versions and sends them on CHANNEL, in one transaction. Called after
+    the write has committed, so no process can see a new version before
+    the data it stands for.
+    """
+    try:
+        # Sorted, so that concurrent bumps lock the rows in the same order.
+        rows = conn.execute(
+            """
+            INSERT INTO cache_version (entity, version)
+            SELECT entity, 1 FROM unnest(%s::text[]) AS entity
+            ON CONFLICT (entity)
+            DO UPDATE SET version = cache_version.version + 1
+            RETURNING entity, version
+            """,
+            (sorted(set(entities)),),
+        ).fetchall()
+        new_versions = dict(rows)
+        conn.execute(
+            "SELECT pg_notify(%s, %s)",
+            (CHANNEL, json.dumps({"versions": new_versions})),
+        )
+        conn.commit()
+    except psycopg.Error as e:
+        # The write itself has been committed; workers will be stale until
+        # their entries expire.
+        logger.warning("Could not publish cache invalidation: %s", e)
+        conn.rollback()
+        return
+    _advance(new_versions)
+
+
+def invalidates(*entities: str):
+    """
+    Decorates a crud write function (taking the connection first) to bump
+    `entities` for every process once it returns.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(conn, *args, **kwargs):
+            result = fn(conn, *args, **kwargs)
+            publish(conn, entities)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class InvalidationListener(threading.Thread):
+    """
+    Background thread LISTENing on CHANNEL on its own connection and
+    applying the versions carried by notifications.
+    """
+
+    def __init__(self):
+        super().__init__(name="cache-invalidation", daemon=True)
+        self._stop_event = threading.Event()
+        # Set while LISTENing; until then remote writes may go unnoticed.
+        self.connected = threading.Event()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def _handle(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except json.JSONDecodeError:
+            logger.warning(
+                "Ignoring malformed cache notification: %r", payload
+            )
+            return
+        new_versions = message.get("versions")
+        if not isinstance(new_versions, dict):
+            logger.warning(
+                "Ignoring malformed cache notification: %r", payload
+            )
+            return
+        _advance({e: v for e, v in new_versions.items() if isinstance(v, int)})
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                with psycopg.connect(
+                    host=db.settings.host,
+                    port=db.settings.port,
+                    dbname=db.settings.dbname,
+                    user=db.settings.user,
+                    password=db.settings.password,
+                    autocommit=True,
+                ) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    # Writes may have been missed while disconnected; those
+                    # committed from now on are notified.
+                    load_versions(conn)
+                    self.connected.set()
+                    logger.info("Listening for cache invalidations.")
+                    while not self._stop_event.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            self._handle(notify.payload)
+            except psycopg.Error as e:
+                logger.warning(
+                    "Cache invalidation listener disconnected: %s", e
+                )
+            self.connected.clear()
+            self._stop_event.wait(LISTEN_RECONNECT_SECONDS)
+
+
+_listener: InvalidationListener | None = None
+
+
+def start_listener() -> InvalidationListener:
+    global _listener
+    _listener = InvalidationListener()
+    _listener.start()
+    return _listener
+
+
+def stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def shared_versions_current() -> bool:
+    """
+    False while this process's listener is disconnected, so it could have
+    missed writes by other processes. Processes without a listener (tests,
+    the CLI) only see their own writes, which they never miss.
+    """
+    return _listener is None or _listener.connected.is_set()
+
+
+class TTLCache:
+    """Thread-safe LRU map whose entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    # Route template as declared on the endpoint, e.g. "/authors/{author_id}".
+    path: str
+    entities: tuple[str, ...]
+    max_age: int
+
+    @functools.cached_property
+    def pattern(self) -> re.Pattern:
+        return re.compile(re.sub(r"\{\w+\}", "[^/]+", self.path) + "/?")
+
+
+@dataclass
+class _CachedResponse:
+    body: bytes
+    content_type: bytes
+
+
+class ResponseCacheMiddleware:
+    """
+    ASGI middleware serving anonymous GETs of the routes in `policies`
+    from an in-process TTL cache, with weak ETags, If-None-Match (304) and
+    Cache-Control headers. Cache hits never reach the endpoint, so they do
+    not open a database connection; they are labelled with the policy's
+    route template for the metrics middleware.
+    """
+
+    def __init__(self, app, policies: list[CachePolicy], cache: TTLCache):
+        self.app = app
+        self.policies = policies
+        self.cache = cache
+
+    def _policy_for(self, path: str) -> CachePolicy | None:
+        for policy in self.policies:
+            if policy.pattern.fullmatch(path):
+                return policy
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        policy = self._policy_for(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if b"authorization" in headers or not shared_versions_current():
+            await self._send_private(scope, receive, send)
+            return
+
+        url = scope["path"]
+        if scope.get("query_string"):
+            url += "?" + scope["query_string"].decode("latin-1")
+        key = (url, versions(policy.entities))
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()[:20]
+        etag = f'W/"{digest}"'.encode()
+        cache_headers = [
+            (b"etag", etag),
+            (b"cache-control", f"public, max-age={policy.max_age}".encode()),
+            (b"vary", b"Authorization"),
+        ]
+
+        if_none_match = headers.get(b"if-none-match", b"")
+        if etag in (tag.strip() for tag in if_none_match.split(b",")):
+            scope["route"] = policy
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": cache_headers,
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            scope["route"] = policy
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", cached.content_type),
+                        (b"content-length", str(len(cached.body)).encode()),
+                        *cache_headers,
+                    ],
+                }
+            )
+            await send({"type": "http.response.body", "body": cached.body})
+            return
+
+        await self._send_and_store(scope, receive, send, key, cache_headers)
+
+    async def _send_private(self, scope, receive, send):
+        async def send_private(message):
+            if message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        (b"cache-control", b"private, no-cache"),
+                    ],
+                }
+            await send(message)
+
+        await self.app(scope, receive, send_private)
+
+    async def _send_and_store(self, scope, receive, send, key, cache_headers):
+        start_message = None
+        chunks: list[bytes] = []
+
+        async def capture(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                if message["status"] == 200:
+                    message = {
+                        **message,
+                        "headers": [
+                            *message.get("headers", []),
+                            *cache_headers,
+                        ],
+                    }
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if (
+                    not message.get("more_body", False)
+                    and start_message is not None
+                    and start_message["status"] == 200
+                ):
+                    content_type = dict(start_message["headers"]).get(
+                        b"content-type", b"application/json"
+                    )
+                    self.cache.set(
+                        key, _CachedResponse(b"".join(chunks), content_type)
+                    )
+            await send(message)
+
+        await self.app(scope, receive, capture)
@@ -1,15 +1,21 @@
-import json
+import base64
 import math
+from datetime import datetime
 from typing import List, Optional, Tuple
 
+import numpy as np
 from psycopg.connection import Connection
 
+import app.cache as cache
+import app.dedup as dedup
 import app.embedding as embedding
 import app.model as model
 import app.security as security
 import app.tagging as tagging
+import app.vector as vector
 
 
+@cache.invalidates(cache.AUTHOR)
 def create_author(
     conn: Connection, query: model.CreateAuthorQuery
 ) -> model.Author:
@@ -186,6 +192,7 @@ def update_user_preferences(
     )
 
 
+@cache.invalidates(cache.AUTHOR)
 def update_user_profile(
     conn: Connection, user_id: int, payload: model.UpdateUserProfilePayload
 ) -> model.UserResponse:
@@ -259,16 +266,249 @@ def update_user_profile(
     )
 
 
+def sync_embedding_model(conn: Connection, wait: bool = False) -> None:
+    """
+    Follows the embedding model that `cli.py reembed --switch` recorded as
+    active, so that new vectors and search queries match the stored ones
+    without a restart. Call before embedding. Loading the new model is slow,
+    so by default it happens in the background while the current model keeps
+    serving; with `wait`, the switch is done before this returns.
+    """
+    row = conn.execute(
+        "SELECT value FROM app_setting WHERE name = %s",
+        (embedding.EMBEDDING_MODEL_SETTING,),
+    ).fetchone()
+    if row is None:
+        return
+    if wait:
+        embedding.use_model(row[0])
+    else:
+        embedding.request_model(row[0])
+
+
+def _embedding_model_for(
+    quote_embedding: Optional[np.ndarray], model_name: str
+) -> str | None:
+    # Every stored vector records the model that produced it.
+    if quote_embedding is None:
+        return None
+    return model_name
+
+
+def find_duplicate_quote(
+    conn: Connection,
+    text: str,
+    quote_embedding: Optional[np.ndarray],
+    threshold: Optional[float] = None,
+    owner_author_id: Optional[int] = None,
+) -> Tuple[int, float] | None:
+    """
+    Returns (quote_id, similarity) of the closest existing quote if it has
+    the same normalized text or an embedding at least `threshold` cosine
+    similar, else None. Only public quotes and the private quotes of
+    `owner_author_id` are candidates, so that other owners' private quotes
+    are never revealed. Uses the text_hash and HNSW indexes.
+    """
+    if threshold is None:
+        threshold = dedup.DUPLICATE_SIMILARITY_THRESHOLD
+    text_hash = dedup.TEXT_HASH_SQL.format("%(text)s")
+    visible = "(q.is_public OR q.author_id = %(owner_author_id)s)"
+    nearest = f"""
+        UNION ALL
+        (SELECT q.id, 1 - (q.embedding <=> %(embedding)s) AS similarity
+         FROM quote q
+         WHERE q.embedding_model = %(embedding_model)s AND {visible}
+         ORDER BY q.embedding <=> %(embedding)s
+         LIMIT 1)
+    """
+    if quote_embedding is None:
+        nearest = ""
+    with conn.cursor(binary=True) as cur:
+        cur.execute(
+            f"""
+            SELECT id, similarity FROM (
+                (SELECT q.id, 1.0::float8 AS similarity
+                 FROM quote q
+                 WHERE q.text_hash = {text_hash} AND {visible}
+                 ORDER BY q.id
+                 LIMIT 1)
+                {nearest}
+            ) candidates
+            WHERE similarity >= %(threshold)s
+            ORDER BY similarity DESC, id
+            LIMIT 1
+            """,
+            {
+                "text": text,
+                "embedding": quote_embedding,
+                "embedding_model": embedding.EMBEDDING_MODEL_NAME,
+                "threshold": threshold,
+                "owner_author_id": owner_author_id,
+            },
+        )
+        row = cur.fetchone()
+    if row is None:
+        return None
+    return row[0], float(row[1])
+
+
+def _quote_author_id(conn: Connection, quote_id: int) -> Optional[int]:
+    with conn.cursor() as cur:
+        cur.execute("SELECT author_id FROM quote WHERE id = %s", (quote_id,))
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+def record_quote_duplicate(
+    conn: Connection, quote_id: int, duplicate_of: int, similarity: float
+) -> None:
+    """Flags `quote_id` as a near-duplicate of `duplicate_of`. No commit."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO quote_duplicate (quote_id, duplicate_of, similarity)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (quote_id, duplicate_of)
+                DO UPDATE SET similarity = EXCLUDED.similarity
+            """,
+            (quote_id, duplicate_of, similarity),
+        )
+
+
+def merge_quote_into(
+    conn: Connection, duplicate_id: int, canonical_id: int
+) -> None:
+    """
+    Moves the tags, collection memberships and favorites of `duplicate_id`
+    to `canonical_id`, then deletes `duplicate_id`. Neither commits nor
+    invalidates cached responses; callers publish QUOTE, TAG, COLLECTION
+    and FAVORITE once they have committed.
+    """
+    params = {"duplicate_id": duplicate_id, "canonical_id": canonical_id}
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO taggedas (quote_id, tag_id)
+            SELECT %(canonical_id)s, tag_id FROM taggedas
+            WHERE quote_id = %(duplicate_id)s
+            ON CONFLICT DO NOTHING
+            """,
+            params,
+        )
+        cur.execute(
+            """
+            INSERT INTO collectioncontains (collection_id, quote_id, added_at)
+            SELECT collection_id, %(canonical_id)s, added_at
+            FROM collectioncontains
+            WHERE quote_id = %(duplicate_id)s
+            ON CONFLICT DO NOTHING
+            """,
+            params,
+        )
+        cur.execute(
+            """
+            INSERT INTO user_quote_favorite (user_id, quote_id, created_at)
+            SELECT user_id, %(canonical_id)s, created_at
+            FROM user_quote_favorite
+            WHERE quote_id = %(duplicate_id)s
+            ON CONFLICT DO NOTHING
+            """,
+            params,
+        )
+        cur.execute("DELETE FROM quote WHERE id = %(duplicate_id)s", params)
+
+
+def find_duplicate_pairs(
+    conn: Connection,
+    threshold: float,
+    after_id: int = 0,
+    batch_size: int = 1000,
+) -> Tuple[List[Tuple[int, int, float, bool]], int | None]:
+    """
+    Scans the next `batch_size` quotes with id > `after_id` and returns
+    (pairs, last_id): pairs are (quote_id, older_quote_id, similarity,
+    same_owner) for every older quote with the same normalized text or a
+    similar embedding, same_owner telling whether both quotes have the same
+    author. last_id is None once the table is exhausted.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT set_config('hnsw.ef_search', %s, true)",
+            (str(ANN_MIN_EF_SEARCH),),
+        )
+        cur.execute(
+            """
+            WITH batch AS MATERIALIZED (
+                SELECT id, author_id, text_hash, embedding, embedding_model
+                FROM quote
+                WHERE id > %(after_id)s
+                ORDER BY id
+                LIMIT %(batch_size)s
+            )
+            SELECT b.id, o.id, 1.0::float8, o.author_id = b.author_id
+            FROM batch b
+            JOIN quote o ON o.text_hash = b.text_hash AND o.id < b.id
+            UNION
+            SELECT b.id, nearest.id, nearest.similarity,
+                   nearest.author_id = b.author_id
+            FROM batch b
+            CROSS JOIN LATERAL (
+                SELECT o.id, o.author_id,
+                       1 - (o.embedding <=> b.embedding) AS similarity
+                FROM quote o
+                WHERE o.id <> b.id AND o.embedding_model = b.embedding_model
+                ORDER BY o.embedding <=> b.embedding
+                LIMIT 5
+            ) nearest
+            WHERE b.embedding IS NOT NULL
+              AND nearest.id < b.id
+              AND nearest.similarity >= %(threshold)s
+            """,
+            {
+                "after_id": after_id,
+                "batch_size": batch_size,
+                "threshold": threshold,
+            },
+        )
+        pairs = [
+            (row[0], row[1], float(row[2]), row[3]) for row in cur.fetchall()
+        ]
+        cur.execute(
+            "SELECT MAX(id) FROM (SELECT id FROM quote WHERE id > %s "
+            "ORDER BY id LIMIT %s) batch",
+            (after_id, batch_size),
+        )
+        last_id = cur.fetchone()[0]
+    return pairs, last_id
+
+
+@cache.invalidates(cache.QUOTE, cache.TAG)
 def create_quote(
     conn: Connection, query: model.CreateQuoteQuery, author_name: str
 ) -> model.Quote:
-    quote_embedding = embedding.generate_embedding(query.text)
+    sync_embedding_model(conn)
+    quote_embedding, model_name = embedding.generate_embedding_with_model(
+        query.text
+    )
+    policy = dedup.check_policy(dedup.DUPLICATE_POLICY)
+    duplicate = find_duplicate_quote(
+        conn, query.text, quote_embedding, owner_author_id=query.author_id
+    )
+    if duplicate is not None and policy != "flag":
+        # Bulk loaders have no way to merge into a Quote return value.
+        raise dedup.DuplicateQuoteError(*duplicate)
 
     with conn.cursor() as cur:
         cur.execute(
-            "INSERT INTO quote (author_id, text, is_public, embedding) "
-            "VALUES (%s, %s, %s, %s) RETURNING id, created_at, updated_at",
-            (query.author_id, query.text, query.is_public, quote_embedding),
+            "INSERT INTO quote (author_id, text, is_public, embedding, embedding_model) "
+            "VALUES (%s, %s, %s, %s, %s) RETURNING id, created_at, updated_at",
+            (
+                query.author_id,
+                query.text,
+                query.is_public,
+                quote_embedding,
+                _embedding_model_for(quote_embedding, model_name),
+            ),
         )
         quote_row = cur.fetchone()
         if quote_row is None:
@@ -287,30 +527,75 @@ def create_quote(
                 created_tags.append(tag_obj)
             except ValueError as ve:
                 print(f"Skipping tag due to error: {ve}")
+        if duplicate is not None:
+            record_quote_duplicate(conn, quote_id, *duplicate)
+        refresh_quote_neighbors(conn, quote_id)
         conn.commit()
         return model.Quote(
             id=quote_id,
             author_id=query.author_id,
             text=query.text,
             is_public=query.is_public,
-            embedding=quote_embedding,
+            embedding=_embedding_to_list(quote_embedding),
             tags=created_tags,
             created_at=created_at,
             updated_at=updated_at,
         )
 
 
+@cache.invalidates(cache.QUOTE, cache.TAG, cache.COLLECTION, cache.FAVORITE)
 def create_quote_with_client_payload(
     conn: Connection, payload: model.CreateQuoteClientPayload, user_id: int
 ) -> model.QuotePageEntry:
+    sync_embedding_model(conn)
+    quote_embedding, model_name = embedding.generate_embedding_with_model(
+        payload.text
+    )
+    policy = dedup.check_policy(dedup.DUPLICATE_POLICY)
+    with conn.cursor() as cur:
+        cur.execute('SELECT author_id FROM "user" WHERE id = %s', (user_id,))
+        row = cur.fetchone()
+    owner_author_id = row[0] if row else None
+    duplicate = find_duplicate_quote(
+        conn, payload.text, quote_embedding, owner_author_id=owner_author_id
+    )
+    if duplicate is not None and policy == "reject":
+        raise dedup.DuplicateQuoteError(*duplicate)
+
     author = get_or_create_author_by_name(conn, payload.authorName)
-    quote_embedding = embedding.generate_embedding(payload.text)
+
+    # Merging only ever changes a quote of the submitter's, under the same
+    # author; any other duplicate is inserted and recorded as with "flag".
+    if (
+        duplicate is not None
+        and policy == "merge"
+        and owner_author_id is not None
+        and author.id == owner_author_id
+        and _quote_author_id(conn, duplicate[0]) == owner_author_id
+    ):
+        existing_id = duplicate[0]
+        with conn.cursor() as cur:
+            for tag_name in payload.tags or []:
+                if tag_name.strip():
+                    tag_obj = get_or_create_tag(conn, tag_name.strip())
+                    cur.execute(
+                        "INSERT INTO taggedas (quote_id, tag_id) VALUES (%s, %s) "
+                        "ON CONFLICT DO NOTHING",
+                        (existing_id, tag_obj.id),
+                    )
+        conn.commit()
+        merged = get_quote_details_for_page_entry(
+            conn, existing_id, current_user_id=user_id
+        )
+        if merged is None:
+            raise ValueError("Failed to merge quote into its duplicate.")
+        return merged
 
     with conn.cursor() as cur:
         cur.execute(
             """
-            INSERT INTO quote (author_id, text, is_public, embedding)
-            VALUES (%(author_id)s, %(text)s, %(is_public)s, %(embedding)s)
+            INSERT INTO quote (author_id, text, is_public, embedding, embedding_model)
+            VALUES (%(author_id)s, %(text)s, %(is_public)s, %(embedding)s, %(embedding_model)s)
             RETURNING id, created_at, updated_at;
             """,
             {
@@ -318,6 +603,9 @@ def create_quote_with_client_payload(
                 "text": payload.text,
                 "is_public": True,
                 "embedding": quote_embedding,
+                "embedding_model": _embedding_model_for(
+                    quote_embedding, model_name
+                ),
             },
         )
         quote_row = cur.fetchone()
@@ -338,6 +626,9 @@ def create_quote_with_client_payload(
                     except ValueError as ve:
                         print(f"Skipping tag '{tag_name}' due to error: {ve}")
 
+        if duplicate is not None:
+            record_quote_duplicate(conn, quote_id, *duplicate)
+        refresh_quote_neighbors(conn, quote_id)
         conn.commit()
 
         return model.QuotePageEntry(
@@ -351,35 +642,53 @@ def create_quote_with_client_payload(
         )
 
 
+def _embedding_to_list(
+    embedding_value: Optional[np.ndarray],
+) -> Optional[List[float]]:
+    # Embeddings arrive from the vector adapter as float32 arrays; they are
+    # only turned into Python lists at the response model boundary.
+    if embedding_value is None:
+        return None
+    return embedding_value.tolist()
+
+
+_QUOTE_COLUMNS = (
+    "q.id, q.author_id, q.text, q.is_public, q.created_at, q.updated_at"
+)
+
+
+def _quote_columns(include_embedding: bool) -> str:
+    # The 384-float embedding is by far the widest column of `quote`, so it
+    # is only projected when a caller explicitly asks for it.
+    if include_embedding:
+        return f"{_QUOTE_COLUMNS}, q.embedding"
+    return _QUOTE_COLUMNS
+
+
 def _map_row_to_quote(
     row: Tuple, fetched_tags: List[model.Tag]
-) -> model.Quote:
-    embedding_value = row[4]
-    if isinstance(embedding_value, str):
-        try:
-            embedding_value = json.loads(embedding_value)
-        except json.JSONDecodeError:
-            embedding_value = None
-    elif not isinstance(embedding_value, list):
-        embedding_value = None
-
-    return model.Quote(
+) -> model.QuoteSummary:
+    fields = dict(
         id=row[0],
         author_id=row[1],
         text=row[2],
         is_public=row[3],
-        embedding=embedding_value,
-        created_at=row[5],
-        updated_at=row[6],
+        created_at=row[4],
+        updated_at=row[5],
         tags=fetched_tags,
     )
+    if len(row) > 6:
+        return model.Quote(**fields, embedding=_embedding_to_list(row[6]))
+    return model.QuoteSummary(**fields)
 
 
-def get_quote_by_id(conn: Connection, quote_id: int) -> model.Quote | None:
-    with conn.cursor() as cur:
+def get_quote_by_id(
+    conn: Connection, quote_id: int, include_embedding: bool = False
+) -> model.QuoteSummary | None:
+    with conn.cursor(binary=True) as cur:
         cur.execute(
-            "SELECT id, author_id, text, is_public, embedding, created_at, updated_at "
-            "FROM quote WHERE id = %s",
+            f"SELECT {_quote_columns(include_embedding)} "
+            "FROM quote q WHERE q.id = %s",
             (quote_id,),
         )
         response = cur.fetchone()
@@ -389,14 +698,27 @@ def get_quote_by_id(conn: Connection, quote_id: int) -> model.Quote | None:
         return _map_row_to_quote(response, tags)
 
 
+def quote_visible(
+    conn: Connection, quote_id: int, user_id: Optional[int]
+) -> bool:
+    """Whether the quote exists and is public or owned by the user."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT EXISTS (SELECT 1 FROM quote q "
+            f"WHERE q.id = %(quote_id)s AND {_VISIBLE_TO_USER})",
+            {"quote_id": quote_id, "user_id": user_id},
+        )
+        return cur.fetchone()[0]
+
+
 def get_quotes_by_author(
-    conn: Connection, author_id: int
-) -> list[model.Quote]:
+    conn: Connection, author_id: int, include_embedding: bool = False
+) -> list[model.QuoteSummary]:
     quotes = []
-    with conn.cursor() as cur:
+    with conn.cursor(binary=True) as cur:
         cur.execute(
-            "SELECT id, author_id, text, is_public, embedding, created_at, updated_at "
-            "FROM quote WHERE author_id = %s ORDER BY created_at DESC",
+            f"SELECT {_quote_columns(include_embedding)} "
+            "FROM quote q WHERE q.author_id = %s ORDER BY q.created_at DESC",
             (author_id,),
         )
         for row in cur.fetchall():
@@ -406,12 +728,12 @@ def get_quotes_by_author(
 
 
 def get_quotes_by_collection(
-    conn: Connection, collection_id: int
-) -> list[model.Quote]:
+    conn: Connection, collection_id: int, include_embedding: bool = False
+) -> list[model.QuoteSummary]:
     quotes = []
-    with conn.cursor() as cur:
+    with conn.cursor(binary=True) as cur:
         cur.execute(
-            "SELECT q.id, q.author_id, q.text, q.is_public, q.embedding, q.created_at, q.updated_at "
+            f"SELECT {_quote_columns(include_embedding)} "
             "FROM quote q JOIN collectioncontains cc ON q.id = cc.quote_id "
             "WHERE cc.collection_id = %s ORDER BY q.created_at DESC",
             (collection_id,),
@@ -422,11 +744,13 @@ def get_quotes_by_collection(
     return quotes
 
 
-def get_quotes_by_tag(conn: Connection, tag_id: int) -> list[model.Quote]:
+def get_quotes_by_tag(
+    conn: Connection, tag_id: int, include_embedding: bool = False
+) -> list[model.QuoteSummary]:
     quotes = []
-    with conn.cursor() as cur:
+    with conn.cursor(binary=True) as cur:
         cur.execute(
-            "SELECT q.id, q.author_id, q.text, q.is_public, q.embedding, q.created_at, q.updated_at "
+            f"SELECT {_quote_columns(include_embedding)} "
             "FROM quote q JOIN taggedas ta ON q.id = ta.quote_id "
             "WHERE ta.tag_id = %s ORDER BY q.created_at DESC",
             (tag_id,),
@@ -440,72 +764,10 @@ def get_quotes_by_tag(conn: Connection, tag_id: int) -> list[model.Quote]:
 def get_quote_details_for_page_entry(
     conn: Connection, quote_id: int, current_user_id: Optional[int] = None
 ) -> model.QuotePageEntry | None:
-    with conn.cursor() as cur:
-        query = """
-            SELECT
-                q.id,
-                q.text,
-                a.id AS author_id,
-                a.name AS author_name,
-                COALESCE(fc.favorite_count, 0) as favorite_count,
-                CASE
-                    WHEN CAST(%(user_id)s AS INTEGER) IS NOT NULL THEN EXISTS (
-                        SELECT 1 FROM user_quote_favorite f
-                        WHERE f.quote_id = q.id AND f.user_id = CAST(%(user_id)s AS INTEGER)
-                    )
-                    ELSE FALSE
-                END as is_favorited,
-                COALESCE(
-                    (SELECT array_agg(t.name ORDER BY t.name) FROM tag t JOIN taggedas ta ON t.id = ta.tag_id WHERE ta.quote_id = q.id),
-                    ARRAY[]::VARCHAR[]
-                ) as tags,
-                CASE
-                    WHEN CAST(%(user_id)s AS INTEGER) IS NOT NULL THEN (
-                        SELECT COALESCE(json_agg(json_build_object('id', coll.id, 'name', coll.name) ORDER BY coll.name), '[]'::json)
-                        FROM collection coll
-                        JOIN collectioncontains cc ON coll.id = cc.collection_id
-                        WHERE cc.quote_id = q.id
-                        AND coll.author_id = (SELECT author_id FROM "user" WHERE id = CAST(%(user_id)s AS INTEGER))
-                    )
-                    ELSE '[]'::json
-                END AS user_collections
-            FROM quote q
-            JOIN author a ON q.author_id = a.id
-            LEFT JOIN (
-                SELECT quote_id, COUNT(*) as favorite_count
-                FROM user_quote_favorite
-                GROUP BY quote_id
-            ) AS fc ON q.id = fc.quote_id
-            WHERE q.id = %(quote_id)s;
-        """
-        cur.execute(query, {"quote_id": quote_id, "user_id": current_user_id})
-        row = cur.fetchone()
-
-        if row is None:
-            return None
-
-        # Ensure user_collections is properly parsed (it should be a list of dicts or None)
-        user_collections_data = row[7]
-        if isinstance(
-            user_collections_data, str
-        ):  # Handle if DB returns JSON string
-            try:
-                user_collections_data = json.loads(user_collections_data)
-            except json.JSONDecodeError:
-                user_collections_data = []  # Default to empty list on error
-        elif user_collections_data is None:
-            user_collections_data = []
-
-        return model.QuotePageEntry(
-            id=row[0],
-            text=row[1],
-            authorId=row[2],
-            authorName=row[3],
-            favoriteCount=row[4],
-            isFavorited=row[5],
-            tags=row[6] if row[6] is not None else [],
-            userCollections=user_collections_data,
-        )
+    # Every per-quote column is an index lookup restricted to this quote (see
+    # _QUOTES_BY_IDS_SQL), so the cost does not grow with the favorites table.
+    entries = get_quotes_by_ids(conn, [quote_id], current_user_id)
+    return entries[0] if entries else None
 
 
 def get_quotes_for_page(
@@ -515,55 +777,29 @@ def get_quotes_for_page(
     current_user_id: Optional[int] = None,
     author_id: Optional[int] = None,
 ) -> List[model.QuotePageEntry]:
-    offset = (page_number - 1) * page_size
-    page_entries = []
-    params = [page_size, offset]
-
-    base_query = """
-        SELECT q.id, q.text, a.name as author_name, a.id as author_id
-        FROM quote q
-        JOIN author a ON q.author_id = a.id
-    """
-
-    where_clauses = ["q.is_public = TRUE"]
+    params = {
+        "user_id": current_user_id,
+        "author_id": author_id,
+        "limit": page_size,
+        "offset": (page_number - 1) * page_size,
+    }
+    where = "q.is_public = TRUE"
     if author_id is not None:
-        where_clauses.append("q.author_id = %s")
-        params.insert(0, author_id)
-
-    if where_clauses:
-        base_query += " WHERE " + " AND ".join(where_clauses)
-
-    base_query += " ORDER BY q.created_at DESC LIMIT %s OFFSET %s"
+        where += " AND q.author_id = %(author_id)s"
 
     with conn.cursor() as cur:
-        cur.execute(base_query, tuple(params))
-        quotes_data = cur.fetchall()
-
-    for row in quotes_data:
-        quote_id, text, author_name_str, author_id_int = row
-        tags = get_tags_for_quote(conn, quote_id)
-        tag_names = [tag.name for tag in tags]
-
-        favorite_count = get_quote_favorite_count(conn, quote_id)
-        is_favorited_status = False
-        if current_user_id:
-            is_favorited_status = is_quote_favorited_by_user(
-                conn, current_user_id, quote_id
-            )
-
-        page_entries.append(
-            model.QuotePageEntry(
-                id=quote_id,
-                text=text,
-                author=author_name_str,
-                authorName=author_name_str,
-                authorId=author_id_int,
-                tags=tag_names,
-                isFavorited=is_favorited_status,
-                favoriteCount=favorite_count,
-            )
+        cur.execute(
+            f"""
+            SELECT {_PAGE_ENTRY_COLUMNS}
+            FROM quote q
+            JOIN author a ON q.author_id = a.id
+            WHERE {where}
+            ORDER BY q.created_at DESC
+            LIMIT %(limit)s OFFSET %(offset)s
+            """,
+            params,
         )
-    return page_entries
+        return [_map_page_entry_row(row) for row in cur.fetchall()]
 
 
 def get_quotes_total_pages(
@@ -589,6 +825,7 @@ def get_quotes_total_pages(
         return math.ceil(n / page_size)
 
 
+@cache.invalidates(cache.COLLECTION)
 def create_collection(
     conn: Connection, query: model.CreateCollectionQuery
 ) -> model.Collection:
@@ -613,11 +850,15 @@ def create_collection(
 
 
 def get_collection_by_id(
-    conn: Connection, collection_id: int, current_user_id: Optional[int] = None
+    conn: Connection, collection_id: int
 ) -> model.Collection | None:
+    """
+    The collection's header and quote count, without its quotes; page
+    through those with get_collection_quotes_page.
+    """
     with conn.cursor() as cur:
         cur.execute(
-            "SELECT c.id, c.author_id, a.name as author_name, c.name, c.description, c.is_public, c.created_at, c.updated_at "
+            "SELECT c.id, c.author_id, a.name as author_name, c.name, c.description, c.is_public, c.created_at, c.updated_at, c.quote_count "
             "FROM collection c JOIN author a ON c.author_id = a.id "
             "WHERE c.id = %s",
             (collection_id,),
@@ -626,17 +867,6 @@ def get_collection_by_id(
         if row is None:
             return None
 
-        cur.execute(
-            "SELECT COUNT(*) FROM collectioncontains WHERE collection_id = %s",
-            (collection_id,),
-        )
-        quote_count_row = cur.fetchone()
-        quote_count = quote_count_row[0] if quote_count_row else 0
-
-        quotes_in_collection = get_quote_page_entries_for_collection(
-            conn, collection_id, current_user_id
-        )
-
         return model.Collection(
             id=row[0],
             author_id=row[1],
@@ -646,8 +876,7 @@ def get_collection_by_id(
             is_public=row[5],
             created_at=row[6],
             updated_at=row[7],
-            quote_count=quote_count,
-            quotes=quotes_in_collection,
+            quote_count=row[8],
         )
 
 
@@ -669,6 +898,7 @@ def get_collection_by_name(
     )
 
 
+@cache.invalidates(cache.COLLECTION)
 def add_quote_to_collection(
     conn: Connection, quote_id: int, collection_id: int
 ) -> model.CollectionQuoteLink:
@@ -702,35 +932,25 @@ def add_quote_to_collection(
 def get_collections_from_author(
     conn: Connection, author_id: int
 ) -> list[model.Collection]:
-    collections = []
     with conn.cursor() as cur:
         cur.execute(
-            "SELECT c.id, c.author_id, a.name as author_name, c.name, c.description, c.is_public "
+            "SELECT c.id, c.author_id, a.name as author_name, c.name, c.description, c.is_public, c.quote_count "
             "FROM collection c JOIN author a ON c.author_id = a.id "
             "WHERE c.author_id = %s ORDER BY c.name",
             (author_id,),
         )
-        for row in cur.fetchall():
-            collection_id = row[0]
-            cur.execute(
-                "SELECT COUNT(*) FROM collectioncontains WHERE collection_id = %s",
-                (collection_id,),
-            )
-            quote_count_row = cur.fetchone()
-            quote_count = quote_count_row[0] if quote_count_row else 0
-
-            collections.append(
-                model.Collection(
-                    id=collection_id,
-                    author_id=row[1],
-                    author_name=row[2],
-                    name=row[3],
-                    description=row[4],
-                    is_public=row[5],
-                    quote_count=quote_count,
-                )
+        return [
+            model.Collection(
+                id=row[0],
+                author_id=row[1],
+                author_name=row[2],
+                name=row[3],
+                description=row[4],
+                is_public=row[5],
+                quote_count=row[6],
             )
-    return collections
+            for row in cur.fetchall()
+        ]
 
 
 def create_tag(conn: Connection, query: model.CreateTagQuery) -> model.Tag:
@@ -794,7 +1014,8 @@ def get_all_unique_tags_with_counts(conn: Connection) -> List[model.TagEntry]:
         )
         tags_data = cur.fetchall()
         return [
-            model.TagEntry(name=row[0], quoteCount=row[1]) for row in tags_data
+            model.TagEntry.model_construct(name=row[0], quoteCount=row[1])
+            for row in tags_data
         ]
 
 
@@ -855,60 +1076,533 @@ def get_tags_for_quote(conn: Connection, quote_id: int) -> List[model.Tag]:
         return [model.Tag(id=row[0], name=row[1]) for row in tags_data]
 
 
+def _set_ef_search(cur, k: int) -> None:
+    # ef_search bounds how many rows the HNSW scan can return, including
+    # the extra candidates fetched for re-ranking. pgvector caps it at 1000.
+    ef_search = k * vector.RERANK_FACTOR.get(vector.SEARCH_INDEX, 1)
+    cur.execute(
+        "SELECT set_config('hnsw.ef_search', %s, true)",
+        (str(min(max(ef_search, ANN_MIN_EF_SEARCH), 1000)),),
+    )
+
+
+# Filtered semantic search. The HNSW index returns at most hnsw.ef_search
+# rows, and filters are applied after the index scan, so a selective filter
+# can leave the top-k nearly empty. Small filtered sets are therefore ranked
+# exactly, larger ones by over-fetching from the index with a growing k.
+# Pages the index cannot fill within ANN_MAX_CANDIDATES, such as deep
+# offsets, are ranked exactly too.
+EXACT_SEARCH_MAX_ROWS = 2000
+ANN_MAX_CANDIDATES = 1000
+ANN_MIN_EF_SEARCH = 100
+ANN_OVERFETCH_FACTOR = 4
+
+
+def _semantic_filters(
+    tag: Optional[str],
+    author_id: Optional[int],
+    collection_id: Optional[int],
+) -> str:
+    """
+    Returns the WHERE clause for `quote q` rows visible to %(user_id)s and
+    matching the given filters.
+    """
+    conditions = [
+        "q.embedding_model = %(embedding_model)s",
+        '(q.is_public = TRUE OR q.author_id = (SELECT author_id FROM "user" WHERE id = %(user_id)s))',
+    ]
+    if author_id is not None:
+        conditions.append("q.author_id = %(author_id)s")
+    if tag is not None:
+        conditions.append(
+            """EXISTS (
+                SELECT 1 FROM taggedas ta JOIN tag t ON t.id = ta.tag_id
+                WHERE ta.quote_id = q.id AND t.name = %(tag)s
+            )"""
+        )
+    if collection_id is not None:
+        conditions.append(
+            """EXISTS (
+                SELECT 1 FROM collectioncontains cc
+                JOIN collection c ON c.id = cc.collection_id
+                WHERE cc.quote_id = q.id
+                  AND cc.collection_id = %(collection_id)s
+                  AND (c.is_public = TRUE OR c.author_id = (SELECT author_id FROM "user" WHERE id = %(user_id)s))
+            )"""
+        )
+    return " AND ".join(conditions)
+
+
 def search_quotes_semantic(
     conn: Connection,
-    query_embedding: List[float],
+    query_embedding: np.ndarray,
     limit: int = 10,
     skip: int = 0,
     current_user_id: Optional[int] = None,
+    tag: Optional[str] = None,
+    author_id: Optional[int] = None,
+    collection_id: Optional[int] = None,
+) -> List[model.QuotePageEntry]:
+    """
+    Nearest quotes by cosine distance among public quotes and the current
+    user's own quotes, optionally restricted to a tag, an author and/or a
+    collection.
+    """
+    where = _semantic_filters(tag, author_id, collection_id)
+    params = {
+        "embedding": query_embedding,
+        "embedding_model": embedding.EMBEDDING_MODEL_NAME,
+        "user_id": current_user_id,
+        "tag": tag,
+        "author_id": author_id,
+        "collection_id": collection_id,
+        "limit": limit,
+        "skip": skip,
+    }
+    wanted = skip + limit
+    filtered = any(f is not None for f in (tag, author_id, collection_id))
+
+    with conn.cursor(binary=True) as cur:
+        if filtered:
+            cur.execute(
+                f"""
+                SELECT COUNT(*) FROM (
+                    SELECT 1 FROM quote q WHERE {where} LIMIT %(cap)s
+                ) matching
+                """,
+                {**params, "cap": EXACT_SEARCH_MAX_ROWS + 1},
+            )
+            if cur.fetchone()[0] <= EXACT_SEARCH_MAX_ROWS:
+                return _search_quotes_semantic_exact(cur, where, params)
+
+        # Even unfiltered, other users' private quotes are dropped after
+        # the index scan, so always fetch some slack.
+        k = max(wanted * ANN_OVERFETCH_FACTOR, 40)
+        while True:
+            k = min(k, ANN_MAX_CANDIDATES)
+            _set_ef_search(cur, k)
+            cur.execute(
+                f"""
+                WITH nearest AS MATERIALIZED (
+                    {vector.nearest_quotes_sql("%(k)s")}
+                )
+                SELECT {_PAGE_ENTRY_COLUMNS}
+                FROM nearest
+                JOIN quote q ON q.id = nearest.id
+                JOIN author a ON a.id = q.author_id
+                WHERE {where}
+                ORDER BY nearest.distance, q.id
+                LIMIT %(limit)s OFFSET %(skip)s
+                """,
+                {**params, "k": k},
+            )
+            rows = cur.fetchall()
+            if len(rows) == limit or k >= ANN_MAX_CANDIDATES:
+                break
+            k *= ANN_OVERFETCH_FACTOR
+
+        if len(rows) < limit:
+            # The index could not supply enough matching rows: the filter
+            # is too selective for over-fetching, the page lies past
+            # ANN_MAX_CANDIDATES, or it is the last one. Rank exactly.
+            return _search_quotes_semantic_exact(cur, where, params)
+        return [_map_page_entry_row(row) for row in rows]
+
+
+def _search_quotes_semantic_exact(
+    cur, where: str, params: dict
 ) -> List[model.QuotePageEntry]:
+    # The MATERIALIZED CTE keeps the planner from answering the ORDER BY
+    # with the HNSW index and filtering afterwards.
+    cur.execute(
+        f"""
+        WITH matching AS MATERIALIZED (
+            SELECT q.id, q.embedding <=> %(embedding)s AS distance
+            FROM quote q
+            WHERE {where}
+        )
+        SELECT {_PAGE_ENTRY_COLUMNS}
+        FROM matching
+        JOIN quote q ON q.id = matching.id
+        JOIN author a ON a.id = q.author_id
+        ORDER BY matching.distance, q.id
+        LIMIT %(limit)s OFFSET %(skip)s
+        """,
+        params,
+    )
+    return [_map_page_entry_row(row) for row in cur.fetchall()]
+
+
+# Columns of a QuotePageEntry computed in SQL for rows of `quote q JOIN
+# author a`, so that list endpoints need a single round trip instead of one
+# query per quote for tags and favorites. Expects a %(user_id)s parameter.
+_PAGE_ENTRY_COLUMNS = """
+    q.id,
+    q.text,
+    a.id AS author_id,
+    a.name AS author_name,
+    COALESCE(
+        (SELECT array_agg(t.name ORDER BY t.name)
+         FROM taggedas ta JOIN tag t ON t.id = ta.tag_id
+         WHERE ta.quote_id = q.id),
+        ARRAY[]::text[]
+    ) AS tags,
+    (SELECT COUNT(*) FROM user_quote_favorite f WHERE f.quote_id = q.id)
+        AS favorite_count,
+    EXISTS (
+        SELECT 1 FROM user_quote_favorite f
+        WHERE f.quote_id = q.id AND f.user_id = %(user_id)s
+    ) AS is_favorited
+"""
+
+# Private quotes are only shown to their owner. The viewer's author is
+# looked up once (an InitPlan), not per quote. Needs %(user_id)s.
+_VISIBLE_TO_USER = """(
+    q.is_public
+    OR q.author_id = (SELECT author_id FROM "user" WHERE id = %(user_id)s)
+)"""
+
+
+def _map_page_entry_row(row: tuple) -> model.QuotePageEntry:
+    # The columns come from _PAGE_ENTRY_COLUMNS with the model's types
+    # already, so the entry is built without validation; list endpoints
+    # return it through responses.FastJSONResponse, which does not validate
+    # it either.
+    return model.QuotePageEntry.model_construct(
+        id=row[0],
+        text=row[1],
+        authorId=row[2],
+        authorName=row[3],
+        tags=row[4],
+        favoriteCount=row[5],
+        isFavorited=row[6],
+    )
+
+
+MAX_BATCH_QUOTES = 100
+
+# The viewer's author is looked up once (an InitPlan), not per quote.
+_QUOTES_BY_IDS_SQL = f"""
+    SELECT {_PAGE_ENTRY_COLUMNS},
+        COALESCE(
+            (SELECT json_agg(
+                 json_build_object('id', c.id, 'name', c.name)
+                 ORDER BY c.name)
+             FROM collectioncontains cc
+             JOIN collection c ON c.id = cc.collection_id
+             WHERE cc.quote_id = q.id
+               AND c.author_id = (SELECT author_id FROM "user"
+                                  WHERE id = %(user_id)s)),
+            '[]'::json
+        ) AS user_collections
+    FROM unnest(%(ids)s::integer[]) WITH ORDINALITY AS requested(id, position)
+    JOIN quote q ON q.id = requested.id
+    JOIN author a ON a.id = q.author_id
+    WHERE {_VISIBLE_TO_USER}
+    ORDER BY requested.position
+"""
+
+
+def get_quotes_by_ids(
+    conn: Connection,
+    quote_ids: List[int],
+    current_user_id: Optional[int] = None,
+) -> List[model.QuotePageEntry]:
+    """
+    The entries of `quote_ids`, with the viewer's collections of each, in
+    one query. They come back in the order requested, without repeats; ids
+    of missing quotes, and of other users' private quotes, are skipped.
+    """
+    quote_ids = list(dict.fromkeys(quote_ids))
     with conn.cursor() as cur:
         cur.execute(
-            """
-            SELECT q.id, q.text, a.name as author_name, a.id as author_id, (q.embedding <-> %s::vector) as distance
+            _QUOTES_BY_IDS_SQL,
+            {"ids": quote_ids, "user_id": current_user_id},
+        )
+        entries = []
+        for row in cur.fetchall():
+            entry = _map_page_entry_row(row)
+            entry.userCollections = row[7]
+            entries.append(entry)
+        return entries
+
+
+def search_quotes_hybrid(
+    conn: Connection,
+    query_text: str,
+    query_embedding: Optional[np.ndarray],
+    limit: int = 10,
+    skip: int = 0,
+    current_user_id: Optional[int] = None,
+    candidates: int = 100,
+    rrf_k: int = 60,
+) -> List[model.QuotePageEntry]:
+    """
+    Hybrid search over public quotes: full-text matches on the quote text and
+    author name are fused with vector nearest neighbours using reciprocal
+    rank fusion (score = sum of 1 / (rrf_k + rank) over both rankings).
+    Each ranking is cut at `candidates` rows before fusing. When
+    `query_embedding` is None only the lexical ranking is used.
+    Ranking, fusion and enrichment run in one statement.
+    """
+    candidates = max(candidates, skip + limit)
+    semantic_cte = f"""
+        semantic AS (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY distance) AS rank
+            FROM (
+                {vector.nearest_quotes_sql("%(candidates)s", "q.is_public = TRUE")}
+            ) nearest
+        ),
+    """
+    if query_embedding is None:
+        semantic_cte = """
+        semantic AS (SELECT NULL::integer AS id, NULL::bigint AS rank
+                     WHERE FALSE),
+    """
+    # ts_rank_cd normalization 1|32: damp long documents and scale to 0..1,
+    # the closest built-in equivalent of BM25 length normalization.
+    sql = f"""
+        WITH tsq AS (
+            SELECT
+                websearch_to_tsquery('english', %(query)s)
+                    || websearch_to_tsquery('simple', %(query)s) AS quote_query,
+                websearch_to_tsquery('simple', %(query)s) AS author_query
+        ),
+        {semantic_cte}
+        lexical_hits AS (
+            SELECT q.id, ts_rank_cd(q.text_tsv, tsq.quote_query, 33) AS score
+            FROM quote q, tsq
+            WHERE q.is_public = TRUE AND q.text_tsv @@ tsq.quote_query
+            UNION ALL
+            SELECT q.id, ts_rank_cd(a.name_tsv, tsq.author_query, 33)
+            FROM author a
+            JOIN quote q ON q.author_id = a.id, tsq
+            WHERE q.is_public = TRUE AND a.name_tsv @@ tsq.author_query
+        ),
+        lexical AS (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY SUM(score) DESC, id) AS rank
+            FROM lexical_hits
+            GROUP BY id
+            ORDER BY rank
+            LIMIT %(candidates)s
+        ),
+        fused AS (
+            SELECT id, SUM(1.0 / (%(rrf_k)s + rank)) AS score
+            FROM (
+                SELECT id, rank FROM semantic
+                UNION ALL
+                SELECT id, rank FROM lexical
+            ) ranked
+            GROUP BY id
+        )
+        SELECT {_PAGE_ENTRY_COLUMNS}
+        FROM fused
+        JOIN quote q ON q.id = fused.id
+        JOIN author a ON a.id = q.author_id
+        ORDER BY fused.score DESC, q.id
+        LIMIT %(limit)s OFFSET %(skip)s
+    """
+    with conn.cursor() as cur:
+        if query_embedding is not None:
+            _set_ef_search(cur, candidates)
+        cur.execute(
+            sql,
+            {
+                "query": query_text,
+                "embedding": query_embedding,
+                "embedding_model": embedding.EMBEDDING_MODEL_NAME,
+                "candidates": candidates,
+                "rrf_k": rrf_k,
+                "limit": limit,
+                "skip": skip,
+                "user_id": current_user_id,
+            },
+        )
+        return [_map_page_entry_row(row) for row in cur.fetchall()]
+
+
+# Precomputed "more like this" lists: the SIMILAR_QUOTES_K nearest public
+# quotes of every quote, kept in quote_neighbor. Lists are refreshed
+# incrementally when a quote is created or its text changes.
+SIMILAR_QUOTES_K = 20
+
+
+def _compute_quote_neighbors(cur, quote_ids: List[int]) -> None:
+    """Replaces the neighbor lists of `quote_ids` with fresh ANN results."""
+    cur.execute(
+        "DELETE FROM quote_neighbor WHERE quote_id = ANY(%(ids)s)",
+        {"ids": quote_ids},
+    )
+    cur.execute(
+        "SELECT set_config('hnsw.ef_search', %s, true)",
+        (str(max(SIMILAR_QUOTES_K * 2, ANN_MIN_EF_SEARCH)),),
+    )
+    cur.execute(
+        """
+        INSERT INTO quote_neighbor (quote_id, neighbor_id, distance)
+        SELECT src.id, nearest.id, nearest.distance
+        FROM quote src
+        CROSS JOIN LATERAL (
+            SELECT q.id, q.embedding <=> src.embedding AS distance
             FROM quote q
-            JOIN author a ON q.author_id = a.id
-            WHERE q.is_public = TRUE
-            ORDER BY distance
-            LIMIT %s OFFSET %s
+            WHERE q.id <> src.id AND q.is_public = TRUE
+              AND q.embedding_model = src.embedding_model
+            ORDER BY q.embedding <=> src.embedding
+            LIMIT %(k)s
+        ) nearest
+        WHERE src.id = ANY(%(ids)s) AND src.embedding IS NOT NULL
+        """,
+        {"ids": quote_ids, "k": SIMILAR_QUOTES_K},
+    )
+
+
+def refresh_quote_neighbors(
+    conn: Connection, quote_id: int, embedding_changed: bool = False
+) -> None:
+    """
+    Updates quote_neighbor after `quote_id` was inserted or re-embedded.
+    Does not commit; call it inside the transaction that wrote the quote.
+    """
+    with conn.cursor() as cur:
+        stale: List[int] = []
+        if embedding_changed:
+            # Lists that contained the old vector may now be wrong.
+            cur.execute(
+                "DELETE FROM quote_neighbor WHERE neighbor_id = %(quote_id)s "
+                "RETURNING quote_id",
+                {"quote_id": quote_id},
+            )
+            stale = [row[0] for row in cur.fetchall()]
+
+        _compute_quote_neighbors(cur, [quote_id, *stale])
+
+        # Cosine distance is symmetric, so the quote's own neighbors are the
+        # lists it is most likely to enter. Offer it to each of them and trim
+        # them back to SIMILAR_QUOTES_K.
+        cur.execute(
+            """
+            INSERT INTO quote_neighbor (quote_id, neighbor_id, distance)
+            SELECT qn.neighbor_id, qn.quote_id, qn.distance
+            FROM quote_neighbor qn
+            JOIN quote q ON q.id = qn.quote_id
+            WHERE qn.quote_id = %(quote_id)s AND q.is_public = TRUE
+            ON CONFLICT (quote_id, neighbor_id)
+                DO UPDATE SET distance = EXCLUDED.distance
+            RETURNING quote_id
             """,
-            (query_embedding, limit, skip),
+            {"quote_id": quote_id},
         )
+        offered = [row[0] for row in cur.fetchall()]
+        if offered:
+            cur.execute(
+                """
+                DELETE FROM quote_neighbor qn
+                USING (
+                    SELECT quote_id, neighbor_id,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY quote_id
+                               ORDER BY distance, neighbor_id
+                           ) AS position
+                    FROM quote_neighbor
+                    WHERE quote_id = ANY(%(ids)s)
+                ) ranked
+                WHERE qn.quote_id = ranked.quote_id
+                  AND qn.neighbor_id = ranked.neighbor_id
+                  AND ranked.position > %(k)s
+                """,
+                {"ids": offered, "k": SIMILAR_QUOTES_K},
+            )
 
-        results = []
-        for row in cur.fetchall():
-            quote_id, text, author_name_str, author_id_int, _ = row
-            tags = get_tags_for_quote(conn, quote_id)
-            tag_names = [tag.name for tag in tags]
-
-            favorite_count = get_quote_favorite_count(conn, quote_id)
-            is_favorited_status = False
-            if current_user_id:
-                is_favorited_status = is_quote_favorited_by_user(
-                    conn, current_user_id, quote_id
-                )
 
-            results.append(
-                model.QuotePageEntry(
-                    id=quote_id,
-                    text=text,
-                    author=author_name_str,
-                    authorName=author_name_str,
-                    authorId=author_id_int,
-                    tags=tag_names,
-                    isFavorited=is_favorited_status,
-                    favoriteCount=favorite_count,
-                )
+def rebuild_quote_neighbors(conn: Connection, batch_size: int = 200) -> int:
+    """Recomputes every neighbor list. Returns the number of quotes."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT id FROM quote WHERE embedding IS NOT NULL ORDER BY id"
+        )
+        quote_ids = [row[0] for row in cur.fetchall()]
+        for i in range(0, len(quote_ids), batch_size):
+            _compute_quote_neighbors(cur, quote_ids[i : i + batch_size])
+            conn.commit()
+    return len(quote_ids)
+
+
+def get_similar_quotes(
+    conn: Connection,
+    quote_id: int,
+    limit: int = 10,
+    current_user_id: Optional[int] = None,
+) -> List[model.QuotePageEntry] | None:
+    """
+    Nearest public quotes to `quote_id`, read from its precomputed neighbor
+    list. Falls back to a live ANN query on the stored embedding when the
+    list has not been built yet. Returns None if the quote does not exist
+    or is another user's private quote.
+    """
+    params = {
+        "quote_id": quote_id,
+        "limit": limit,
+        "user_id": current_user_id,
+    }
+    with conn.cursor(binary=True) as cur:
+        cur.execute(
+            f"""
+            WITH source AS (
+                SELECT q.id FROM quote q
+                WHERE q.id = %(quote_id)s AND {_VISIBLE_TO_USER}
+            )
+            SELECT {_PAGE_ENTRY_COLUMNS}
+            FROM source
+            JOIN quote_neighbor qn ON qn.quote_id = source.id
+            JOIN quote q ON q.id = qn.neighbor_id
+            JOIN author a ON a.id = q.author_id
+            WHERE q.is_public = TRUE
+            ORDER BY qn.distance, q.id
+            LIMIT %(limit)s
+            """,
+            params,
+        )
+        rows = cur.fetchall()
+        if rows:
+            return [_map_page_entry_row(row) for row in rows]
+
+        cur.execute(
+            "SELECT q.embedding, q.embedding_model FROM quote q "
+            f"WHERE q.id = %(quote_id)s AND {_VISIBLE_TO_USER}",
+            params,
+        )
+        source = cur.fetchone()
+        if source is None:
+            return None
+        if source[0] is None:
+            return []
+        _set_ef_search(cur, limit)
+        cur.execute(
+            f"""
+            WITH nearest AS MATERIALIZED (
+                {vector.nearest_quotes_sql("%(limit)s", "q.id <> %(quote_id)s AND q.is_public = TRUE")}
             )
-    return results
+            SELECT {_PAGE_ENTRY_COLUMNS}
+            FROM nearest
+            JOIN quote q ON q.id = nearest.id
+            JOIN author a ON a.id = q.author_id
+            ORDER BY nearest.distance, q.id
+            """,
+            {**params, "embedding": source[0], "embedding_model": source[1]},
+        )
+        return [_map_page_entry_row(row) for row in cur.fetchall()]
 
 
+@cache.invalidates(cache.FAVORITE)
 def add_favorite(conn: Connection, user_id: int, quote_id: int) -> None:
     try:
         with conn.cursor() as cur:
             cur.execute(
-                "INSERT INTO user_quote_favorite (user_id, quote_id) VALUES (%s, %s) ON CONFLICT (user_id, quote_id) DO NOTHING",
-                (user_id, quote_id),
+                "INSERT INTO user_quote_favorite (user_id, quote_id) "
+                "SELECT %(user_id)s, q.id FROM quote q "
+                f"WHERE q.id = %(quote_id)s AND {_VISIBLE_TO_USER} "
+                "ON CONFLICT (user_id, quote_id) DO NOTHING",
+                {"user_id": user_id, "quote_id": quote_id},
             )
             conn.commit()
     except Exception as e:
@@ -918,6 +1612,7 @@ def add_favorite(conn: Connection, user_id: int, quote_id: int) -> None:
         )
 
 
+@cache.invalidates(cache.FAVORITE)
 def remove_favorite(conn: Connection, user_id: int, quote_id: int) -> None:
     try:
         with conn.cursor() as cur:
@@ -933,6 +1628,86 @@ def remove_favorite(conn: Connection, user_id: int, quote_id: int) -> None:
         )
 
 
+@cache.invalidates(cache.FAVORITE)
+def add_favorites(
+    conn: Connection, user_id: int, quote_ids: List[int]
+) -> List[int]:
+    """
+    Favorites many quotes in one statement. Returns the ids newly favorited;
+    ids of missing quotes, of other users' private quotes and of quotes
+    already favorited are skipped.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            INSERT INTO user_quote_favorite (user_id, quote_id)
+            SELECT %(user_id)s, q.id
+            FROM unnest(%(ids)s::integer[]) AS requested(id)
+            JOIN quote q ON q.id = requested.id
+            WHERE {_VISIBLE_TO_USER}
+            ON CONFLICT (user_id, quote_id) DO NOTHING
+            RETURNING quote_id
+            """,
+            {"user_id": user_id, "ids": list(quote_ids)},
+        )
+        added = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    return sorted(added)
+
+
+@cache.invalidates(cache.FAVORITE)
+def remove_favorites(
+    conn: Connection, user_id: int, quote_ids: List[int]
+) -> List[int]:
+    """Unfavorites many quotes in one statement. Returns the ids removed."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM user_quote_favorite "
+            "WHERE user_id = %s AND quote_id = ANY(%s) "
+            "RETURNING quote_id",
+            (user_id, list(quote_ids)),
+        )
+        removed = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    return sorted(removed)
+
+
+def get_user_favorites_page(
+    conn: Connection,
+    user_id: int,
+    limit: int = 50,
+    cursor: Optional[int] = None,
+) -> Tuple[List[model.QuotePageEntry], Optional[int]]:
+    """
+    One page of the quotes a user has favorited, by descending quote id, so
+    that pages are read in order from the (user_id, quote_id) primary key.
+    `cursor` is the nextCursor of the previous page, None on the last page.
+    Favorites of quotes their owner has since made private are left out.
+    """
+    params = {"user_id": user_id, "limit": limit + 1, "before": cursor}
+    after = "AND uf.quote_id < %(before)s" if cursor is not None else ""
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT {_PAGE_ENTRY_COLUMNS}
+            FROM user_quote_favorite uf
+            JOIN quote q ON q.id = uf.quote_id
+            JOIN author a ON a.id = q.author_id
+            WHERE uf.user_id = %(user_id)s {after}
+              AND {_VISIBLE_TO_USER}
+            ORDER BY uf.quote_id DESC
+            LIMIT %(limit)s
+            """,
+            params,
+        )
+        rows = cur.fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1][0]
+    return [_map_page_entry_row(row) for row in rows], next_cursor
+
+
 def is_quote_favorited_by_user(
     conn: Connection, user_id: int, quote_id: int
 ) -> bool:
@@ -956,64 +1731,79 @@ def get_quote_favorite_count(conn: Connection, quote_id: int) -> int:
         return count_row[0] if count_row else 0
 
 
+def _escape_like(term: str) -> str:
+    """Escapes LIKE/ILIKE wildcards so the term matches literally."""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 def search_collections(
     conn: Connection,
     search_term: str,
     limit: int = 10,
     skip: int = 0,
     current_user_id: Optional[int] = None,
+    mode: str = "trigram",
 ) -> List[model.CollectionEntry]:
     collection_entries = []
-    params = []
+    search_term = search_term.strip()
+    params: dict = {
+        "user_id": current_user_id,
+        "search_term": search_term,
+        "pattern": f"%{_escape_like(search_term)}%",
+        "limit": limit,
+        "skip": skip,
+    }
 
     base_query = """
         SELECT
             c.id, c.name, c.description, c.author_id,
             a.name AS author_name, c.is_public,
-            (SELECT COUNT(*) FROM collectioncontains cc WHERE cc.collection_id = c.id) AS quote_count
+            c.quote_count
         FROM collection c
         JOIN author a ON c.author_id = a.id
     """
 
     where_parts = []
+    order_by = "c.name"
 
-    search_condition_str = (
-        "(LOWER(c.name) ~* LOWER(%s) OR LOWER(c.description) ~* LOWER(%s))"
-    )
+    if mode == "fts":
+        # Uses the GIN index on the generated search_tsv column.
+        search_condition_str = (
+            "c.search_tsv @@ websearch_to_tsquery('simple', %(search_term)s)"
+        )
+        rank_str = "ts_rank_cd(c.search_tsv, websearch_to_tsquery('simple', %(search_term)s))"
+    elif mode == "trigram":
+        # The term is matched literally as a substring; both ILIKE
+        # predicates can use the pg_trgm GIN indexes.
+        search_condition_str = (
+            "(c.name ILIKE %(pattern)s OR c.description ILIKE %(pattern)s)"
+        )
+        rank_str = "GREATEST(similarity(c.name, %(search_term)s), similarity(c.description, %(search_term)s) * 0.5)"
+    else:
+        raise ValueError(f"Unknown collection search mode: {mode}")
 
-    users_private_collection_condition_str = '(c.author_id = (SELECT author_id FROM "user" WHERE id = %s) AND c.is_public = FALSE)'
-
-    if search_term.strip():
-        search_text_param = (
-            search_term.strip()
-        )  # Use the search term directly as regex pattern
-        if current_user_id is not None:
-            main_condition = f"(c.is_public = TRUE OR {users_private_collection_condition_str}) AND {search_condition_str}"
-            where_parts.append(main_condition)
-            params.extend(
-                [current_user_id, search_text_param, search_text_param]
-            )
-        else:
-            main_condition = f"(c.is_public = TRUE AND {search_condition_str})"
-            where_parts.append(main_condition)
-            params.extend([search_text_param, search_text_param])
+    users_private_collection_condition_str = '(c.author_id = (SELECT author_id FROM "user" WHERE id = %(user_id)s) AND c.is_public = FALSE)'
+
+    if current_user_id is not None:
+        where_parts.append(
+            f"(c.is_public = TRUE OR {users_private_collection_condition_str})"
+        )
     else:
-        if current_user_id is not None:
-            main_condition = f"(c.is_public = TRUE OR {users_private_collection_condition_str})"
-            where_parts.append(main_condition)
-            params.append(current_user_id)
-        else:
-            where_parts.append("c.is_public = TRUE")
+        where_parts.append("c.is_public = TRUE")
+
+    if params["search_term"]:
+        where_parts.append(search_condition_str)
+        if rank_str is not None:
+            order_by = f"{rank_str} DESC, c.name"
 
     final_query = base_query
     if where_parts:
         final_query += " WHERE " + " AND ".join(where_parts)
 
-    final_query += " ORDER BY c.name LIMIT %s OFFSET %s"
-    params.extend([limit, skip])
+    final_query += f" ORDER BY {order_by} LIMIT %(limit)s OFFSET %(skip)s"
 
     with conn.cursor() as cur:
-        cur.execute(final_query, tuple(params))
+        cur.execute(final_query, params)
         for row in cur.fetchall():
             collection_entries.append(
                 model.CollectionEntry(
@@ -1029,6 +1819,7 @@ def search_collections(
     return collection_entries
 
 
+@cache.invalidates(cache.COLLECTION)
 def update_collection(
     conn: Connection,
     collection_id: int,
@@ -1037,7 +1828,7 @@ def update_collection(
 ) -> model.Collection | None:
     with conn.cursor() as cur:
         cur.execute(
-            "SELECT author_id, name, description, is_public, created_at, updated_at "
+            "SELECT author_id, name, description, is_public, created_at, updated_at, quote_count "
             "FROM collection WHERE id = %s",
             (collection_id,),
         )
@@ -1052,6 +1843,7 @@ def update_collection(
             current_is_public,
             created_at,
             updated_at,
+            quote_count,
         ) = collection_row
 
         if current_author_id != author_id:
@@ -1097,11 +1889,6 @@ def update_collection(
 
         if not update_fields_dict:
             author_details = get_author_by_id(conn, current_author_id)
-            quote_count_result = cur.execute(
-                "SELECT COUNT(*) FROM collectioncontains WHERE collection_id = %s",
-                (collection_id,),
-            ).fetchone()
-            quote_count = quote_count_result[0] if quote_count_result else 0
             return model.Collection(
                 id=collection_id,
                 author_id=current_author_id,
@@ -1142,6 +1929,31 @@ def update_collection(
         return None
 
 
+@cache.invalidates(cache.COLLECTION)
+def reconcile_collection_quote_counts(conn: Connection) -> int:
+    """
+    Recomputes every collection's quote_count from collectioncontains.
+    Returns the number of collections whose count had drifted.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE collection c SET quote_count = actual.n
+            FROM (
+                SELECT c2.id, COUNT(cc.quote_id) AS n
+                FROM collection c2
+                LEFT JOIN collectioncontains cc ON cc.collection_id = c2.id
+                GROUP BY c2.id
+            ) actual
+            WHERE c.id = actual.id AND c.quote_count <> actual.n
+            """
+        )
+        fixed = cur.rowcount
+    conn.commit()
+    return fixed
+
+
+@cache.invalidates(cache.COLLECTION)
 def delete_collection_by_id(
     conn: Connection, collection_id: int, author_id: int
 ) -> bool:
@@ -1170,6 +1982,7 @@ def delete_collection_by_id(
         return deleted_row_count > 0
 
 
+@cache.invalidates(cache.QUOTE, cache.TAG)
 def update_quote_with_client_payload(
     conn: Connection,
     quote_id: int,
@@ -1196,11 +2009,13 @@ def update_quote_with_client_payload(
 
         if payload.text is not None and payload.text != original_text:
             update_fields["text"] = payload.text
-            update_fields["embedding"] = embedding.generate_embedding(
-                payload.text
+            sync_embedding_model(conn)
+            update_fields["embedding"], model_name = (
+                embedding.generate_embedding_with_model(payload.text)
             )
         else:
             update_fields["embedding"] = original_embedding
+            model_name = None
 
         if payload.authorName is not None:
             new_author_obj = get_or_create_author_by_name(
@@ -1224,6 +2039,12 @@ def update_quote_with_client_payload(
             if "text" in update_fields:
                 set_clause_parts.append("text = %(text)s")
                 set_clause_parts.append("embedding = %(embedding)s")
+                set_clause_parts.append(
+                    "embedding_model = %(embedding_model)s"
+                )
+                # A pending re-embed must pick up the new text.
+                set_clause_parts.append("embedding_next = NULL")
+                set_clause_parts.append("embedding_next_model = NULL")
             if "author_id" in update_fields:
                 set_clause_parts.append("author_id = %(author_id)s")
 
@@ -1237,6 +2058,9 @@ def update_quote_with_client_payload(
                     if k in ["text", "embedding", "author_id"]
                 }
                 execute_params["quote_id"] = quote_id
+                execute_params["embedding_model"] = _embedding_model_for(
+                    update_fields["embedding"], model_name
+                )
 
                 cur.execute(
                     f"UPDATE quote SET {set_clause} WHERE id = %(quote_id)s",
@@ -1265,6 +2089,8 @@ def update_quote_with_client_payload(
             existing_tags = get_tags_for_quote(conn, quote_id)
             updated_tag_names = [t.name for t in existing_tags]
 
+        if "text" in update_fields:
+            refresh_quote_neighbors(conn, quote_id, embedding_changed=True)
         conn.commit()
 
         is_faved = is_quote_favorited_by_user(conn, user_author_id, quote_id)
@@ -1285,6 +2111,7 @@ def update_quote_with_client_payload(
         )
 
 
+@cache.invalidates(cache.QUOTE, cache.TAG, cache.COLLECTION, cache.FAVORITE)
 def delete_quote_for_user(
     conn: Connection, quote_id: int, user_author_id: int
 ) -> bool:
@@ -1368,99 +2195,159 @@ def get_authors_paginated(
         )
 
 
-def _map_row_to_quote_page_entry(
-    conn: Connection, row: tuple, current_user_id: Optional[int] = None
-) -> model.QuotePageEntry:
-    quote_id, author_id_val, text, is_public, _, created_at, updated_at = row[
-        :7
-    ]
+def _encode_collection_cursor(added_at: datetime, quote_id: int) -> str:
+    raw = f"{added_at.isoformat()}|{quote_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
 
-    author = get_author_by_id(conn, author_id_val)
-    author_name = author.name if author else "Unknown Author"
-
-    tags_for_quote = get_tags_for_quote(conn, quote_id)
-    tag_names = [tag.name for tag in tags_for_quote]
-
-    is_favorited_status = False
-    fav_count = 0
-    if current_user_id:
-        is_favorited_status = is_quote_favorited_by_user(
-            conn, user_id=current_user_id, quote_id=quote_id
-        )
-    fav_count = get_quote_favorite_count(conn, quote_id=quote_id)
-
-    return model.QuotePageEntry(
-        id=quote_id,
-        text=text,
-        author=author_name,
-        authorId=author_id_val,
-        authorName=author_name,
-        tags=tag_names,
-        isFavorited=is_favorited_status,
-        favoriteCount=fav_count,
-    )
 
+def _decode_collection_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        added_at, quote_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(added_at), int(quote_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid collection cursor.") from e
 
-def get_quote_page_entries_for_collection(
-    conn: Connection, collection_id: int, current_user_id: Optional[int] = None
-) -> List[model.QuotePageEntry]:
-    quote_entries = []
+
+def get_collection_quotes_page(
+    conn: Connection,
+    collection_id: int,
+    current_user_id: Optional[int] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Tuple[List[model.QuotePageEntry], Optional[str]]:
+    """
+    One page of a collection's quotes, most recently added first, enriched
+    in the same query. Pages are keyed on (added_at, quote_id) rather than
+    an offset, so deep pages cost the same as the first. Other users'
+    private quotes are left out. Returns the entries and the cursor of the
+    next page, or None on the last page.
+    """
+    params = {
+        "collection_id": collection_id,
+        "user_id": current_user_id,
+        "limit": limit + 1,
+    }
+    after = ""
+    if cursor is not None:
+        params["added_at"], params["quote_id"] = _decode_collection_cursor(
+            cursor
+        )
+        after = "AND (cc.added_at, cc.quote_id) < (%(added_at)s, %(quote_id)s)"
     with conn.cursor() as cur:
         cur.execute(
-            """
-            SELECT q.id, q.author_id, q.text, q.is_public, q.embedding, q.created_at, q.updated_at
-            FROM quote q
-            JOIN collectioncontains cc ON q.id = cc.quote_id
-            WHERE cc.collection_id = %s
-            ORDER BY cc.added_at DESC NULLS LAST, q.created_at DESC;
+            f"""
+            SELECT {_PAGE_ENTRY_COLUMNS}, cc.added_at
+            FROM collectioncontains cc
+            JOIN quote q ON q.id = cc.quote_id
+            JOIN author a ON a.id = q.author_id
+            WHERE cc.collection_id = %(collection_id)s {after}
+              AND {_VISIBLE_TO_USER}
+            ORDER BY cc.added_at DESC, cc.quote_id DESC
+            LIMIT %(limit)s
             """,
-            (collection_id,),
+            params,
         )
-        for row in cur.fetchall():
-            quote_entries.append(
-                _map_row_to_quote_page_entry(conn, row, current_user_id)
-            )
-    return quote_entries
+        rows = cur.fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_collection_cursor(rows[-1][-1], rows[-1][0])
+    return [_map_page_entry_row(row) for row in rows], next_cursor
 
 
-def user_add_quote_to_collection(
-    conn: Connection, user_id: int, quote_id: int, collection_id: int
-) -> model.CollectionQuoteLink:
-    user = get_user_by_id(conn, user_id)
-    if not user or not user.author_id:
-        raise ValueError("User not found or user author_id is missing.")
-
-    collection = get_collection_by_id(conn, collection_id)
-    if not collection:
+def _check_collection_owner(
+    conn: Connection, user_id: int, collection_id: int, action: str
+) -> None:
+    """
+    Raises ValueError unless `user_id` owns `collection_id`. One indexed
+    lookup; the collection's quotes are never loaded.
+    """
+    row = conn.execute(
+        "SELECT c.author_id, u.author_id FROM collection c "
+        'LEFT JOIN "user" u ON u.id = %s WHERE c.id = %s',
+        (user_id, collection_id),
+    ).fetchone()
+    if row is None:
         raise ValueError(f"Collection with ID {collection_id} not found.")
-
-    if collection.author_id != user.author_id:
+    collection_author_id, user_author_id = row
+    if user_author_id is None:
+        raise ValueError("User not found or user author_id is missing.")
+    if collection_author_id != user_author_id:
         raise ValueError(
-            "User is not authorized to add quotes to this collection."
+            f"User is not authorized to {action} this collection."
         )
 
+
+def user_add_quote_to_collection(
+    conn: Connection, user_id: int, quote_id: int, collection_id: int
+) -> model.CollectionQuoteLink:
+    _check_collection_owner(conn, user_id, collection_id, "add quotes to")
+    if not quote_visible(conn, quote_id, user_id):
+        raise ValueError(f"Quote with ID {quote_id} not found.")
     return add_quote_to_collection(conn, quote_id, collection_id)
 
 
 def user_remove_quote_from_collection(
     conn: Connection, user_id: int, quote_id: int, collection_id: int
 ) -> bool:
-    user = get_user_by_id(conn, user_id)
-    if not user or not user.author_id:
-        raise ValueError("User not found or user author_id is missing.")
+    _check_collection_owner(conn, user_id, collection_id, "remove quotes from")
+    return remove_quote_from_collection(conn, quote_id, collection_id)
 
-    collection = get_collection_by_id(conn, collection_id)
-    if not collection:
-        raise ValueError(f"Collection with ID {collection_id} not found.")
 
-    if collection.author_id != user.author_id:
-        raise ValueError(
-            "User is not authorized to remove quotes from this collection."
+@cache.invalidates(cache.COLLECTION)
+def user_add_quotes_to_collection(
+    conn: Connection, user_id: int, quote_ids: List[int], collection_id: int
+) -> List[int]:
+    """
+    Adds many quotes to a collection owned by the user in one statement.
+    Returns the ids actually added; ids of missing quotes, of other users'
+    private quotes and of quotes already in the collection are skipped.
+    """
+    _check_collection_owner(conn, user_id, collection_id, "add quotes to")
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            INSERT INTO collectioncontains (quote_id, collection_id, added_at)
+            SELECT q.id, %(collection_id)s, NOW() FROM quote q
+            WHERE q.id = ANY(%(ids)s) AND {_VISIBLE_TO_USER}
+            ON CONFLICT (collection_id, quote_id) DO NOTHING
+            RETURNING quote_id
+            """,
+            {
+                "collection_id": collection_id,
+                "ids": list(quote_ids),
+                "user_id": user_id,
+            },
         )
+        added = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    return sorted(added)
 
-    return remove_quote_from_collection(conn, quote_id, collection_id)
+
+@cache.invalidates(cache.COLLECTION)
+def user_remove_quotes_from_collection(
+    conn: Connection, user_id: int, quote_ids: List[int], collection_id: int
+) -> List[int]:
+    """
+    Removes many quotes from a collection owned by the user in one
+    statement. Returns the ids actually removed.
+    """
+    _check_collection_owner(conn, user_id, collection_id, "remove quotes from")
+    with conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM collectioncontains "
+            "WHERE collection_id = %s AND quote_id = ANY(%s) "
+            "RETURNING quote_id",
+            (collection_id, list(quote_ids)),
+        )
+        removed = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    return sorted(removed)
 
 
+@cache.invalidates(cache.COLLECTION)
 def remove_quote_from_collection(
     conn: Connection, quote_id: int, collection_id: int
 ) -> bool:
@@ -11,6 +11,9 @@ import numpy as np
 import pandas as pd
 from fastembed import TextEmbedding
 
+import app.dedup as dedup
+import app.embedding as embedding
+
 # Global variables for managing the embedding model instance
 embedding_model_instance: Optional[TextEmbedding] = None
 current_embedding_model_name: Optional[str] = None
@@ -21,7 +24,10 @@ logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
-DEFAULT_EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"
+# The model the backend embeds queries with. Each generated quote records
+# the model that actually produced its vector, so quotes embedded by the
+# fallback model are not compared with queries from a different model.
+DEFAULT_EMBEDDING_MODEL = embedding.EMBEDDING_MODEL_NAME
 # EMBEDDING_MODEL_DIM = 384 # For BAAI/bge-small-en-v1.5
 # Fallback to a known FastEmbed model if the default is not found or for testing
 FALLBACK_EMBEDDING_MODEL = (
@@ -58,8 +64,11 @@ def get_embedding_model(
             )
         return embedding_model_instance
     except Exception as e:
-        logger.error(
-            f"Error initializing FastEmbed model '{model_name}': {e}. Attempting fallback."
+        logger.warning(
+            f"Error initializing FastEmbed model '{model_name}': {e}. "
+            f"Falling back to '{FALLBACK_EMBEDDING_MODEL}'; quotes will be "
+            f"recorded with that model and not match searches from "
+            f"'{model_name}' until re-embedded with `cli.py reembed`."
         )
         try:
             if (
@@ -86,6 +95,39 @@ def get_embedding_model(
             raise
 
 
+def find_csv_duplicates(
+    texts: list[str], embeddings: list, threshold: float, block_size: int = 128
+) -> dict[int, int]:
+    """
+    Maps the index of every near-duplicate row to the index of the first
+    row it duplicates: same normalized text, or an embedding at least
+    `threshold` cosine similar to an earlier row.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = matrix / np.where(norms == 0, 1, norms)
+
+    first_by_text: dict[str, int] = {}
+    duplicate_of: dict[int, int] = {}
+    for start in range(0, len(texts), block_size):
+        stop = min(start + block_size, len(texts))
+        # Similarities of this block against every row up to its end.
+        sims = matrix[start:stop] @ matrix[:stop].T
+        for i in range(start, stop):
+            key = dedup.normalize_text(texts[i])
+            if key in first_by_text:
+                duplicate_of[i] = first_by_text[key]
+                continue
+            if i > 0:
+                earlier = sims[i - start, :i]
+                j = int(np.argmax(earlier))
+                if earlier[j] >= threshold:
+                    duplicate_of[i] = duplicate_of.get(j, j)
+                    continue
+            first_by_text[key] = i
+    return duplicate_of
+
+
 def generate_sql_from_csv(
     csv_filepath: str,
     sql_filepath: str,
@@ -169,6 +211,17 @@ def generate_sql_from_csv(
             logger.error(f"Error during batch embedding generation: {e}")
             sys.exit(1)
 
+        duplicate_of = find_csv_duplicates(
+            quote_texts_for_embedding,
+            all_embeddings,
+            dedup.DUPLICATE_SIMILARITY_THRESHOLD,
+        )
+        if duplicate_of:
+            logger.info(
+                f"Merging {len(duplicate_of)} near-duplicate quotes into their first occurrence."
+            )
+        quotes_by_embedding_idx = {}
+
         embedding_idx = 0
         for i, row in enumerate(rows_for_embedding):
             quote_text = row.get("quote", "").strip()
@@ -230,8 +283,18 @@ def generate_sql_from_csv(
 
             # Retrieve the pre-generated embedding
             current_embedding = all_embeddings[embedding_idx]
+            original_idx = duplicate_of.get(embedding_idx)
             embedding_idx += 1
 
+            if original_idx is not None:
+                original_tag_ids = quotes_by_embedding_idx[original_idx][
+                    "tag_ids"
+                ]
+                for tag_id in current_quote_tag_ids:
+                    if tag_id not in original_tag_ids:
+                        original_tag_ids.append(tag_id)
+                continue
+
             embedding_list = (
                 current_embedding.tolist()
                 if isinstance(current_embedding, np.ndarray)
@@ -250,6 +313,7 @@ def generate_sql_from_csv(
                     "updated_at": datetime.now(UTC).isoformat(),
                 }
             )
+            quotes_by_embedding_idx[embedding_idx - 1] = quotes_list[-1]
             next_quote_id += 1
             if (i + 1) % 100 == 0:
                 logger.info(
@@ -420,7 +484,7 @@ def generate_sql_from_csv(
                 " ", ""
             )  # Compact string like "[0.1,0.2,...]"
             sqlfile.write(
-                f"INSERT INTO quote (id, text, author_id, embedding, is_public, created_at, updated_at) VALUES ({q_info['id']}, '{escaped_text}', {q_info['author_id']}, '{embedding_str}'::vector, {q_info['is_public']}, '{q_info['created_at']}', '{q_info['updated_at']}') ON CONFLICT (id) DO NOTHING;\n"
+                f"INSERT INTO quote (id, text, author_id, embedding, embedding_model, is_public, created_at, updated_at) VALUES ({q_info['id']}, '{escaped_text}', {q_info['author_id']}, '{embedding_str}'::vector, '{current_embedding_model_name}', {q_info['is_public']}, '{q_info['created_at']}', '{q_info['updated_at']}') ON CONFLICT (id) DO NOTHING;\n"
             )
         sqlfile.write("\n")
 
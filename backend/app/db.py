@@ -1,8 +1,13 @@
 import os
+import time
 from dataclasses import dataclass
 
 import psycopg
 
+import app.metrics as metrics
+import app.querytrace as querytrace
+import app.vector as vector
+
 
 @dataclass
 class DatabaseSettings:
@@ -22,6 +27,41 @@ settings = DatabaseSettings(
 )
 
 
+class TimedCursor(psycopg.Cursor):
+    """
+    Cursor recording the latency of every statement in app.metrics, and the
+    statement itself on any active app.querytrace trace.
+    """
+
+    def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, params, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.record_query(elapsed)
+            if querytrace.tracing():
+                querytrace.record(self._sql_text(query), elapsed)
+
+    def executemany(self, query, params_seq, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, params_seq, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.record_query(elapsed)
+            if querytrace.tracing():
+                querytrace.record(self._sql_text(query), elapsed)
+
+    def _sql_text(self, query) -> str:
+        if isinstance(query, bytes):
+            return query.decode()
+        if isinstance(query, str):
+            return query
+        # psycopg.sql.Composable
+        return query.as_string(self)
+
+
 def get_connection():
     """Get a connection to the database."""
     conn = psycopg.connect(
@@ -30,7 +70,9 @@ def get_connection():
         dbname=settings.dbname,
         user=settings.user,
         password=settings.password,
+        cursor_factory=TimedCursor,
     )
+    vector.register_vector(conn)
     return conn
 
 
@@ -41,5 +83,7 @@ def get_connection_gen():
         dbname=settings.dbname,
         user=settings.user,
         password=settings.password,
+        cursor_factory=TimedCursor,
     ) as conn:
+        vector.register_vector(conn)
         yield conn
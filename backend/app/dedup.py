@@ -0,0 +1,49 @@
+import os
+import re
+
+# What to do when a new quote is a near-duplicate of an existing one:
+# "reject": refuse the insert (HTTP 409 from the API).
+# "merge": if the existing quote is the submitter's own, don't insert; add the
+#          new tags to it and return it. Otherwise behave as "flag".
+# "flag": insert anyway and record the pair in quote_duplicate for review.
+DUPLICATE_POLICY = os.environ.get("DUPLICATE_POLICY", "flag").lower()
+DUPLICATE_POLICIES = ("reject", "merge", "flag")
+
+# Cosine similarity above which two quote embeddings count as the same quote.
+DUPLICATE_SIMILARITY_THRESHOLD = float(
+    os.environ.get("DUPLICATE_SIMILARITY_THRESHOLD", "0.97")
+)
+
+# Normalized-text hash, computed by the database for the generated
+# quote.text_hash column and for lookups: lower case, runs of anything that
+# is not a letter or digit collapsed to one space, trimmed.
+TEXT_HASH_SQL = (
+    "md5(btrim(regexp_replace(lower({}), '[^[:alnum:]]+', ' ', 'g')))"
+)
+
+_NON_ALNUM = re.compile(r"[\W_]+")
+
+
+class DuplicateQuoteError(ValueError):
+    def __init__(self, duplicate_of: int, similarity: float):
+        super().__init__(
+            f"Quote is a near-duplicate of quote {duplicate_of} "
+            f"(similarity {similarity:.3f})."
+        )
+        self.duplicate_of = duplicate_of
+        self.similarity = similarity
+
+
+def normalize_text(text: str) -> str:
+    """Python counterpart of the normalization in TEXT_HASH_SQL."""
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def check_policy(policy: str) -> str:
+    policy = policy.lower()
+    if policy not in DUPLICATE_POLICIES:
+        raise ValueError(
+            f"Unknown duplicate policy '{policy}', "
+            f"expected one of {', '.join(DUPLICATE_POLICIES)}."
+        )
+    return policy
@@ -1,45 +1,270 @@
+import hashlib
+import io
 import logging
 import os
-from typing import List
+import re
+import threading
+from typing import TYPE_CHECKING, List
 
 import numpy as np
-import pandas as pd
-from fastembed import TextEmbedding
 
+import app.metrics as metrics
+import app.vector as vector
 from app.model import CSVMockQuote
 
+try:
+    import fcntl
+except ImportError:  # Windows: cache writes are not coordinated.
+    fcntl = None
+
+# fastembed (onnxruntime) and pandas are imported where they are used so that
+# importing this module stays cheap for a cold worker.
+if TYPE_CHECKING:
+    from fastembed import TextEmbedding
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-embedding_model: TextEmbedding | None = None
+embedding_model: "TextEmbedding | None" = None
 
 CSV_QUOTES_DATA: List[CSVMockQuote] = []
+# Row-normalized float32; a read-only np.memmap when served from the cache.
 CSV_QUOTE_EMBEDDINGS: np.ndarray | None = None
 
 CSV_FILE_PATH = os.path.join("data", "quotes_sample.csv")
 
+# Models whose vectors may be stored in quote.embedding, with their
+# dimensions. FastEmbed model names carry the model version, and the name is
+# recorded next to every stored vector (quote.embedding_model) so that
+# vectors of different models are never compared.
+EMBEDDING_MODELS = {
+    "BAAI/bge-small-en-v1.5": 384,
+    "sentence-transformers/all-MiniLM-L6-v2": 384,
+}
+
+# The model used to embed new quotes and search queries; pinned so cached
+# embeddings can be keyed by it without loading the model first. Switch it
+# with `cli.py reembed`, which records the new model in the app_setting row
+# EMBEDDING_MODEL_SETTING; running workers follow it through request_model()
+# and use_model(), and this default only applies while no such row exists.
+EMBEDDING_MODEL_NAME = os.environ.get(
+    "EMBEDDING_MODEL_NAME", "BAAI/bge-small-en-v1.5"
+)
+EMBEDDING_MODEL_SETTING = "embedding_model"
+# Guards the pair (EMBEDDING_MODEL_NAME, embedding_model), which is only ever
+# replaced as a whole; see active_model().
+_model_lock = threading.Lock()
+# Serializes model loads and corpus reloads, which are slow and happen
+# outside _model_lock. Reentrant: a switch reloads the corpus.
+_switch_lock = threading.RLock()
+# Model being loaded by a background switch, if any.
+_pending_model: str | None = None
+EMBEDDING_CACHE_DIR = os.environ.get(
+    "EMBEDDING_CACHE_DIR", os.path.join("data", "embedding_cache")
+)
+
+
+def create_embedding_model(model_name: str) -> "TextEmbedding":
+    """Instantiates a registered FastEmbed model. No silent fallback."""
+    if model_name not in EMBEDDING_MODELS:
+        raise ValueError(
+            f"Embedding model '{model_name}' is not registered; "
+            f"known models: {', '.join(EMBEDDING_MODELS)}."
+        )
+    from fastembed import TextEmbedding
+
+    return TextEmbedding(model_name=model_name)
+
+
+def active_model() -> tuple[str, "TextEmbedding | None"]:
+    """
+    The model for new quotes and search queries and its name, read together
+    so that a vector is never recorded under the name of another model.
+    """
+    with _model_lock:
+        return EMBEDDING_MODEL_NAME, embedding_model
+
 
 def load_embedding_model():
     """Loads the FastEmbed TextEmbedding model."""
     global embedding_model
-    if embedding_model is None:
+    with _switch_lock:
+        model_name, model = active_model()
+        if model is not None:
+            return
         logger.info("Loading FastEmbed model...")
         try:
-            embedding_model = TextEmbedding()
-            logger.info(
-                f"FastEmbed model loaded. Default: {embedding_model.model_name}"
-            )
+            model = create_embedding_model(model_name)
         except Exception as e:
             logger.error(f"Error loading FastEmbed model: {e}")
             raise RuntimeError(f"Failed to initialize FastEmbed model: {e}")
+        with _model_lock:
+            embedding_model = model
+        logger.info(f"FastEmbed model loaded. Default: {model.model_name}")
 
 
-def load_quotes_and_generate_embeddings():
-    """Loads quotes from CSV and generates their embeddings."""
-    global CSV_QUOTES_DATA, CSV_QUOTE_EMBEDDINGS, embedding_model
+def use_model(model_name: str) -> None:
+    """
+    Makes `model_name` the model for new quotes and search queries. If a
+    model was already loaded, the new one is loaded first and the current
+    one keeps serving until they are swapped.
+    """
+    global embedding_model, EMBEDDING_MODEL_NAME
+    with _switch_lock:
+        current_name, current_model = active_model()
+        if model_name == current_name:
+            return
+        logger.info(f"Switching embedding model to {model_name}...")
+        model = None
+        if current_model is not None:
+            try:
+                model = create_embedding_model(model_name)
+            except Exception as e:
+                logger.error(f"Error loading FastEmbed model: {e}")
+                raise RuntimeError(
+                    f"Failed to switch to embedding model {model_name}: {e}"
+                )
+        with _model_lock:
+            EMBEDDING_MODEL_NAME, embedding_model = model_name, model
+        if CSV_QUOTE_EMBEDDINGS is not None:
+            # The mock corpus must be searched with vectors of the same
+            # model.
+            load_quotes_and_generate_embeddings()
+
+
+def _switch_in_background(model_name: str) -> None:
+    global _pending_model
+    try:
+        use_model(model_name)
+    except RuntimeError as e:
+        logger.error(f"Embedding model switch failed: {e}")
+    finally:
+        with _model_lock:
+            if _pending_model == model_name:
+                _pending_model = None
+
+
+def request_model(model_name: str) -> None:
+    """
+    Starts switching to `model_name` in a background thread, unless it is
+    already active or being loaded, so that callers such as request
+    handlers never wait for a model load.
+    """
+    global _pending_model
+    with _model_lock:
+        if model_name in (EMBEDDING_MODEL_NAME, _pending_model):
+            return
+        _pending_model = model_name
+    threading.Thread(
+        target=_switch_in_background,
+        args=(model_name,),
+        name="embedding-switch",
+        daemon=True,
+    ).start()
+
+
+def _embedding_cache_path(csv_bytes: bytes, model_name: str) -> str:
+    digest = hashlib.sha256(model_name.encode("utf-8") + b"\0" + csv_bytes)
+    model_slug = re.sub(r"[^A-Za-z0-9]+", "-", model_name).strip("-")
+    return os.path.join(
+        EMBEDDING_CACHE_DIR,
+        f"csv-{model_slug}-{digest.hexdigest()[:16]}.npy",
+    )
 
+
+def _load_cached_embeddings(path: str, n_rows: int) -> np.ndarray | None:
+    """
+    Memory-maps a cached embedding matrix. The mapping is read-only, so every
+    worker process shares the same page-cache pages.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        matrix = np.load(path, mmap_mode="r")
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable embedding cache {path}: {e}")
+        return None
+    if (
+        matrix.ndim != 2
+        or matrix.shape[0] != n_rows
+        or matrix.dtype != np.float32
+    ):
+        logger.warning(
+            f"Ignoring embedding cache {path} with unexpected shape "
+            f"{matrix.shape} / dtype {matrix.dtype}."
+        )
+        return None
+    return matrix
+
+
+def _save_cached_embeddings(path: str, matrix: np.ndarray) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, matrix)
+    # Atomic on POSIX: readers see either no file or the complete file.
+    os.replace(tmp_path, path)
+
+
+def _embed_csv_quotes(texts: List[str]) -> np.ndarray | None:
     if embedding_model is None:
         load_embedding_model()
+    if embedding_model is None:
+        return None
+    logger.info(f"Generating embeddings for {len(texts)} quotes...")
+    embedding_list = list(embedding_model.embed(texts))
+    if not embedding_list:
+        return None
+    # Stored normalized so the cached file can be used as the search index
+    # as-is, without a per-worker copy.
+    return normalize_rows(np.stack(embedding_list))
+
+
+def _load_or_generate_csv_embeddings(
+    csv_bytes: bytes, texts: List[str]
+) -> np.ndarray | None:
+    cache_path = _embedding_cache_path(csv_bytes, EMBEDDING_MODEL_NAME)
+    cached = _load_cached_embeddings(cache_path, len(texts))
+    if cached is not None:
+        logger.info(f"Loaded cached embeddings from {cache_path}.")
+        return cached
+
+    os.makedirs(EMBEDDING_CACHE_DIR, exist_ok=True)
+    with open(f"{cache_path}.lock", "w") as lock_file:
+        if fcntl is not None:
+            # Only one worker embeds the corpus; the others block here and
+            # then pick up the file it wrote.
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        cached = _load_cached_embeddings(cache_path, len(texts))
+        if cached is not None:
+            logger.info(f"Loaded cached embeddings from {cache_path}.")
+            return cached
+
+        matrix = _embed_csv_quotes(texts)
+        if matrix is None:
+            return None
+        try:
+            _save_cached_embeddings(cache_path, matrix)
+            logger.info(f"Saved embedding cache to {cache_path}.")
+        except OSError as e:
+            logger.warning(f"Could not write embedding cache: {e}")
+            return matrix
+    return _load_cached_embeddings(cache_path, len(texts))
+
+
+def load_quotes_and_generate_embeddings():
+    """
+    Loads quotes from CSV and their embeddings. Embeddings are read from a
+    memory-mapped on-disk cache keyed by the CSV content and model name, and
+    only generated when no matching cache file exists.
+    """
+    # No switch may replace the model halfway through.
+    with _switch_lock:
+        _load_quotes_and_generate_embeddings()
+
+
+def _load_quotes_and_generate_embeddings():
+    global CSV_QUOTES_DATA, CSV_QUOTE_EMBEDDINGS
+    import pandas as pd
 
     if not os.path.exists(CSV_FILE_PATH):
         logger.warning(
@@ -51,7 +276,9 @@ def load_quotes_and_generate_embeddings():
 
     try:
         logger.info(f"Loading quotes from {CSV_FILE_PATH}...")
-        df = pd.read_csv(CSV_FILE_PATH)
+        with open(CSV_FILE_PATH, "rb") as f:
+            csv_bytes = f.read()
+        df = pd.read_csv(io.BytesIO(csv_bytes))
         df = df.fillna("")
 
         quote_texts_for_embedding = []
@@ -81,26 +308,19 @@ def load_quotes_and_generate_embeddings():
 
         CSV_QUOTES_DATA = valid_quotes_temp
 
-        if CSV_QUOTES_DATA and embedding_model:
-            logger.info(
-                f"Generating embeddings for {len(CSV_QUOTES_DATA)} quotes..."
-            )
-            embeddings_generator = embedding_model.embed(
-                quote_texts_for_embedding
+        if CSV_QUOTES_DATA:
+            CSV_QUOTE_EMBEDDINGS = _load_or_generate_csv_embeddings(
+                csv_bytes, quote_texts_for_embedding
             )
-            embedding_list = [emb for emb in embeddings_generator]
-            if embedding_list:
-                CSV_QUOTE_EMBEDDINGS = np.array(embedding_list)
+            if CSV_QUOTE_EMBEDDINGS is not None:
                 logger.info(
-                    f"Embeddings generated and stored. Shape: {CSV_QUOTE_EMBEDDINGS.shape}"
+                    f"Embeddings ready. Shape: {CSV_QUOTE_EMBEDDINGS.shape}"
                 )
+                _get_csv_index()
             else:
                 logger.warning("No embeddings were generated.")
-                CSV_QUOTE_EMBEDDINGS = None
         else:
-            logger.info(
-                "No quotes loaded or embedding model not available, skipping embedding generation."
-            )
+            logger.info("No quotes loaded, skipping embedding generation.")
             CSV_QUOTE_EMBEDDINGS = None
 
     except FileNotFoundError:
@@ -117,52 +337,79 @@ def load_quotes_and_generate_embeddings():
         CSV_QUOTE_EMBEDDINGS = None
 
 
-def generate_embedding(text: str) -> List[float] | None:
+def generate_embedding(text: str) -> np.ndarray | None:
     """
     Generates an embedding for a single text string using FastEmbed.
+    The embedding is returned as a float32 array, ready to be sent to
+    Postgres through the binary `vector` adapter.
     Returns None if embedding generation fails or model is unavailable.
     """
-    if embedding_model is None:
+    return generate_embedding_with_model(text)[0]
+
+
+def generate_embedding_with_model(
+    text: str,
+) -> tuple[np.ndarray | None, str]:
+    """
+    Like generate_embedding, but also returns the name of the model that
+    produced the embedding, which is what must be stored next to it.
+    """
+    model_name, model = active_model()
+    if model is None:
         try:
             load_embedding_model()
         except RuntimeError:
             logger.error(
                 "Embedding model could not be loaded for generate_embedding."
             )
-            return None
+            return None, model_name
+        model_name, model = active_model()
 
     if not text or not isinstance(text, str):
         logger.warning(
             "Empty or invalid text provided for embedding. Returning None."
         )
-        return None
+        return None, model_name
 
     try:
-        if embedding_model is None:
+        if model is None:
             logger.error(
                 "Embedding model is not available after load attempt in generate_embedding."
             )
-            return None
+            return None, model_name
 
-        embedding_generator = embedding_model.embed([text])
-        embedding_array = next(embedding_generator, None)
+        with metrics.time_inference(model_name):
+            embedding_array = next(model.embed([text]), None)
 
         if embedding_array is not None:
-            return embedding_array.tolist()
+            return vector.to_vector(embedding_array), model_name
         else:
             logger.warning("FastEmbed returned no embedding for the text.")
-            return None
+            return None, model_name
     except Exception as e:
         logger.error(f"Error during FastEmbed embedding generation: {e}")
-        return None
+        return None, model_name
 
 
-def generate_embeddings_batch(texts: List[str]) -> List[List[float]]:
+def generate_embeddings_batch(
+    texts: List[str], model: "TextEmbedding | None" = None
+) -> List[np.ndarray]:
     """
-    Generates embeddings for a batch of text strings using FastEmbed.
+    Generates float32 embeddings for a batch of text strings using FastEmbed,
+    with `model` if given, else the configured model.
     Returns empty list if generation fails.
     """
-    if embedding_model is None:
+    if model is not None:
+        try:
+            return [vector.to_vector(emb) for emb in model.embed(texts)]
+        except Exception as e:
+            logger.error(
+                f"Error during FastEmbed batch embedding generation: {e}"
+            )
+            return []
+
+    model_name, model = active_model()
+    if model is None:
         try:
             load_embedding_model()
         except RuntimeError:
@@ -170,6 +417,7 @@ def generate_embeddings_batch(texts: List[str]) -> List[List[float]]:
                 "Embedding model could not be loaded for generate_embeddings_batch."
             )
             return []
+        model_name, model = active_model()
 
     if not texts or not all(isinstance(t, str) and t for t in texts):
         logger.warning(
@@ -177,57 +425,126 @@ def generate_embeddings_batch(texts: List[str]) -> List[List[float]]:
         )
         return []
 
-    if embedding_model is None:
+    if model is None:
         logger.error(
             "Embedding model is not available after load attempt in generate_embeddings_batch."
         )
         return []
 
     try:
-        embeddings_generator = embedding_model.embed(texts)
-        return [
-            emb.tolist() for emb in embeddings_generator if emb is not None
-        ]
+        with metrics.time_inference(model_name):
+            return [
+                vector.to_vector(emb)
+                for emb in model.embed(texts)
+                if emb is not None
+            ]
     except Exception as e:
         logger.error(f"Error during FastEmbed batch embedding generation: {e}")
         return []
 
 
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Returns a C-contiguous float32 copy of `matrix` with unit-length rows."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+def top_k_cosine(
+    index: np.ndarray, queries: np.ndarray, top_n: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized cosine top-k against a row-normalized index.
+    `queries` is a (n_queries, dim) matrix; returns (indices, scores), each of
+    shape (n_queries, k), sorted by descending similarity.
+    """
+    queries = normalize_rows(np.atleast_2d(queries))
+    scores = queries @ index.T
+    k = min(top_n, index.shape[0])
+    if k <= 0:
+        empty = np.empty((queries.shape[0], 0))
+        return empty.astype(np.intp), empty.astype(np.float32)
+    if k < index.shape[0]:
+        # argpartition is O(n); only the k survivors are fully sorted.
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(
+            np.arange(index.shape[0]), (queries.shape[0], index.shape[0])
+        )
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1)
+    return (
+        np.take_along_axis(candidates, order, axis=1),
+        np.take_along_axis(candidate_scores, order, axis=1),
+    )
+
+
+# Normalized copy of CSV_QUOTE_EMBEDDINGS, rebuilt whenever the source matrix
+# is replaced.
+_csv_index: np.ndarray | None = None
+_csv_index_source: np.ndarray | None = None
+
+
+def _get_csv_index() -> np.ndarray | None:
+    global _csv_index, _csv_index_source
+    if CSV_QUOTE_EMBEDDINGS is None:
+        return None
+    if _csv_index_source is not CSV_QUOTE_EMBEDDINGS:
+        if isinstance(CSV_QUOTE_EMBEDDINGS, np.memmap):
+            # The on-disk cache is already normalized float32; search the
+            # shared mapping directly instead of copying it per worker.
+            _csv_index = CSV_QUOTE_EMBEDDINGS
+        else:
+            _csv_index = normalize_rows(CSV_QUOTE_EMBEDDINGS)
+        _csv_index_source = CSV_QUOTE_EMBEDDINGS
+    return _csv_index
+
+
+def search_similar_quotes_batch(
+    query_texts: List[str], top_n: int = 10
+) -> List[List[CSVMockQuote]]:
+    """
+    Searches the in-memory CSV quote index for several queries at once.
+    Returns one result list per query, most similar first.
+    """
+    index = _get_csv_index()
+    if index is None or not CSV_QUOTES_DATA or not query_texts:
+        logger.info("No mock quote data available to search against.")
+        return [[] for _ in query_texts]
+
+    query_embeddings = generate_embeddings_batch(query_texts)
+    if len(query_embeddings) != len(query_texts):
+        logger.warning(
+            "Could not generate embeddings for all queries. Cannot perform search."
+        )
+        return [[] for _ in query_texts]
+
+    indices, _ = top_k_cosine(index, np.stack(query_embeddings), top_n)
+    return [[CSV_QUOTES_DATA[i] for i in row] for row in indices]
+
+
 def search_similar_quotes(
     query_text: str, top_n: int = 10
 ) -> List[CSVMockQuote]:
     """
     Searches for quotes similar to the query_text using embeddings.
-    This version is conceptual and demonstrates how one might structure a query
-    for pgvector. It does not execute the query.
+    Runs a vectorized cosine top-k over the in-memory CSV quote embeddings.
     """
-    if not CSV_QUOTES_DATA:
-        logger.info(
-            "No mock quote data available to conceptually search against. "
-            "In a real scenario, this check might be different or removed if DB is primary source."
-        )
+    index = _get_csv_index()
+    if index is None or not CSV_QUOTES_DATA:
+        logger.info("No mock quote data available to search against.")
         return []
 
-    query_embedding_list = generate_embedding(query_text)
-    if query_embedding_list is None:
+    query_embedding = generate_embedding(query_text)
+    if query_embedding is None:
         logger.warning(
             "Could not generate embedding for query. Cannot perform search."
         )
         return []
 
-    query_embedding_str = str(query_embedding_list)
-
-    pgvector_query = f"SELECT id, quote, author, tags, 1 - (embedding <=> '{query_embedding_str}') AS cosine_similarity FROM items ORDER BY cosine_similarity DESC LIMIT {top_n};"
-
-    logger.info(
-        f"Conceptual pgvector query for similarity search: {pgvector_query}"
-    )
-    logger.info(
-        "This function is conceptual and does not execute the database query. "
-        "Actual database interaction code is required to fetch results."
-    )
-
-    return []
+    indices, _ = top_k_cosine(index, query_embedding, top_n)
+    return [CSV_QUOTES_DATA[i] for i in indices[0]]
 
 
 # Ensure model and data are loaded at module import time if not already handled by main.py startup
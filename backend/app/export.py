@@ -0,0 +1,139 @@
+"""
+Streaming exports of public quotes and of a user's collections, as NDJSON or
+CSV, for the /export endpoints and `cli.py export`.
+
+Rows are read through a server-side cursor and encoded EXPORT_BATCH_SIZE at a
+time, so memory stays constant however large the export is. Served through a
+StreamingResponse, each chunk is only produced once the previous one has been
+handed to the client, so a slow reader also slows down the cursor.
+"""
+
+import csv
+import io
+import os
+from typing import Iterator
+
+import orjson
+from psycopg import Connection
+
+import app.db as db
+
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+
+FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Embeddings are selected as pgvector's text form, "[0.1,0.2,...]", which is
+# also a JSON array: NDJSON embeds it as is and CSV writes it as one field.
+_QUOTES_SQL = """
+    SELECT q.id, q.text, q.author_id, a.name AS author_name,
+           COALESCE(
+               (SELECT array_agg(t.name ORDER BY t.name)
+                FROM taggedas ta JOIN tag t ON t.id = ta.tag_id
+                WHERE ta.quote_id = q.id),
+               ARRAY[]::text[]
+           ) AS tags,
+           q.created_at{embedding}
+    FROM quote q
+    JOIN author a ON a.id = q.author_id
+    WHERE q.is_public = TRUE
+    ORDER BY q.id
+"""
+
+_COLLECTIONS_SQL = """
+    SELECT c.id, c.name, c.description, c.is_public, c.quote_count,
+           c.created_at,
+           COALESCE(
+               (SELECT array_agg(cc.quote_id ORDER BY cc.added_at, cc.quote_id)
+                FROM collectioncontains cc
+                WHERE cc.collection_id = c.id),
+               ARRAY[]::integer[]
+           ) AS quote_ids
+    FROM collection c
+    WHERE c.author_id = %(author_id)s
+    ORDER BY c.id
+"""
+
+
+def check_format(fmt: str) -> str:
+    fmt = fmt.lower()
+    if fmt not in FORMATS:
+        raise ValueError(
+            f"Unknown export format '{fmt}', "
+            f"expected one of {', '.join(FORMATS)}."
+        )
+    return fmt
+
+
+def _ndjson_batch(columns: list[str], rows: list[tuple]) -> bytes:
+    lines = []
+    for row in rows:
+        record = dict(zip(columns, row))
+        if record.get("embedding") is not None:
+            record["embedding"] = orjson.Fragment(record["embedding"])
+        lines.append(orjson.dumps(record))
+    return b"\n".join(lines) + b"\n"
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return "|".join(str(v) for v in value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def _csv_batch(rows: list[tuple]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+    return buffer.getvalue().encode()
+
+
+def _export(
+    conn: Connection, name: str, query: str, params: dict, fmt: str
+) -> Iterator[bytes]:
+    fmt = check_format(fmt)
+    # A named cursor is a server-side one: rows are fetched from Postgres a
+    # batch at a time instead of all at execute().
+    with conn.cursor(name=f"export_{name}") as cur:
+        cur.itersize = EXPORT_BATCH_SIZE
+        cur.execute(query, params)
+        columns = [column.name for column in cur.description]
+        if fmt == "csv":
+            yield _csv_batch([columns])
+        while rows := cur.fetchmany(EXPORT_BATCH_SIZE):
+            if fmt == "csv":
+                yield _csv_batch(rows)
+            else:
+                yield _ndjson_batch(columns, rows)
+
+
+def export_public_quotes(
+    conn: Connection, fmt: str = "ndjson", include_embedding: bool = False
+) -> Iterator[bytes]:
+    """Every public quote with its author and tags, in id order."""
+    embedding = ", q.embedding::text AS embedding" if include_embedding else ""
+    return _export(
+        conn, "quotes", _QUOTES_SQL.format(embedding=embedding), {}, fmt
+    )
+
+
+def export_author_collections(
+    conn: Connection, author_id: int, fmt: str = "ndjson"
+) -> Iterator[bytes]:
+    """The collections of `author_id`, with their quote ids in added order."""
+    return _export(
+        conn, "collections", _COLLECTIONS_SQL, {"author_id": author_id}, fmt
+    )
+
+
+def stream(export, *args, **kwargs) -> Iterator[bytes]:
+    """
+    Runs `export` on a connection of its own, for a StreamingResponse: the
+    response body is sent after the endpoint has returned, when the request's
+    connection dependency may already have been closed.
+    """
+    with db.get_connection() as conn:
+        yield from export(conn, *args, **kwargs)
@@ -0,0 +1,37 @@
+"""
+Structured logging for the API: one line per record, with any `extra`
+fields appended as key=value pairs so that they can be grepped or parsed.
+"""
+
+import logging
+import os
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+
+# Attributes every LogRecord has; anything else was passed through `extra`.
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class StructuredFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = [
+            f"{key}={value!r}"
+            if isinstance(value, str) and " " in value
+            else f"{key}={value}"
+            for key, value in vars(record).items()
+            if key not in _RESERVED
+        ]
+        if fields:
+            line = f"{line} {' '.join(fields)}"
+        return line
+
+
+def configure_logging(level: str = LOG_LEVEL) -> None:
+    """Route all loggers through a single structured handler on stderr."""
+    handler = logging.StreamHandler()
+    handler.setFormatter(StructuredFormatter())
+    logging.basicConfig(level=level, handlers=[handler], force=True)
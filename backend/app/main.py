@@ -1,26 +1,47 @@
+import logging
 import math
 from contextlib import asynccontextmanager
 from datetime import timedelta
-from typing import Annotated, List, Optional
+from typing import Annotated, List, Literal, Optional
 
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
+from fastapi import (
+    Depends,
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jwt.exceptions import InvalidTokenError
 from psycopg import Connection
 from pydantic import BaseModel, Field
 from starlette.middleware.cors import CORSMiddleware
 
+import app.cache as cache
 import app.crud as crud
 import app.db as db
+import app.dedup as dedup
 import app.embedding as embedding
+import app.export as export
+import app.logs as logs
+import app.metrics as metrics
 import app.model as model
+import app.querytrace as querytrace
+import app.responses as responses
 import app.security as security
 import app.tagging as tagging
+import app.warmup as warmup
 
 # Load environment variables from .env file
 # This should be one of the first things your application does.
 load_dotenv()
+logs.configure_logging()
+
+logger = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -57,47 +78,25 @@ async def get_optional_current_user(
     token_from_dep: Optional[TokenDep] = None,
 ) -> Optional[model.User]:
     actual_token: Optional[str] = token_from_dep
-    print(
-        f"[get_optional_current_user] Token from dependency: {'present' if actual_token else actual_token}"
-    )
 
     if not actual_token:
         auth_header = request.headers.get("authorization")
-        print(
-            f"[get_optional_current_user] Manually read 'authorization' header: {auth_header}"
-        )
         if auth_header:
             parts = auth_header.split()
             if len(parts) == 2 and parts[0].lower() == "bearer":
                 actual_token = parts[1]
-                print(
-                    f"[get_optional_current_user] Manually extracted token: {'present' if actual_token else 'error in extraction'}"
-                )
             else:
-                print(
-                    f"[get_optional_current_user] 'authorization' header malformed: {auth_header}"
-                )
+                logger.debug("Malformed authorization header ignored.")
 
     if actual_token is None:
-        print(
-            "[get_optional_current_user] No token found (either from dep or manual), returning None."
-        )
         return None
     try:
-        print(
-            "[get_optional_current_user] Attempting to call get_current_user with actual_token."
-        )
-        user = await get_current_user(conn, actual_token)
-        print(
-            f"[get_optional_current_user] get_current_user returned: {'user object' if user else 'None'}"
-        )
-        return user
+        return await get_current_user(conn, actual_token)
     except HTTPException as e:
-        print(
-            f"[get_optional_current_user] HTTPException caught: status={e.status_code}, detail={e.detail}"
-        )
         if e.status_code == status.HTTP_401_UNAUTHORIZED:
-            print("[get_optional_current_user] Caught 401, returning None.")
+            logger.debug(
+                "Invalid token on optional auth, continuing anonymously."
+            )
             return None
         raise
 
@@ -129,33 +128,35 @@ CurrentUserResponseDep = Annotated[
 # Define the lifespan context manager
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Application startup via lifespan...")
-    try:
-        embedding.load_embedding_model()
-        print(
-            "Embedding model loaded successfully or already available via lifespan."
-        )
-    except RuntimeError as e:
-        print(
-            f"Critical error: Could not load embedding model on startup via lifespan: {e}"
-        )
+    logger.info("Application startup via lifespan...")
+    cache.start_listener()
+    if warmup.MODEL_LOADING == "background":
+        warmup.start_background_warmup()
+        logger.info(
+            "Startup finished. Models are warming up in the background."
+        )
+    else:
+        warmup.load_embedding_models()
+        logger.info("Startup finished. Ready to use.")
+    yield
+    logger.info("Application shutdown via lifespan...")
+    cache.stop_listener()
 
-    try:
-        embedding.load_quotes_and_generate_embeddings()
-        print(
-            f"Mock quotes processing complete via lifespan. {len(embedding.CSV_QUOTES_DATA)} quotes loaded."
-        )
-    except Exception as e:
-        print(
-            f"Warning: Error loading mock quotes or generating embeddings on startup via lifespan: {e}"
-        )
 
-    print("Startup via lifespan finished.")
-    print(
-        "\n=============================\nFINISHED SETUP. READY TO USE\n=============================\n"
-    )
-    yield
-    print("Application shutdown via lifespan...")
+def _require_model(model_name: str):
+    def dependency():
+        if warmup.is_warming(model_name):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"The {model_name} model is warming up. Please retry shortly.",
+                headers={"Retry-After": "5"},
+            )
+
+    return dependency
+
+
+EmbeddingModelReady = Depends(_require_model(warmup.EMBEDDING))
+TaggingModelReady = Depends(_require_model(warmup.TAGGING))
 
 
 app = FastAPI(title="QuoteWeave API", version="0.1.0", lifespan=lifespan)
@@ -166,6 +167,38 @@ class TaggingRequest(BaseModel):
     author: str
 
 
+# Anonymous reads served from the response cache. Each route lists the
+# entities its response is built from; writes to those entities (through
+# crud) change its ETag and drop its cached copies.
+_PAGE_ENTITIES = (cache.QUOTE, cache.AUTHOR, cache.TAG, cache.FAVORITE)
+app.add_middleware(
+    cache.ResponseCacheMiddleware,
+    policies=[
+        cache.CachePolicy(
+            "/quotes/page/{page_number}", _PAGE_ENTITIES, max_age=10
+        ),
+        cache.CachePolicy("/quotes/get-n-pages", (cache.QUOTE,), max_age=10),
+        cache.CachePolicy("/quotes/batch", _PAGE_ENTITIES, max_age=10),
+        cache.CachePolicy("/tags/all", (cache.TAG, cache.QUOTE), max_age=60),
+        cache.CachePolicy("/authors", (cache.AUTHOR, cache.QUOTE), max_age=60),
+        cache.CachePolicy(
+            "/authors/{author_id}",
+            (cache.AUTHOR, cache.QUOTE, cache.TAG, cache.COLLECTION),
+            max_age=30,
+        ),
+        cache.CachePolicy(
+            "/collections/{collection_id}",
+            (cache.COLLECTION, cache.AUTHOR),
+            max_age=30,
+        ),
+        cache.CachePolicy(
+            "/collections/{collection_id}/quotes",
+            (cache.COLLECTION, *_PAGE_ENTITIES),
+            max_age=10,
+        ),
+    ],
+    cache=cache.TTLCache(cache.CACHE_TTL_SECONDS, cache.CACHE_MAX_ENTRIES),
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -175,7 +208,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "ETag"],
 )
+if querytrace.QUERY_TRACING:
+    app.add_middleware(querytrace.QueryTraceMiddleware)
+# Added last so it is outermost and also times CORS handling.
+app.add_middleware(metrics.MetricsMiddleware)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.post("/token")
@@ -317,7 +360,11 @@ async def update_current_user_preferences(
         )
 
 
-@app.get("/quotes/page/{page_number}", response_model=model.QuotePageResponse)
+@app.get(
+    "/quotes/page/{page_number}",
+    response_model=model.QuotePageResponse,
+    response_class=responses.FastJSONResponse,
+)
 async def get_quotes_page(
     conn: ConnectionDep,
     page_number: int,
@@ -337,7 +384,11 @@ async def get_quotes_page(
     total_pages = crud.get_quotes_total_pages(
         conn, page_size, author_id=author_id
     )
-    return model.QuotePageResponse(quotes=quotes, totalPages=total_pages)
+    return responses.FastJSONResponse(
+        model.QuotePageResponse.model_construct(
+            quotes=quotes, totalPages=total_pages
+        )
+    )
 
 
 @app.get("/quotes/get-n-pages", response_model=model.QuotesTotalPagesResponse)
@@ -354,14 +405,14 @@ async def get_quotes_total_pages(
     return model.QuotesTotalPagesResponse(n_pages=total_pages)
 
 
-@app.get("/quotes/me", response_model=model.QuoteCollection)
+@app.get("/quotes/me", response_model=model.QuoteSummaryCollection)
 async def current_quotes(conn: ConnectionDep, current_user: CurrentUserDep):
     if current_user.author_id is None:
         raise HTTPException(
             status_code=403, detail="User not associated with an author."
         )
     quotes = crud.get_quotes_by_author(conn, current_user.author_id)
-    return model.QuoteCollection(quotes=quotes)
+    return model.QuoteSummaryCollection(quotes=quotes)
 
 
 @app.get(
@@ -434,6 +485,27 @@ async def get_quotes_by_tag_name_endpoint(
     )
 
 
+@app.get(
+    "/quotes/batch",
+    response_model=List[model.QuotePageEntry],
+    response_class=responses.FastJSONResponse,
+)
+async def get_quotes_batch_endpoint(
+    conn: ConnectionDep,
+    current_user: OptionalCurrentUserDep,
+    ids: List[int] = Query(
+        ...,
+        min_length=1,
+        max_length=crud.MAX_BATCH_QUOTES,
+        description="Quote ids, repeated (?ids=1&ids=2). Quotes come back in this order; missing and private ones are left out.",
+    ),
+):
+    quotes = crud.get_quotes_by_ids(
+        conn, ids, current_user.id if current_user else None
+    )
+    return responses.FastJSONResponse(quotes)
+
+
 @app.get("/quotes/{quote_id}", response_model=Optional[model.QuotePageEntry])
 async def get_quote_by_id_endpoint(
     quote_id: int, conn: ConnectionDep, current_user: OptionalCurrentUserDep
@@ -447,10 +519,36 @@ async def get_quote_by_id_endpoint(
     return quote
 
 
+@app.get(
+    "/quotes/{quote_id}/similar",
+    response_model=List[model.QuotePageEntry],
+    response_class=responses.FastJSONResponse,
+)
+async def get_similar_quotes_endpoint(
+    quote_id: int,
+    conn: ConnectionDep,
+    current_user: OptionalCurrentUserDep,
+    limit: int = Query(
+        10,
+        gt=0,
+        le=crud.SIMILAR_QUOTES_K,
+        description="Number of similar quotes to return",
+    ),
+):
+    user_id = current_user.id if current_user else None
+    quotes = crud.get_similar_quotes(
+        conn, quote_id=quote_id, limit=limit, current_user_id=user_id
+    )
+    if quotes is None:
+        raise HTTPException(status_code=404, detail="Quote not found")
+    return responses.FastJSONResponse(quotes)
+
+
 @app.post(
     "/quotes/create",
     response_model=model.QuotePageEntry,
     status_code=status.HTTP_201_CREATED,
+    dependencies=[EmbeddingModelReady],
 )
 async def create_quote(
     payload: model.CreateQuoteClientPayload,
@@ -467,13 +565,21 @@ async def create_quote(
             conn, payload=payload, user_id=current_user.id
         )
         return new_quote_page_entry
+    except dedup.DuplicateQuoteError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to create quote.")
 
 
-@app.put("/quotes/{quote_id}", response_model=model.QuotePageEntry)
+@app.put(
+    "/quotes/{quote_id}",
+    response_model=model.QuotePageEntry,
+    dependencies=[EmbeddingModelReady],
+)
 async def update_quote_endpoint(
     quote_id: int,
     payload: model.UpdateQuoteClientPayload,
@@ -561,7 +667,7 @@ async def get_author_info(conn: ConnectionDep, author_id: int):
     )
 
 
-@app.post("/tags/", response_model=List[str])
+@app.post("/tags/", response_model=List[str], dependencies=[TaggingModelReady])
 async def generate_tags_endpoint(request: TaggingRequest):
     if not request.quote or not request.author:
         raise HTTPException(
@@ -582,20 +688,30 @@ async def generate_tags_endpoint(request: TaggingRequest):
         )
 
 
-@app.get("/tags/all", response_model=List[model.TagEntry], tags=["Tags"])
+@app.get(
+    "/tags/all",
+    response_model=List[model.TagEntry],
+    response_class=responses.FastJSONResponse,
+    tags=["Tags"],
+)
 async def get_all_tags_with_counts_endpoint(conn: ConnectionDep):
     try:
         tags_with_counts = crud.get_all_unique_tags_with_counts(conn)
-        return tags_with_counts
-    except Exception as e:
-        print(f"Error fetching all tags with counts: {e}")
+        return responses.FastJSONResponse(tags_with_counts)
+    except Exception:
+        logger.exception("Error fetching all tags with counts")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve tags.",
         )
 
 
-@app.get("/quotes/search/", response_model=List[model.QuotePageEntry])
+@app.get(
+    "/quotes/search/",
+    response_model=List[model.QuotePageEntry],
+    response_class=responses.FastJSONResponse,
+    dependencies=[EmbeddingModelReady],
+)
 async def search_quotes_endpoint(
     conn: ConnectionDep,
     current_user: OptionalCurrentUserDep,
@@ -610,22 +726,51 @@ async def search_quotes_endpoint(
     skip: int = Query(
         0, ge=0, description="Number of results to skip for pagination"
     ),
+    mode: Literal["hybrid", "semantic"] = Query(
+        "hybrid",
+        description="'semantic' ranks by vector similarity only; 'hybrid' fuses it with full-text matches on quote text and author name.",
+    ),
+    tag: Optional[str] = Query(
+        None, description="Only return quotes with this tag."
+    ),
+    author_id: Optional[int] = Query(
+        None, description="Only return quotes by this author."
+    ),
+    collection_id: Optional[int] = Query(
+        None,
+        description="Only return quotes in this collection. Filtered searches rank by vector similarity only.",
+    ),
 ):
     if not query.strip():
         raise HTTPException(
             status_code=400, detail="Search query cannot be empty."
         )
     try:
+        crud.sync_embedding_model(conn)
         query_embedding = embedding.generate_embedding(query)
         user_id = current_user.id if current_user else None
-        quotes = crud.search_quotes_semantic(
-            conn,
-            query_embedding,
-            limit=limit,
-            skip=skip,
-            current_user_id=user_id,
-        )
-        return quotes
+        filtered = any(f is not None for f in (tag, author_id, collection_id))
+        if mode == "hybrid" and not filtered:
+            quotes = crud.search_quotes_hybrid(
+                conn,
+                query,
+                query_embedding,
+                limit=limit,
+                skip=skip,
+                current_user_id=user_id,
+            )
+        else:
+            quotes = crud.search_quotes_semantic(
+                conn,
+                query_embedding,
+                limit=limit,
+                skip=skip,
+                current_user_id=user_id,
+                tag=tag,
+                author_id=author_id,
+                collection_id=collection_id,
+            )
+        return responses.FastJSONResponse(quotes)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error during semantic search: {str(e)}"
@@ -647,6 +792,7 @@ async def get_all_mock_quotes():
     "/api/v1/mock/quotes/search",
     response_model=List[model.CSVMockQuote],
     tags=["Mock Data"],
+    dependencies=[EmbeddingModelReady],
 )
 async def search_mock_quotes_semantic(
     query: str = Query(
@@ -663,6 +809,23 @@ async def search_mock_quotes_semantic(
     return results
 
 
+@app.post(
+    "/api/v1/mock/quotes/search/batch",
+    response_model=List[List[model.CSVMockQuote]],
+    tags=["Mock Data"],
+    dependencies=[EmbeddingModelReady],
+)
+async def search_mock_quotes_semantic_batch(
+    query: model.MockQuoteBatchSearchQuery,
+):
+    if not embedding.CSV_QUOTES_DATA or embedding.CSV_QUOTE_EMBEDDINGS is None:
+        return [[] for _ in query.queries]
+
+    return embedding.search_similar_quotes_batch(
+        query_texts=query.queries, top_n=query.top_n
+    )
+
+
 # --- Favorite Endpoints --- START ---
 @app.post(
     "/quotes/{quote_id}/favorite", status_code=status.HTTP_204_NO_CONTENT
@@ -670,8 +833,7 @@ async def search_mock_quotes_semantic(
 async def favorite_a_quote(
     quote_id: int, conn: ConnectionDep, current_user: CurrentUserDep
 ):
-    quote = crud.get_quote_by_id(conn, quote_id)
-    if not quote:
+    if not crud.quote_visible(conn, quote_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Quote not found"
         )
@@ -691,8 +853,7 @@ async def favorite_a_quote(
 async def unfavorite_a_quote(
     quote_id: int, conn: ConnectionDep, current_user: CurrentUserDep
 ):
-    quote = crud.get_quote_by_id(conn, quote_id)
-    if not quote:
+    if not crud.quote_visible(conn, quote_id, current_user.id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Quote not found"
         )
@@ -706,6 +867,62 @@ async def unfavorite_a_quote(
     return
 
 
+@app.get(
+    "/users/me/favorites",
+    response_model=model.FavoriteQuotesPage,
+    response_class=responses.FastJSONResponse,
+)
+async def get_my_favorites(
+    conn: ConnectionDep,
+    current_user: CurrentUserDep,
+    limit: int = Query(
+        50, gt=0, le=200, description="Number of quotes to return"
+    ),
+    cursor: Optional[int] = Query(
+        None, description="nextCursor of the previous page"
+    ),
+):
+    quotes, next_cursor = crud.get_user_favorites_page(
+        conn, current_user.id, limit=limit, cursor=cursor
+    )
+    return responses.FastJSONResponse(
+        model.FavoriteQuotesPage.model_construct(
+            quotes=quotes, nextCursor=next_cursor
+        )
+    )
+
+
+@app.post(
+    "/users/me/favorites/bulk-add", response_model=model.FavoritesBulkResponse
+)
+async def favorite_quotes(
+    query: model.FavoritesBulkQuery,
+    conn: ConnectionDep,
+    current_user: CurrentUserDep,
+):
+    """
+    Favorites many quotes. Responds with the ids newly favorited; missing
+    quotes, other users' private quotes and quotes already favorited are
+    skipped.
+    """
+    added = crud.add_favorites(conn, current_user.id, query.quote_ids)
+    return model.FavoritesBulkResponse(quote_ids=added)
+
+
+@app.post(
+    "/users/me/favorites/bulk-remove",
+    response_model=model.FavoritesBulkResponse,
+)
+async def unfavorite_quotes(
+    query: model.FavoritesBulkQuery,
+    conn: ConnectionDep,
+    current_user: CurrentUserDep,
+):
+    """Unfavorites many quotes. Responds with the ids that were removed."""
+    removed = crud.remove_favorites(conn, current_user.id, query.quote_ids)
+    return model.FavoritesBulkResponse(quote_ids=removed)
+
+
 # --- Favorite Endpoints --- END ---
 
 
@@ -770,21 +987,10 @@ async def get_my_collections(
     return collections
 
 
-@app.get("/collections/{collection_id}", response_model=model.Collection)
-async def get_single_collection(
-    collection_id: int,
-    conn: ConnectionDep,
-    current_user: OptionalCurrentUserDep,
-    request: Request,
-):
-    print(f"[get_single_collection] Request headers: {request.headers}")
-    user_id = current_user.id if current_user else None
-    print(
-        f"Attempting to fetch collection {collection_id} for user_id: {user_id}"
-    )
-    collection = crud.get_collection_by_id(
-        conn, collection_id, current_user_id=user_id
-    )
+def _get_visible_collection(
+    conn: Connection, collection_id: int, current_user: Optional[model.User]
+) -> model.Collection:
+    collection = crud.get_collection_by_id(conn, collection_id)
     if collection is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -792,20 +998,16 @@ async def get_single_collection(
         )
 
     if not collection.is_public:
-        print(f"Collection {collection_id} is private.")
-        if current_user:
-            print(
-                f"Current user ID: {current_user.id}, Current user author_id: {current_user.author_id}"
-            )
-        else:
-            print("Current user is None.")
-        print(f"Collection author_id: {collection.author_id}")
         if (
             current_user is None
             or current_user.author_id != collection.author_id
         ):
-            print(
-                f"Authorization failed for user {current_user.id if current_user else 'None'} and collection {collection_id}."
+            logger.info(
+                "Private collection access denied",
+                extra={
+                    "collection_id": collection_id,
+                    "user_id": current_user.id if current_user else None,
+                },
             )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -814,6 +1016,63 @@ async def get_single_collection(
     return collection
 
 
+@app.get("/collections/{collection_id}", response_model=model.Collection)
+async def get_single_collection(
+    collection_id: int,
+    conn: ConnectionDep,
+    current_user: OptionalCurrentUserDep,
+    include_quotes: bool = Query(
+        False,
+        description="Also embed the first page of quotes; page through the rest with /collections/{collection_id}/quotes.",
+    ),
+):
+    collection = _get_visible_collection(conn, collection_id, current_user)
+    if include_quotes:
+        collection.quotes, _ = crud.get_collection_quotes_page(
+            conn,
+            collection_id,
+            current_user.id if current_user else None,
+        )
+    return collection
+
+
+@app.get(
+    "/collections/{collection_id}/quotes",
+    response_model=model.CollectionQuotesPage,
+    response_class=responses.FastJSONResponse,
+    tags=["Collections"],
+)
+async def get_collection_quotes(
+    collection_id: int,
+    conn: ConnectionDep,
+    current_user: OptionalCurrentUserDep,
+    limit: int = Query(
+        50, gt=0, le=200, description="Number of quotes to return"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="nextCursor of the previous page"
+    ),
+):
+    _get_visible_collection(conn, collection_id, current_user)
+    try:
+        quotes, next_cursor = crud.get_collection_quotes_page(
+            conn,
+            collection_id,
+            current_user.id if current_user else None,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        )
+    return responses.FastJSONResponse(
+        model.CollectionQuotesPage.model_construct(
+            quotes=quotes, nextCursor=next_cursor
+        )
+    )
+
+
 @app.put("/collections/{collection_id}", response_model=model.Collection)
 async def update_existing_collection(
     collection_id: int,
@@ -890,6 +1149,81 @@ async def delete_existing_collection(
         )
 
 
+# Declared before the /quotes/{quote_id} routes, which would otherwise
+# take "bulk-add" and "bulk-remove" for a quote id.
+@app.post(
+    "/collections/{collection_id}/quotes/bulk-add",
+    response_model=model.CollectionQuotesBulkResponse,
+    tags=["Collections"],
+)
+async def add_quotes_to_collection_api(
+    collection_id: int,
+    query: model.CollectionQuotesBulkQuery,
+    conn: ConnectionDep,
+    current_user: CurrentUserDep,
+):
+    """
+    Adds many quotes to a collection owned by the current user. Responds
+    with the ids that were added; missing quotes, other users' private
+    quotes and quotes already in the collection are skipped.
+    """
+    try:
+        added = crud.user_add_quotes_to_collection(
+            conn, current_user.id, query.quote_ids, collection_id
+        )
+    except ValueError as e:
+        if "not authorized" in str(e).lower():
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail=str(e)
+            )
+        elif "not found" in str(e).lower():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail=str(e)
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        )
+    return model.CollectionQuotesBulkResponse(
+        collection_id=collection_id, quote_ids=added
+    )
+
+
+@app.post(
+    "/collections/{collection_id}/quotes/bulk-remove",
+    response_model=model.CollectionQuotesBulkResponse,
+    tags=["Collections"],
+)
+async def remove_quotes_from_collection_api(
+    collection_id: int,
+    query: model.CollectionQuotesBulkQuery,
+    conn: ConnectionDep,
+    current_user: CurrentUserDep,
+):
+    """
+    Removes many quotes from a collection owned by the current user.
+    Responds with the ids that were removed.
+    """
+    try:
+        removed = crud.user_remove_quotes_from_collection(
+            conn, current_user.id, query.quote_ids, collection_id
+        )
+    except ValueError as e:
+        if "not authorized" in str(e).lower():
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail=str(e)
+            )
+        elif "not found" in str(e).lower():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail=str(e)
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+        )
+    return model.CollectionQuotesBulkResponse(
+        collection_id=collection_id, quote_ids=removed
+    )
+
+
 @app.post(
     "/collections/{collection_id}/quotes/{quote_id}",
     response_model=model.CollectionQuoteLink,
@@ -990,6 +1324,10 @@ async def search_collections_endpoint(
     skip: int = Query(
         0, ge=0, description="Number of results to skip for pagination"
     ),
+    mode: Literal["trigram", "fts"] = Query(
+        "trigram",
+        description="'trigram' matches the query as a literal substring of the name or description, ranked by similarity; 'fts' runs a full-text search on whole words.",
+    ),
 ):
     try:
         user_id_param = current_user.id if current_user else None
@@ -999,6 +1337,7 @@ async def search_collections_endpoint(
             limit=limit,
             skip=skip,
             current_user_id=user_id_param,
+            mode=mode,
         )
         return collections
     except Exception as e:
@@ -1034,8 +1373,8 @@ async def search_tags_endpoint(
             conn, search_term=query, limit=limit, skip=skip
         )
         return tags_with_counts
-    except Exception as e:
-        print(f"Error searching tags: {e}")
+    except Exception:
+        logger.exception("Error searching tags")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to search tags.",
@@ -1043,3 +1382,58 @@ async def search_tags_endpoint(
 
 
 # --- Tag Search Endpoint --- END ---
+
+
+# --- Export Endpoints --- START ---
+def _export_response(
+    name: str, fmt: str, export_fn, *args, **kwargs
+) -> StreamingResponse:
+    return StreamingResponse(
+        export.stream(export_fn, *args, fmt=fmt, **kwargs),
+        media_type=export.MEDIA_TYPES[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="{name}.{fmt}"'
+        },
+    )
+
+
+@app.get("/export/quotes", tags=["Export"])
+async def export_quotes_endpoint(
+    current_user: CurrentUserDep,
+    format: Literal["ndjson", "csv"] = Query(
+        "ndjson", description="One JSON object per line, or CSV."
+    ),
+    include_embeddings: bool = Query(
+        False, description="Also export each quote's embedding vector."
+    ),
+):
+    """Stream every public quote with its author and tags."""
+    return _export_response(
+        "quotes",
+        format,
+        export.export_public_quotes,
+        include_embedding=include_embeddings,
+    )
+
+
+@app.get("/export/collections/me", tags=["Export"])
+async def export_my_collections_endpoint(
+    current_user: CurrentUserDep,
+    format: Literal["ndjson", "csv"] = Query(
+        "ndjson", description="One JSON object per line, or CSV."
+    ),
+):
+    """Stream the current user's collections with their quote ids."""
+    if current_user.author_id is None:
+        raise HTTPException(
+            status_code=403, detail="User not associated with an author."
+        )
+    return _export_response(
+        "collections",
+        format,
+        export.export_author_collections,
+        current_user.author_id,
+    )
+
+
+# --- Export Endpoints --- END ---
@@ -0,0 +1,307 @@
+"""
+In-process request, database and model metrics, exposed in the Prometheus
+text format on /metrics.
+
+Each worker process keeps its own counters; Prometheus is expected to
+scrape every worker (or the single worker in the default deployment).
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Requests slower than this are logged at WARNING with their query counts.
+SLOW_REQUEST_SECONDS = float(os.environ.get("SLOW_REQUEST_SECONDS", "1.0"))
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Route label for requests that matched no route, so that scans of random
+# paths do not create a new time series each.
+UNMATCHED_ROUTE = "<unmatched>"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = (
+            str(value)
+            .replace("\\", "\\\\")
+            .replace("\n", "\\n")
+            .replace('"', '\\"')
+        )
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labels=(), buckets=LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket..., +Inf count], sum.
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted(
+                (key, (list(counts), total[0]))
+                for key, (counts, total) in self._values.items()
+            )
+        names = self.label_names + ("le",)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(names, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+HTTP_REQUESTS = Counter(
+    "quoteweave_http_requests_total",
+    "HTTP requests by route, method and status code.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "quoteweave_http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ("method", "route"),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "quoteweave_http_requests_in_flight",
+    "HTTP requests currently being served.",
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "quoteweave_http_request_db_queries",
+    "Database statements executed per HTTP request.",
+    ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "quoteweave_http_request_db_seconds",
+    "Time spent in database statements per HTTP request.",
+    ("method", "route"),
+)
+DB_QUERY_SECONDS = Histogram(
+    "quoteweave_db_query_duration_seconds",
+    "Latency of individual database statements.",
+)
+MODEL_INFERENCE_SECONDS = Histogram(
+    "quoteweave_model_inference_seconds",
+    "Model inference latency by model.",
+    ("model",),
+)
+
+
+@dataclass
+class RequestStats:
+    """Work done on behalf of the HTTP request being served."""
+
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    inference_seconds: float = 0.0
+
+
+# Set by MetricsMiddleware for the duration of a request. Dependencies and
+# endpoints run in copies of the request context, so they share the same
+# RequestStats object and can add to it.
+current_request: contextvars.ContextVar[RequestStats | None] = (
+    contextvars.ContextVar("current_request", default=None)
+)
+
+
+def record_query(seconds: float) -> None:
+    """Record one database statement, on the current request if any."""
+    DB_QUERY_SECONDS.observe(seconds)
+    stats = current_request.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += seconds
+
+
+@contextmanager
+def time_inference(model_name: str):
+    """Time a block of model inference under `model_name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        MODEL_INFERENCE_SECONDS.observe(elapsed, model=model_name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.inference_seconds += elapsed
+
+
+def render() -> bytes:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return ("\n".join(lines) + "\n").encode()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status code and database/model time
+    for every HTTP request, labelled by route template rather than raw path.
+    The per-request totals are also sent back in a Server-Timing header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timing = (
+                    f'db;desc="{stats.db_queries} queries";'
+                    f"dur={stats.db_seconds * 1000:.1f}, "
+                    f"inference;dur={stats.inference_seconds * 1000:.1f}, "
+                    f"total;dur={(time.perf_counter() - start) * 1000:.1f}"
+                )
+                message = {
+                    **message,
+                    "headers": [
+                        *message.get("headers", []),
+                        (b"server-timing", timing.encode()),
+                    ],
+                }
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            current_request.reset(token)
+            route = scope.get("route")
+            labels = {
+                "method": scope["method"],
+                "route": getattr(route, "path", UNMATCHED_ROUTE),
+            }
+            HTTP_REQUESTS.inc(status=status_code, **labels)
+            HTTP_REQUEST_SECONDS.observe(elapsed, **labels)
+            DB_QUERIES_PER_REQUEST.observe(stats.db_queries, **labels)
+            DB_SECONDS_PER_REQUEST.observe(stats.db_seconds, **labels)
+            level = (
+                logging.WARNING
+                if elapsed >= SLOW_REQUEST_SECONDS
+                else logging.DEBUG
+            )
+            logger.log(
+                level,
+                "request served",
+                extra={
+                    **labels,
+                    "status": status_code,
+                    "duration_ms": round(elapsed * 1000, 1),
+                    "db_queries": stats.db_queries,
+                    "db_ms": round(stats.db_seconds * 1000, 1),
+                    "inference_ms": round(stats.inference_seconds * 1000, 1),
+                },
+            )
@@ -119,12 +119,13 @@ class CreateQuoteQuery(BaseModel):
     is_public: bool
 
 
-class Quote(BaseModel):
+# Lean projection of a quote used by list views; the embedding is only
+# fetched and serialized when explicitly requested (see Quote).
+class QuoteSummary(BaseModel):
     id: int
     author_id: int
     text: str
     is_public: bool
-    embedding: Optional[List[float]] = None
     tags: List[Tag] = []
     created_at: datetime
     updated_at: datetime
@@ -132,6 +133,10 @@ class Quote(BaseModel):
     favoriteCount: int = 0
 
 
+class Quote(QuoteSummary):
+    embedding: Optional[List[float]] = None
+
+
 class QuoteSimple(BaseModel):
     id: int
     text: str
@@ -142,6 +147,10 @@ class QuoteCollection(BaseModel):
     quotes: List[Quote]
 
 
+class QuoteSummaryCollection(BaseModel):
+    quotes: List[QuoteSummary]
+
+
 class CreateCollectionQuery(BaseModel):
     author_id: int
     name: str
@@ -175,6 +184,15 @@ class CollectionQuoteLink(BaseModel):
     added_at: Optional[datetime] = None
 
 
+class CollectionQuotesBulkQuery(BaseModel):
+    quote_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class CollectionQuotesBulkResponse(BaseModel):
+    collection_id: int
+    quote_ids: List[int]
+
+
 class TagQuoteLink(BaseModel):
     tag_id: int
     quote_id: int
@@ -198,6 +216,24 @@ class QuotePageResponse(BaseModel):
     totalItems: Optional[int] = None
 
 
+class CollectionQuotesPage(BaseModel):
+    quotes: list[QuotePageEntry]
+    nextCursor: Optional[str] = None
+
+
+class FavoriteQuotesPage(BaseModel):
+    quotes: list[QuotePageEntry]
+    nextCursor: Optional[int] = None
+
+
+class FavoritesBulkQuery(BaseModel):
+    quote_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class FavoritesBulkResponse(BaseModel):
+    quote_ids: List[int]
+
+
 class QuotesTotalPagesResponse(BaseModel):
     n_pages: int
 
@@ -287,6 +323,11 @@ class CSVMockQuote(BaseModel):
         return self.popularity_field
 
 
+class MockQuoteBatchSearchQuery(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=32)
+    top_n: int = Field(10, gt=0, le=50)
+
+
 # Payload for creating a collection from the client (author_id will be derived from authenticated user)
 class CreateCollectionClientPayload(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
@@ -6,6 +6,7 @@ from psycopg.connection import Connection
 
 import app.crud as crud
 import app.db as db
+import app.dedup as dedup
 import app.model as model
 
 
@@ -57,7 +58,11 @@ def add_entry_to_db(conn: Connection, entry: Entry):
     quote_query = model.CreateQuoteQuery(
         author_id=author.id, text=entry["quote"], is_public=True
     )
-    quote = crud.create_quote(conn, quote_query)
+    try:
+        quote = crud.create_quote(conn, quote_query, author_name=author.name)
+    except dedup.DuplicateQuoteError as e:
+        print(f"Skipping entry: {e}")
+        return
     conn.commit()
     for tag_name in entry["tags"]:
         tag = crud.get_tag_by_name(conn, tag_name)
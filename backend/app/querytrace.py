@@ -0,0 +1,188 @@
+"""
+Per-request SQL tracing and N+1 detection.
+
+Every statement run through app.db.TimedCursor is recorded, with its
+duration and its normalized shape (literals and parameters replaced by `?`),
+on the trace of the request being served and on any trace opened with
+`trace()`. A request that runs the same shape N1_THRESHOLD times or more is
+logged as a likely N+1 query loop.
+
+In tests, wrap the calls to an endpoint to enforce its query budget:
+
+    with querytrace.trace() as t:
+        client.get("/quotes/page/1")
+    t.assert_budget(max_queries=5)
+"""
+
+import contextvars
+import functools
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import app.metrics as metrics
+
+logger = logging.getLogger(__name__)
+
+# Request tracing costs a regex pass per distinct statement and a list append
+# per execution; it is off unless QUERY_TRACING is set.
+QUERY_TRACING = os.environ.get("QUERY_TRACING", "").lower() in (
+    "1", "true", "yes",
+)  # fmt: skip
+
+# Executions of one shape in a single request that count as an N+1 loop.
+N1_THRESHOLD = int(os.environ.get("N1_THRESHOLD", "5"))
+
+N1_DETECTIONS = metrics.Counter(
+    "quoteweave_n1_detections_total",
+    "Requests that repeated a statement shape at least N1_THRESHOLD times.",
+    ("method", "route"),
+)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize(query: str) -> str:
+    """The shape of `query`: literals and parameters as `?`, one line."""
+    shape = _STRING.sub("?", query)
+    shape = _PARAM.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _LIST.sub("(...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+@dataclass
+class Statement:
+    shape: str
+    seconds: float
+
+
+@dataclass
+class QueryTrace:
+    statements: list[Statement] = field(default_factory=list)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(s.seconds for s in self.statements)
+
+    def shape_counts(self) -> Counter:
+        return Counter(s.shape for s in self.statements)
+
+    def repeated(self, threshold: int = N1_THRESHOLD) -> dict[str, int]:
+        """Shapes executed at least `threshold` times, most frequent first."""
+        return {
+            shape: count
+            for shape, count in self.shape_counts().most_common()
+            if count >= threshold
+        }
+
+    def summary(self) -> str:
+        lines = [
+            f"{len(self.statements)} statements, "
+            f"{self.total_seconds * 1000:.1f} ms"
+        ]
+        for shape, count in self.shape_counts().most_common():
+            lines.append(f"  {count:>4} x {shape}")
+        return "\n".join(lines)
+
+    def assert_budget(
+        self, max_queries: int, max_repeats: int | None = None
+    ) -> None:
+        """Fail if the trace ran more statements, or repeated a shape more
+        often, than allowed."""
+        if len(self.statements) > max_queries:
+            raise AssertionError(
+                f"Query budget of {max_queries} exceeded:\n{self.summary()}"
+            )
+        if max_repeats is not None and self.repeated(max_repeats + 1):
+            raise AssertionError(
+                f"A statement shape ran more than {max_repeats} times:\n"
+                f"{self.summary()}"
+            )
+
+
+# The trace of the request being served, set by QueryTraceMiddleware.
+current_trace: contextvars.ContextVar[QueryTrace | None] = (
+    contextvars.ContextVar("current_trace", default=None)
+)
+
+# Traces opened with trace(). They are process-wide rather than
+# context-local, so that they also see statements run by a test client's
+# event loop thread.
+_lock = threading.Lock()
+_open_traces: list[QueryTrace] = []
+
+
+def tracing() -> bool:
+    return bool(_open_traces) or current_trace.get() is not None
+
+
+def record(query, seconds: float) -> None:
+    """Record one executed statement on the active traces, if any."""
+    request_trace = current_trace.get()
+    if request_trace is None and not _open_traces:
+        return
+    statement = Statement(normalize(str(query)), seconds)
+    if request_trace is not None:
+        request_trace.statements.append(statement)
+    with _lock:
+        for t in _open_traces:
+            t.statements.append(statement)
+
+
+@contextmanager
+def trace():
+    """Collect every statement executed in this process while open."""
+    t = QueryTrace()
+    with _lock:
+        _open_traces.append(t)
+    try:
+        yield t
+    finally:
+        with _lock:
+            _open_traces.remove(t)
+
+
+class QueryTraceMiddleware:
+    """
+    ASGI middleware tracing the statements of every HTTP request and logging
+    a warning with the per-shape counts when one looks like an N+1 loop.
+    """
+
+    def __init__(self, app, threshold: int = N1_THRESHOLD):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_trace = QueryTrace()
+        token = current_trace.set(request_trace)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_trace.reset(token)
+            repeated = request_trace.repeated(self.threshold)
+            if repeated:
+                route = scope.get("route")
+                labels = {
+                    "method": scope["method"],
+                    "route": getattr(route, "path", metrics.UNMATCHED_ROUTE),
+                }
+                N1_DETECTIONS.inc(**labels)
+                logger.warning(
+                    "possible N+1 query loop\n%s",
+                    request_trace.summary(),
+                    extra={**labels, "repeated_shapes": len(repeated)},
+                )
@@ -0,0 +1,35 @@
+"""
+Fast JSON responses for the hot list endpoints.
+
+FastAPI validates whatever an endpoint returns against its `response_model`
+and then encodes it with the standard json module. For list endpoints whose
+entries come straight from our own queries (see crud._map_page_entry_row),
+that second validation only repeats what the database already guarantees.
+Such endpoints return a FastJSONResponse instead: FastAPI then skips its
+response processing, and the content, pydantic models included, is encoded
+by orjson in one pass. Their `response_model` is still declared, for the
+OpenAPI schema.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(Response):
+    """orjson-encoded JSON response; pydantic models are not revalidated."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, default=_default, option=orjson.OPT_NON_STR_KEYS
+        )
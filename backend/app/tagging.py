@@ -1,9 +1,14 @@
-import torch
-from transformers import (
-    AutoTokenizer,
-    # BitsAndBytesConfig,
-    T5ForConditionalGeneration,
-)
+import logging
+from typing import TYPE_CHECKING
+
+import app.metrics as metrics
+
+# torch and transformers take seconds to import, so they are only imported
+# when the model is actually loaded.
+if TYPE_CHECKING:
+    from transformers import AutoTokenizer, T5ForConditionalGeneration
+
+logger = logging.getLogger(__name__)
 
 REPO_NAME = "fristrup/flan-t5-semantic-tagger-small"
 TOKENIZER_NAME = "google/flan-t5-small"
@@ -17,14 +22,21 @@ TOKENIZER_NAME = "google/flan-t5-small"
 
 # Global variables for the model and tokenizer.
 # Lazy loading is implemented in predict_tags.
-tokenizer: AutoTokenizer | None = None
-model: T5ForConditionalGeneration | None = None
+tokenizer: "AutoTokenizer | None" = None
+model: "T5ForConditionalGeneration | None" = None
 
 
 def load_model():
     """Loads the model and tokenizer."""
     global tokenizer, model
     if tokenizer is None or model is None:
+        import torch
+        from transformers import (
+            AutoTokenizer,
+            # BitsAndBytesConfig,
+            T5ForConditionalGeneration,
+        )
+
         tokenizer = AutoTokenizer.from_pretrained(
             TOKENIZER_NAME, use_fast=True
         )
@@ -57,9 +69,9 @@ def predict_tags(text: str, max_length: int = 128) -> list[str]:
     """
     if model is None or tokenizer is None:
         # Lazy load the model if it's not already loaded.
-        print("Lazy loading ML model...")
+        logger.info("Lazy loading ML model...")
         load_model()
-        print("ML model loaded.")
+        logger.info("ML model loaded.")
         # load_model() will raise an error if it fails, so no need to re-check here.
 
     # Prepare the input
@@ -72,8 +84,10 @@ def predict_tags(text: str, max_length: int = 128) -> list[str]:
     device = model.device
     input_ids = input_ids.to(device)
 
+    import torch
+
     # Generate tags
-    with torch.no_grad():
+    with torch.no_grad(), metrics.time_inference(REPO_NAME):
         outputs = model.generate(
             input_ids=input_ids,
             max_length=max_length,
@@ -0,0 +1,157 @@
+import os
+import struct
+
+import numpy as np
+from psycopg import Connection
+from psycopg.adapt import Dumper, Loader
+from psycopg.pq import Format
+from psycopg.types import TypeInfo
+
+# pgvector binary wire format: int16 dimensions, int16 unused, then
+# `dimensions` big-endian float32 values.
+_HEADER = struct.Struct(">HH")
+_WIRE_DTYPE = np.dtype(">f4")
+
+EMBEDDING_DIM = 384
+
+# Representation used for the first pass of ANN search:
+# "vector": full-precision HNSW index on quote.embedding.
+# "halfvec": HNSW index on embedding::halfvec (half the size), re-ranked.
+# "bit": HNSW index on binary_quantize(embedding) (1/32 of the size),
+#        re-ranked.
+# The compact indexes are created by `cli.py quantize-embeddings`.
+SEARCH_INDEX = os.environ.get("VECTOR_SEARCH_INDEX", "vector").lower()
+SEARCH_INDEXES = ("vector", "halfvec", "bit")
+
+# The compact first pass fetches this many times more candidates, which are
+# then re-ranked by full-precision distance.
+RERANK_FACTOR = {"vector": 1, "halfvec": 2, "bit": 10}
+
+# The first-pass expressions must match the index expressions exactly for
+# Postgres to use the indexes.
+_FIRST_PASS_DISTANCE = {
+    "vector": "{column} <=> {query}",
+    "halfvec": f"{{column}}::halfvec({EMBEDDING_DIM}) <=> {{query}}::halfvec({EMBEDDING_DIM})",
+    "bit": f"binary_quantize({{column}})::bit({EMBEDDING_DIM}) <~> binary_quantize({{query}})",
+}
+INDEX_NAMES = {
+    "vector": "idx_quote_embedding_hnsw",
+    "halfvec": "idx_quote_embedding_halfvec",
+    "bit": "idx_quote_embedding_bit",
+}
+INDEX_TARGETS = {
+    "vector": "quote USING hnsw (embedding vector_cosine_ops)",
+    "halfvec": f"quote USING hnsw ((embedding::halfvec({EMBEDDING_DIM})) halfvec_cosine_ops)",
+    "bit": f"quote USING hnsw ((binary_quantize(embedding)::bit({EMBEDDING_DIM})) bit_hamming_ops)",
+}
+
+
+def nearest_quotes_sql(
+    limit: str, where: str = "TRUE", index: str | None = None
+) -> str:
+    """
+    SELECT of (id, distance) for the `limit` quotes `q` nearest to
+    %(embedding)s by cosine distance among rows matching `where` whose
+    vectors come from %(embedding_model)s. With a compact index, candidates
+    come from it and are re-ranked exactly.
+    """
+    where = f"q.embedding_model = %(embedding_model)s AND ({where})"
+    index = index or SEARCH_INDEX
+    if index not in SEARCH_INDEXES:
+        raise ValueError(f"Unknown vector search index '{index}'.")
+    if index == "vector":
+        return f"""
+            SELECT q.id, q.embedding <=> %(embedding)s::vector AS distance
+            FROM quote q
+            WHERE {where}
+            ORDER BY q.embedding <=> %(embedding)s::vector
+            LIMIT {limit}
+        """
+    first_pass = _FIRST_PASS_DISTANCE[index].format(
+        column="q.embedding", query="%(embedding)s::vector"
+    )
+    return f"""
+        SELECT id, embedding <=> %(embedding)s::vector AS distance
+        FROM (
+            SELECT q.id, q.embedding
+            FROM quote q
+            WHERE {where}
+            ORDER BY {first_pass}
+            LIMIT ({limit}) * {RERANK_FACTOR[index]}
+        ) shortlist
+        ORDER BY distance
+        LIMIT {limit}
+    """
+
+
+# The OID of the `vector` type is assigned when the extension is created, so
+# it is looked up once per process and reused for every new connection.
+_vector_type_info: TypeInfo | None = None
+_vector_dumper: type[Dumper] | None = None
+
+
+def to_vector(values) -> np.ndarray:
+    """Coerce an embedding (ndarray, list, tuple) to a 1-D float32 array."""
+    arr = np.asarray(values, dtype=np.float32)
+    if arr.ndim != 1:
+        raise ValueError(f"Expected a 1-D embedding, got shape {arr.shape}")
+    return arr
+
+
+class VectorBinaryDumper(Dumper):
+    format = Format.BINARY
+
+    def dump(self, obj) -> bytes:
+        arr = np.asarray(obj, dtype=_WIRE_DTYPE)
+        if arr.ndim != 1:
+            raise ValueError(
+                f"Expected a 1-D embedding, got shape {arr.shape}"
+            )
+        return _HEADER.pack(arr.shape[0], 0) + arr.tobytes()
+
+
+class VectorBinaryLoader(Loader):
+    format = Format.BINARY
+
+    def load(self, data) -> np.ndarray:
+        dim, _ = _HEADER.unpack_from(data)
+        return np.frombuffer(
+            data, dtype=_WIRE_DTYPE, count=dim, offset=_HEADER.size
+        ).astype(np.float32)
+
+
+class VectorTextLoader(Loader):
+    format = Format.TEXT
+
+    def load(self, data) -> np.ndarray:
+        # Text representation is "[0.1,0.2,...]".
+        return np.array(bytes(data)[1:-1].split(b","), dtype=np.float32)
+
+
+def register_vector(conn: Connection) -> bool:
+    """
+    Register the numpy <-> pgvector adapters on a connection.
+    Returns False if the `vector` extension is not installed yet.
+    """
+    global _vector_type_info, _vector_dumper
+    if _vector_type_info is None:
+        info = TypeInfo.fetch(conn, "vector")
+        # TypeInfo.fetch runs inside a transaction on non-autocommit
+        # connections; don't leave it open for the caller.
+        if not conn.autocommit:
+            conn.rollback()
+        if info is None:
+            return False
+        _vector_dumper = type(
+            "VectorBinaryDumper", (VectorBinaryDumper,), {"oid": info.oid}
+        )
+        _vector_type_info = info
+
+    info = _vector_type_info
+    info.register(conn)
+
+    adapters = conn.adapters
+    adapters.register_dumper(np.ndarray, _vector_dumper)
+    adapters.register_loader(info.oid, VectorTextLoader)
+    adapters.register_loader(info.oid, VectorBinaryLoader)
+    return True
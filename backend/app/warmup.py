@@ -0,0 +1,86 @@
+import logging
+import os
+import threading
+import time
+
+import app.embedding as embedding
+import app.tagging as tagging
+
+logger = logging.getLogger(__name__)
+
+# "eager": load the embedding model and CSV embeddings before the server
+# accepts traffic (the tagging model stays lazy, loaded on first use).
+# "background": accept traffic immediately and warm every model in a
+# background thread; ML endpoints answer 503 until their model is ready.
+MODEL_LOADING = os.environ.get("MODEL_LOADING", "eager").lower()
+
+EMBEDDING = "embedding"
+TAGGING = "tagging"
+
+_lock = threading.Lock()
+_warming: set[str] = set()
+
+
+def is_warming(model_name: str) -> bool:
+    with _lock:
+        return model_name in _warming
+
+
+def _mark_ready(model_name: str) -> None:
+    with _lock:
+        _warming.discard(model_name)
+
+
+def load_embedding_models() -> None:
+    """Loads the embedding model and the mock CSV quote embeddings."""
+    start = time.perf_counter()
+    try:
+        embedding.load_embedding_model()
+        logger.info(
+            "Embedding model loaded successfully or already available."
+        )
+    except RuntimeError as e:
+        logger.error(f"Could not load embedding model on startup: {e}")
+
+    try:
+        embedding.load_quotes_and_generate_embeddings()
+        logger.info(
+            f"Mock quotes processing complete. {len(embedding.CSV_QUOTES_DATA)} quotes loaded."
+        )
+    except Exception as e:
+        logger.warning(
+            f"Error loading mock quotes or generating embeddings on startup: {e}"
+        )
+    logger.info(f"Embedding warm-up took {time.perf_counter() - start:.2f}s.")
+
+
+def _warm_up_in_background() -> None:
+    try:
+        load_embedding_models()
+    finally:
+        # Even on failure, stop answering 503: the endpoints fall back to
+        # lazy loading and report the real error.
+        _mark_ready(EMBEDDING)
+
+    start = time.perf_counter()
+    try:
+        tagging.load_model()
+        logger.info(
+            f"Tagging warm-up took {time.perf_counter() - start:.2f}s."
+        )
+    except Exception as e:
+        logger.error(f"Could not load tagging model in background: {e}")
+    finally:
+        _mark_ready(TAGGING)
+
+    logger.info("Background warm-up finished. Ready to use.")
+
+
+def start_background_warmup() -> threading.Thread:
+    with _lock:
+        _warming.update((EMBEDDING, TAGGING))
+    thread = threading.Thread(
+        target=_warm_up_in_background, name="model-warmup", daemon=True
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,83 @@
+"""
+Measure how stale another process's response cache can get: publish cache
+invalidations from this process and time how long a separate process,
+running the same listener as every API worker, takes to bump its versions.
+
+Run from the backend directory against a reachable database:
+
+    python -m benchmarks.cache_invalidation --events 50 --bound-ms 100
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+import app.cache as cache
+import app.db as db
+
+LISTENER_PROBE = """
+import sys, time
+import app.cache as cache
+
+listener = cache.start_listener()
+if not listener.connected.wait(30):
+    sys.exit("listener did not connect")
+seen = cache.versions((cache.QUOTE,))
+print("ready", flush=True)
+while True:
+    current = cache.versions((cache.QUOTE,))
+    if current != seen:
+        seen = current
+        print(time.time(), flush=True)
+    time.sleep(0.0005)
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Cross-process cache invalidation latency."
+    )
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument(
+        "--bound-ms",
+        type=float,
+        default=100.0,
+        help="Fail if any invalidation takes longer than this to arrive.",
+    )
+    args = parser.parse_args()
+
+    probe = subprocess.Popen(
+        [sys.executable, "-c", LISTENER_PROBE],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        if probe.stdout.readline().strip() != "ready":
+            raise SystemExit("Listener process failed to start.")
+        latencies = []
+        with db.get_connection() as conn:
+            for _ in range(args.events):
+                sent = time.time()
+                cache.publish(conn, (cache.QUOTE,))
+                received = float(probe.stdout.readline())
+                latencies.append((received - sent) * 1000)
+                time.sleep(0.01)
+    finally:
+        probe.terminate()
+        probe.wait()
+
+    latencies.sort()
+    print(
+        f"{len(latencies)} invalidations: median "
+        f"{statistics.median(latencies):.1f} ms, max {latencies[-1]:.1f} ms"
+    )
+    if latencies[-1] > args.bound_ms:
+        raise SystemExit(
+            f"Staleness bound of {args.bound_ms:.0f} ms exceeded."
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Measure import time of app.main and time-to-first-response of a fresh worker
+for each MODEL_LOADING mode.
+
+Run from the backend directory:
+
+    python -m benchmarks.cold_start --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+HEAVY_MODULES = ["torch", "transformers", "fastembed", "pandas"]
+
+IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure_import(runs: int) -> None:
+    timings = []
+    loaded: list[str] = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        loaded = result["loaded"]
+    print(
+        f"import app.main: median {statistics.median(timings) * 1000:.0f} ms "
+        f"over {runs} runs; heavy modules loaded at import: {loaded or 'none'}"
+    )
+
+
+def _wait_for(url: str, deadline: float) -> float | None:
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return time.perf_counter()
+        except urllib.error.HTTPError:
+            # Any HTTP answer, including 503 "warming", means it is serving.
+            return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            time.sleep(0.05)
+    return None
+
+
+def measure_first_response(mode: str, port: int, timeout: float) -> None:
+    env = dict(os.environ, MODEL_LOADING=mode)
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        first_root = _wait_for(f"{base}/", start + timeout)
+        if first_root is None:
+            print(f"{mode:<11} no response within {timeout:.0f}s")
+            return
+        line = f"{mode:<11} first GET / after {first_root - start:6.2f}s"
+        search_url = f"{base}/api/v1/mock/quotes/search?query=love"
+        while time.perf_counter() < start + timeout:
+            try:
+                with urllib.request.urlopen(search_url, timeout=5):
+                    line += (
+                        f", mock search ready after "
+                        f"{time.perf_counter() - start:6.2f}s"
+                    )
+                    break
+            except urllib.error.HTTPError as e:
+                if e.code != 503:
+                    break
+                time.sleep(0.1)
+        print(line)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Import time and cold start benchmark."
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--modes", nargs="+", default=["eager", "background"])
+    args = parser.parse_args()
+
+    measure_import(args.runs)
+    for mode in args.modes:
+        measure_first_response(mode, args.port, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
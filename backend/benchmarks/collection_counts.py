@@ -0,0 +1,128 @@
+"""
+Check and time collection quote counts for an author with many collections:
+get_collections_from_author must run a single statement however many
+collections there are, and the trigger-maintained counts must match
+collectioncontains after bulk adds and removes.
+
+The synthetic rows are inserted inside a transaction that is rolled back at
+the end, so the benchmark can run against a development database. Run from
+the backend directory:
+
+    python -m benchmarks.collection_counts --collections 10000
+"""
+
+import argparse
+import statistics
+import time
+
+import app.crud as crud
+import app.db as db
+import app.querytrace as querytrace
+
+
+def _populate(conn, collections: int, quotes_per_collection: int) -> int:
+    # Ids are often inserted explicitly by the populate scripts, so the
+    # identity sequences cannot be trusted here.
+    author_id = conn.execute(
+        "INSERT INTO author (id, name) "
+        "SELECT COALESCE(MAX(id), 0) + 1, 'benchmark count author' "
+        "FROM author RETURNING id"
+    ).fetchone()[0]
+    conn.execute(
+        "INSERT INTO quote (id, author_id, text, is_public) "
+        "SELECT (SELECT COALESCE(MAX(id), 0) FROM quote) + g, %s, "
+        "'benchmark quote ' || g, TRUE "
+        "FROM generate_series(1, %s) AS g",
+        (author_id, quotes_per_collection * 10),
+    )
+    conn.execute(
+        "INSERT INTO collection (id, author_id, name, description, is_public) "
+        "SELECT (SELECT COALESCE(MAX(id), 0) FROM collection) + g, %s, "
+        "'Count collection ' || g, '', TRUE "
+        "FROM generate_series(1, %s) AS g",
+        (author_id, collections),
+    )
+    # One statement for all memberships exercises the statement-level
+    # trigger with many collections in its transition table.
+    conn.execute(
+        """
+        INSERT INTO collectioncontains (collection_id, quote_id)
+        SELECT c.id, q.id
+        FROM collection c
+        JOIN LATERAL (
+            SELECT id FROM quote WHERE author_id = %(author_id)s
+            ORDER BY (id * 31 + c.id) %% 997 LIMIT 1 + c.id %% %(per)s
+        ) q ON TRUE
+        WHERE c.author_id = %(author_id)s
+        """,
+        {"author_id": author_id, "per": quotes_per_collection},
+    )
+    # Remove a slice again so the delete path is covered too.
+    conn.execute(
+        "DELETE FROM collectioncontains cc USING collection c "
+        "WHERE cc.collection_id = c.id AND c.author_id = %s "
+        "AND (cc.quote_id + c.id) %% 5 = 0",
+        (author_id,),
+    )
+    return author_id
+
+
+def _check_counts(conn, author_id: int) -> int:
+    return conn.execute(
+        """
+        SELECT COUNT(*) FROM collection c
+        WHERE c.author_id = %s AND c.quote_count <> (
+            SELECT COUNT(*) FROM collectioncontains cc
+            WHERE cc.collection_id = c.id
+        )
+        """,
+        (author_id,),
+    ).fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Collection quote count benchmark."
+    )
+    parser.add_argument("--collections", type=int, default=10_000)
+    parser.add_argument("--quotes-per-collection", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    with db.get_connection() as conn:
+        try:
+            start = time.perf_counter()
+            author_id = _populate(
+                conn, args.collections, args.quotes_per_collection
+            )
+            print(
+                f"Inserted {args.collections} collections in "
+                f"{time.perf_counter() - start:.1f}s."
+            )
+
+            mismatched = _check_counts(conn, author_id)
+            print(f"Collections with a wrong stored count: {mismatched}")
+
+            timings = []
+            for _ in range(args.iterations):
+                with querytrace.trace() as t:
+                    start = time.perf_counter()
+                    collections = crud.get_collections_from_author(
+                        conn, author_id
+                    )
+                    timings.append((time.perf_counter() - start) * 1000)
+                t.assert_budget(max_queries=1)
+            assert len(collections) == args.collections
+            print(
+                f"get_collections_from_author: 1 statement, median "
+                f"{statistics.median(timings):.1f} ms for "
+                f"{len(collections)} collections"
+            )
+            if mismatched:
+                raise SystemExit(1)
+        finally:
+            conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Compare collection search latency of the legacy regex scan with the indexed
+trigram and full-text modes on a large synthetic collection table.
+
+The synthetic rows are inserted inside a transaction that is rolled back at
+the end, so the benchmark can run against a development database. Run from
+the backend directory:
+
+    python -m benchmarks.collection_search --rows 1000000
+"""
+
+import argparse
+import statistics
+import time
+
+import app.crud as crud
+import app.db as db
+
+WORDS = [
+    "love",
+    "life",
+    "wisdom",
+    "hope",
+    "friendship",
+    "courage",
+    "time",
+    "happiness",
+    "truth",
+    "death",
+    "art",
+    "books",
+    "nature",
+    "faith",
+    "humor",
+    "success",
+    "dreams",
+    "change",
+    "poetry",
+    "freedom",
+]
+
+LEGACY_REGEX_QUERY = """
+    SELECT c.id
+    FROM collection c
+    WHERE c.is_public = TRUE
+      AND (LOWER(c.name) ~* LOWER(%(term)s)
+           OR LOWER(c.description) ~* LOWER(%(term)s))
+    ORDER BY c.name
+    LIMIT 10
+"""
+
+
+def _populate(conn, rows: int) -> None:
+    # Ids are often inserted explicitly by the populate scripts, so the
+    # identity sequences cannot be trusted here.
+    author_id = conn.execute(
+        "INSERT INTO author (id, name) "
+        "SELECT COALESCE(MAX(id), 0) + 1, 'benchmark collection author' "
+        "FROM author RETURNING id"
+    ).fetchone()[0]
+    conn.execute(
+        """
+        INSERT INTO collection (id, author_id, name, description, is_public)
+        SELECT
+            (SELECT COALESCE(MAX(id), 0) FROM collection) + g,
+            %(author_id)s,
+            'Collection ' || g || ' about ' ||
+                (%(words)s::text[])[1 + (g * 7) %% %(n_words)s],
+            'Quotes on ' ||
+                (%(words)s::text[])[1 + (g * 13) %% %(n_words)s] || ' and ' ||
+                (%(words)s::text[])[1 + (g * 17) %% %(n_words)s],
+            g %% 10 <> 0
+        FROM generate_series(1, %(rows)s) AS g
+        """,
+        {
+            "author_id": author_id,
+            "words": WORDS,
+            "n_words": len(WORDS),
+            "rows": rows,
+        },
+    )
+    conn.execute("ANALYZE collection")
+
+
+def _time(fn, iterations: int) -> tuple[float, float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return statistics.median(timings), p95
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Collection search latency benchmark."
+    )
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument(
+        "--terms",
+        nargs="+",
+        default=["friendship", "poetry", "Collection 4242"],
+    )
+    args = parser.parse_args()
+
+    with db.get_connection() as conn:
+        try:
+            start = time.perf_counter()
+            _populate(conn, args.rows)
+            print(
+                f"Inserted {args.rows} synthetic collections in "
+                f"{time.perf_counter() - start:.1f}s."
+            )
+            print(f"{'term':<20}{'mode':<10}{'p50 ms':>10}{'p95 ms':>10}")
+            for term in args.terms:
+                variants = {
+                    "regex": lambda term=term: conn.execute(
+                        LEGACY_REGEX_QUERY, {"term": term}
+                    ).fetchall(),
+                    "trigram": lambda term=term: crud.search_collections(
+                        conn, term, mode="trigram"
+                    ),
+                    "fts": lambda term=term: crud.search_collections(
+                        conn, term, mode="fts"
+                    ),
+                }
+                for mode, fn in variants.items():
+                    p50, p95 = _time(fn, args.iterations)
+                    print(f"{term:<20}{mode:<10}{p50:>10.2f}{p95:>10.2f}")
+        finally:
+            conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
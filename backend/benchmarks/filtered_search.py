@@ -0,0 +1,207 @@
+"""
+Recall and latency of filtered semantic search (tag / author / collection)
+against exact ranking of the same filtered set.
+
+Optionally adds synthetic quotes with random embeddings, tagged so that the
+tag filters match 1% and 0.1% of them, inside a transaction that is rolled
+back at the end. Also checks that an unfiltered page past the index's
+candidate cap is still full and exact. Fails if mean recall drops below
+--min-recall. Run from the backend directory:
+
+    python -m benchmarks.filtered_search --synthetic-rows 100000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import app.crud as crud
+import app.db as db
+import app.embedding as app_embedding
+
+SYNTHETIC_TAGS = {"benchmark-1pct": 100, "benchmark-0.1pct": 1000}
+
+
+def _populate(conn, rows: int) -> None:
+    # Ids are often inserted explicitly by the populate scripts, so the
+    # identity sequences cannot be trusted here.
+    author_id = conn.execute(
+        "INSERT INTO author (id, name) "
+        "SELECT COALESCE(MAX(id), 0) + 1, 'benchmark search author' "
+        "FROM author RETURNING id"
+    ).fetchone()[0]
+    first_id = conn.execute(
+        "SELECT COALESCE(MAX(id), 0) + 1 FROM quote"
+    ).fetchone()[0]
+    conn.execute(
+        """
+        INSERT INTO quote (id, author_id, text, is_public, embedding, embedding_model)
+        SELECT
+            %(first_id)s + g, %(author_id)s, 'Synthetic quote ' || g, TRUE,
+            (SELECT array_agg(random() - 0.5)
+             FROM generate_series(1, 384) WHERE g > 0)::vector,
+            %(embedding_model)s
+        FROM generate_series(0, %(rows)s - 1) AS g
+        """,
+        {
+            "first_id": first_id,
+            "author_id": author_id,
+            "rows": rows,
+            "embedding_model": app_embedding.EMBEDDING_MODEL_NAME,
+        },
+    )
+    for name, every in SYNTHETIC_TAGS.items():
+        tag_id = conn.execute(
+            "INSERT INTO tag (id, name) "
+            "SELECT COALESCE(MAX(id), 0) + 1, %s FROM tag RETURNING id",
+            (name,),
+        ).fetchone()[0]
+        conn.execute(
+            """
+            INSERT INTO taggedas (quote_id, tag_id)
+            SELECT %(first_id)s + g, %(tag_id)s
+            FROM generate_series(0, %(rows)s - 1, %(every)s) AS g
+            """,
+            {
+                "first_id": first_id,
+                "tag_id": tag_id,
+                "rows": rows,
+                "every": every,
+            },
+        )
+    conn.execute("ANALYZE quote")
+    conn.execute("ANALYZE taggedas")
+
+
+def _filters(conn) -> list[tuple[str, dict]]:
+    filters: list[tuple[str, dict]] = [("none", {})]
+    for name in SYNTHETIC_TAGS:
+        if conn.execute(
+            "SELECT 1 FROM tag WHERE name = %s", (name,)
+        ).fetchone():
+            filters.append((f"tag {name}", {"tag": name}))
+    row = conn.execute(
+        "SELECT t.name FROM tag t JOIN taggedas ta ON ta.tag_id = t.id "
+        "GROUP BY t.name ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    if row and row[0] not in SYNTHETIC_TAGS:
+        filters.append((f"tag {row[0]}", {"tag": row[0]}))
+    row = conn.execute(
+        "SELECT author_id FROM quote WHERE is_public = TRUE "
+        "GROUP BY author_id ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    if row:
+        filters.append((f"author {row[0]}", {"author_id": row[0]}))
+    row = conn.execute(
+        "SELECT c.id FROM collection c "
+        "JOIN collectioncontains cc ON cc.collection_id = c.id "
+        "WHERE c.is_public = TRUE GROUP BY c.id "
+        "ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    if row:
+        filters.append((f"collection {row[0]}", {"collection_id": row[0]}))
+    return filters
+
+
+def _exact(conn, embedding, limit: int, **filters) -> list[int]:
+    where = crud._semantic_filters(
+        filters.get("tag"),
+        filters.get("author_id"),
+        filters.get("collection_id"),
+    )
+    params = {
+        "embedding": embedding,
+        "embedding_model": app_embedding.EMBEDDING_MODEL_NAME,
+        "user_id": None,
+        "tag": filters.get("tag"),
+        "author_id": filters.get("author_id"),
+        "collection_id": filters.get("collection_id"),
+        "limit": limit,
+        "skip": 0,
+    }
+    with conn.cursor(binary=True) as cur:
+        entries = crud._search_quotes_semantic_exact(cur, where, params)
+    return [entry.id for entry in entries]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Filtered semantic search recall/latency benchmark."
+    )
+    parser.add_argument("--synthetic-rows", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--min-recall", type=float, default=0.9)
+    args = parser.parse_args()
+    failures = []
+
+    with db.get_connection() as conn:
+        try:
+            if args.synthetic_rows:
+                start = time.perf_counter()
+                _populate(conn, args.synthetic_rows)
+                print(
+                    f"Inserted {args.synthetic_rows} synthetic quotes in "
+                    f"{time.perf_counter() - start:.1f}s."
+                )
+            with conn.cursor(binary=True) as cur:
+                cur.execute(
+                    "SELECT embedding FROM quote WHERE embedding IS NOT NULL"
+                )
+                embeddings = [row[0] for row in cur.fetchall()]
+            if not embeddings:
+                raise SystemExit(
+                    "No quote embeddings found; populate the database first."
+                )
+            queries = random.sample(
+                embeddings, min(args.queries, len(embeddings))
+            )
+
+            print(
+                f"{'filter':<28}{'recall@' + str(args.limit):>10}"
+                f"{'p50 ms':>10}{'p95 ms':>10}"
+            )
+            for label, filters in _filters(conn):
+                recalls = []
+                timings = []
+                for query in queries:
+                    expected = _exact(conn, query, args.limit, **filters)
+                    start = time.perf_counter()
+                    entries = crud.search_quotes_semantic(
+                        conn, query, limit=args.limit, **filters
+                    )
+                    timings.append((time.perf_counter() - start) * 1000)
+                    if expected:
+                        found = {entry.id for entry in entries}
+                        recalls.append(
+                            len(found.intersection(expected)) / len(expected)
+                        )
+                timings.sort()
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                recall = statistics.mean(recalls) if recalls else float("nan")
+                print(
+                    f"{label:<28}{recall:>10.3f}"
+                    f"{statistics.median(timings):>10.2f}{p95:>10.2f}"
+                )
+                if recall < args.min_recall:
+                    failures.append(f"{label}: recall {recall:.3f}")
+
+            skip = crud.ANN_MAX_CANDIDATES
+            if len(embeddings) >= skip + args.limit:
+                deep = crud.search_quotes_semantic(
+                    conn, queries[0], limit=args.limit, skip=skip
+                )
+                expected = _exact(conn, queries[0], skip + args.limit)
+                if [entry.id for entry in deep] != expected[skip:]:
+                    failures.append(f"page at skip={skip} is not exact")
+        finally:
+            conn.rollback()
+    for failure in failures:
+        print(f"  FAILED {failure}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""
+End-to-end load benchmark: seed a dedicated Postgres database with synthetic
+data, start the API against it and replay a realistic mix of requests,
+reporting p50/p95/p99 latency and throughput per endpoint.
+
+Results are saved as JSON under benchmarks/results/ so that a later run can
+be compared against them. Run from the backend directory with a local
+Postgres (with pgvector) reachable through the usual POSTGRES_* variables:
+
+    python -m benchmarks.load --scale 100000 --reset --duration 60
+    python -m benchmarks.load --scale 100000 --compare benchmarks/results/<file>.json
+
+The request mix is drawn from a seeded random generator per worker, so two
+runs at the same scale and concurrency replay the same requests.
+"""
+
+import argparse
+import datetime
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from collections import defaultdict
+
+import psycopg
+
+import app.db as db
+import app.populate as populate
+from benchmarks import synthetic
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Relative weight of each endpoint in the replayed traffic.
+MIX = {
+    "quotes_page": 35,
+    "quote": 25,
+    "search": 15,
+    "collection": 10,
+    "favorite_toggle": 10,
+    "token": 5,
+}
+
+PAGE_SIZE = 9  # as served by /quotes/page/{n}
+# Deep pages cost an OFFSET scan; most real traffic stays near the front.
+MAX_PAGE = 200
+
+
+def _reset_database(dbname: str) -> None:
+    with psycopg.connect(
+        host=db.settings.host,
+        port=db.settings.port,
+        dbname="postgres",
+        user=db.settings.user,
+        password=db.settings.password,
+        autocommit=True,
+    ) as conn:
+        conn.execute(f'DROP DATABASE IF EXISTS "{dbname}" WITH (FORCE)')
+        conn.execute(f'CREATE DATABASE "{dbname}"')
+
+
+def prepare_database(args) -> dict[str, int]:
+    """Create and seed the benchmark database, or reuse a seeded one."""
+    db.settings.dbname = args.dbname
+    if args.reset:
+        _reset_database(args.dbname)
+    with db.get_connection() as conn:
+        if args.reset:
+            populate.init_db(conn)
+            start = time.perf_counter()
+            counts = synthetic.seed(conn, args.scale, args.users)
+            print(f"Seeded {counts} in {time.perf_counter() - start:.1f}s.")
+            return counts
+        quotes, collections, users = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM quote), "
+            '(SELECT COUNT(*) FROM collection), (SELECT COUNT(*) FROM "user")'
+        ).fetchone()
+    if quotes != args.scale:
+        raise SystemExit(
+            f"{args.dbname} holds {quotes} quotes, not {args.scale}; "
+            "pass --reset to reseed it."
+        )
+    return {"quotes": quotes, "collections": collections, "users": users}
+
+
+def _wait_until_ready(port: int, timeout: float) -> None:
+    """Wait until the API answers searches (the embedding model is loaded)."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/quotes/search/?query=warmup")
+            if conn.getresponse().status == 200:
+                return
+        except (ConnectionError, OSError):
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"API not ready within {timeout:.0f}s.")
+
+
+def start_server(args) -> subprocess.Popen:
+    env = dict(os.environ, POSTGRES_DB=args.dbname, MODEL_LOADING="eager")
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(args.port),
+            "--workers",
+            str(args.server_workers),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_ready(args.port, args.startup_timeout)
+    except BaseException:
+        server.terminate()
+        raise
+    return server
+
+
+class Worker(threading.Thread):
+    """Replays the request mix over one keep-alive connection."""
+
+    def __init__(self, index: int, args, counts, deadline, results, lock):
+        super().__init__(daemon=True)
+        self.rng = random.Random(args.seed + index)
+        self.port = args.port
+        self.counts = counts
+        self.deadline = deadline
+        self.results = results
+        self.lock = lock
+        self.username = synthetic.user_name(1 + index % counts["users"])
+        self.favorited: set[int] = set()
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.port)
+        self.token = None
+
+    def _request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        if self.token is not None:
+            headers["Authorization"] = f"Bearer {self.token}"
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            payload = response.read()
+            return response.status, payload
+        except (ConnectionError, http.client.HTTPException, OSError):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection("127.0.0.1", self.port)
+            return 599, b""
+
+    def _login(self):
+        self.token = None
+        body = urllib.parse.urlencode(
+            {"username": self.username, "password": synthetic.USER_PASSWORD}
+        )
+        status, payload = self._request(
+            "POST",
+            "/token",
+            body=body,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        if status == 200:
+            self.token = json.loads(payload)["access_token"]
+        return status
+
+    def _quote_id(self) -> int:
+        return self.rng.randint(1, self.counts["quotes"])
+
+    def _run_one(self, endpoint: str) -> int:
+        if endpoint == "quotes_page":
+            pages = max(1, -(-self.counts["quotes"] // PAGE_SIZE))
+            page = self.rng.randint(1, min(pages, MAX_PAGE))
+            return self._request("GET", f"/quotes/page/{page}")[0]
+        if endpoint == "quote":
+            return self._request("GET", f"/quotes/{self._quote_id()}")[0]
+        if endpoint == "search":
+            query = " ".join(self.rng.sample(synthetic.WORDS, 2))
+            path = "/quotes/search/?" + urllib.parse.urlencode(
+                {"query": query}
+            )
+            return self._request("GET", path)[0]
+        if endpoint == "collection":
+            collection_id = self.rng.randint(1, self.counts["collections"])
+            return self._request("GET", f"/collections/{collection_id}")[0]
+        if endpoint == "favorite_toggle":
+            quote_id = self._quote_id()
+            method = "DELETE" if quote_id in self.favorited else "POST"
+            self.favorited.symmetric_difference_update({quote_id})
+            return self._request(method, f"/quotes/{quote_id}/favorite")[0]
+        return self._login()
+
+    def run(self):
+        self._login()
+        endpoints = list(MIX)
+        weights = list(MIX.values())
+        while time.perf_counter() < self.deadline:
+            endpoint = self.rng.choices(endpoints, weights)[0]
+            start = time.perf_counter()
+            status = self._run_one(endpoint)
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.results[endpoint].append((elapsed, status))
+        self.conn.close()
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * q))
+    return sorted_values[index]
+
+
+def summarize(results, duration: float) -> dict[str, dict]:
+    summary = {}
+    for endpoint in MIX:
+        samples = results.get(endpoint, [])
+        if not samples:
+            continue
+        timings = sorted(elapsed * 1000 for elapsed, _ in samples)
+        summary[endpoint] = {
+            "requests": len(samples),
+            "errors": sum(1 for _, status in samples if status >= 500),
+            "rps": len(samples) / duration,
+            "p50_ms": _percentile(timings, 0.50),
+            "p95_ms": _percentile(timings, 0.95),
+            "p99_ms": _percentile(timings, 0.99),
+        }
+    return summary
+
+
+def print_summary(summary, baseline=None) -> None:
+    print(
+        f"{'endpoint':<17}{'reqs':>8}{'5xx':>6}{'req/s':>9}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for endpoint, row in summary.items():
+        print(
+            f"{endpoint:<17}{row['requests']:>8}{row['errors']:>6}"
+            f"{row['rps']:>9.1f}{row['p50_ms']:>10.1f}"
+            f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+        )
+        previous = (baseline or {}).get(endpoint)
+        if previous:
+            deltas = [
+                (row[key] - previous[key]) / previous[key] * 100
+                if previous[key]
+                else 0.0
+                for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+            ]
+            print(
+                f"{'  vs baseline':<31}{deltas[0]:>+8.0f}%"
+                f"{deltas[1]:>+9.0f}%{deltas[2]:>+9.0f}%{deltas[3]:>+9.0f}%"
+            )
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(args, counts, summary) -> str:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(RESULTS_DIR, f"load-{args.scale}-{stamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "commit": _git_commit(),
+                "config": {
+                    "scale": args.scale,
+                    "concurrency": args.concurrency,
+                    "duration": args.duration,
+                    "server_workers": args.server_workers,
+                    "seed": args.seed,
+                    "mix": MIX,
+                },
+                "rows": counts,
+                "endpoints": summary,
+            },
+            f,
+            indent=2,
+        )
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API load benchmark.")
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=10_000,
+        help="Number of synthetic quotes (e.g. 10000, 100000, 1000000).",
+    )
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument(
+        "--dbname",
+        default="quoteweave_bench",
+        help="Database to seed and serve from; never the demo database.",
+    )
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="Drop, recreate and reseed the benchmark database.",
+    )
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--compare", help="Earlier results file to report deltas against."
+    )
+    args = parser.parse_args()
+
+    counts = prepare_database(args)
+    server = start_server(args)
+    try:
+        results = defaultdict(list)
+        lock = threading.Lock()
+        start = time.perf_counter()
+        deadline = start + args.duration
+        workers = [
+            Worker(i, args, counts, deadline, results, lock)
+            for i in range(args.concurrency)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+    summary = summarize(results, elapsed)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["endpoints"]
+    print_summary(summary, baseline)
+    print(f"Saved results to {save_results(args, counts, summary)}")
+
+
+if __name__ == "__main__":
+    main()
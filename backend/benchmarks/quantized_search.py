@@ -0,0 +1,112 @@
+"""
+Compare the full-precision HNSW index with the compact halfvec and binary
+indexes: index size, recall@k against exact search, and latency.
+
+Build the compact indexes first (`python cli.py quantize-embeddings --type
+halfvec`, `--type bit`); missing ones are skipped. Run from the backend
+directory against a populated database:
+
+    python -m benchmarks.quantized_search --queries 100
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import app.db as db
+import app.embedding as app_embedding
+import app.vector as vector
+
+
+def _nearest_ids(conn, embedding, limit: int, index: str) -> list[int]:
+    with conn.cursor(binary=True) as cur:
+        ef_search = limit * vector.RERANK_FACTOR[index]
+        cur.execute(
+            "SELECT set_config('hnsw.ef_search', %s, true)",
+            (str(min(max(ef_search, 100), 1000)),),
+        )
+        cur.execute(
+            vector.nearest_quotes_sql(str(limit), index=index),
+            {
+                "embedding": embedding,
+                "embedding_model": app_embedding.EMBEDDING_MODEL_NAME,
+            },
+        )
+        return [row[0] for row in cur.fetchall()]
+
+
+def _exact_ids(conn, embedding, limit: int) -> list[int]:
+    with conn.cursor(binary=True) as cur:
+        cur.execute("SET LOCAL enable_indexscan = off")
+        cur.execute(
+            "SELECT id FROM quote WHERE embedding_model = %s "
+            "ORDER BY embedding <=> %s LIMIT %s",
+            (app_embedding.EMBEDDING_MODEL_NAME, embedding, limit),
+        )
+        ids = [row[0] for row in cur.fetchall()]
+        cur.execute("SET LOCAL enable_indexscan = on")
+        return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Quantized embedding index benchmark."
+    )
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    with db.get_connection() as conn:
+        with conn.cursor(binary=True) as cur:
+            cur.execute(
+                "SELECT embedding FROM quote WHERE embedding IS NOT NULL"
+            )
+            embeddings = [row[0] for row in cur.fetchall()]
+        if not embeddings:
+            raise SystemExit(
+                "No quote embeddings found; populate the database first."
+            )
+        queries = random.sample(embeddings, min(args.queries, len(embeddings)))
+        truth = [_exact_ids(conn, q, args.limit) for q in queries]
+
+        table_size = conn.execute(
+            "SELECT pg_size_pretty(pg_table_size('quote'))"
+        ).fetchone()[0]
+        print(
+            f"{len(embeddings)} quotes, {len(queries)} queries, "
+            f"table {table_size}."
+        )
+        print(
+            f"{'index':<10}{'size':>12}{'recall@' + str(args.limit):>12}"
+            f"{'p50 ms':>10}{'p95 ms':>10}"
+        )
+        for index in vector.SEARCH_INDEXES:
+            size = conn.execute(
+                "SELECT pg_size_pretty(pg_relation_size(to_regclass(%s)))",
+                (vector.INDEX_NAMES[index],),
+            ).fetchone()[0]
+            if size is None:
+                print(f"{index:<10}{'missing':>12}")
+                continue
+            recalls = []
+            timings = []
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                found = _nearest_ids(conn, query, args.limit, index)
+                timings.append((time.perf_counter() - start) * 1000)
+                recalls.append(
+                    len(set(found).intersection(expected))
+                    / max(len(expected), 1)
+                )
+            conn.rollback()
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(
+                f"{index:<10}{size:>12}{statistics.mean(recalls):>12.3f}"
+                f"{statistics.median(timings):>10.2f}{p95:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Plan-regression check for the single-quote detail query
+(crud.get_quote_details_for_page_entry, behind /quotes/{quote_id}) against a
+large favorites table: its plan must not scan or aggregate
+user_quote_favorite as a whole, and the blocks it touches must not grow with
+the table. The query it replaced, which grouped all favorites by quote
+before picking one, is timed alongside for comparison.
+
+The synthetic users and favorites are inserted inside a transaction that is
+rolled back at the end, so the check can run against a development database
+(given the disk space for the favorites). Since they are never vacuumed,
+counting a quote's favorites visits one heap block per favorite at worst;
+the allowance is that plus --slack-buffers. Run from the backend directory:
+
+    python -m benchmarks.quote_detail --favorites 10000000
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import app.crud as crud
+import app.db as db
+import app.querytrace as querytrace
+
+# The detail query before it was rebuilt on crud._QUOTES_BY_IDS_SQL.
+LEGACY_SQL = """
+    SELECT q.id, q.text, a.id, a.name,
+           COALESCE(fc.favorite_count, 0),
+           EXISTS (SELECT 1 FROM user_quote_favorite f
+                   WHERE f.quote_id = q.id
+                     AND f.user_id = CAST(%(user_id)s AS INTEGER))
+    FROM quote q
+    JOIN author a ON q.author_id = a.id
+    LEFT JOIN (
+        SELECT quote_id, COUNT(*) AS favorite_count
+        FROM user_quote_favorite
+        GROUP BY quote_id
+    ) AS fc ON q.id = fc.quote_id
+    WHERE q.id = %(quote_id)s
+"""
+
+FAVORITES_PER_USER = 100
+
+
+def _populate(conn, favorites: int) -> tuple[int, int, int]:
+    """Adds users with FAVORITES_PER_USER favorites each; returns a
+    viewer's user id, the quote with the most favorites and their number."""
+    users = max(1, favorites // FAVORITES_PER_USER)
+    quotes = conn.execute("SELECT array_agg(id) FROM quote").fetchone()[0]
+    if not quotes or len(quotes) < FAVORITES_PER_USER:
+        raise SystemExit(
+            f"Needs at least {FAVORITES_PER_USER} quotes in the database."
+        )
+    first_user = conn.execute(
+        'SELECT COALESCE(MAX(id), 0) + 1 FROM "user"'
+    ).fetchone()[0]
+    conn.execute(
+        'INSERT INTO "user" (id, email, password_hash) '
+        "SELECT %s + g, 'favorites-bench-' || g || '@example.com', '-' "
+        "FROM generate_series(0, %s - 1) AS g",
+        (first_user, users),
+    )
+    # Spread over every quote, with a different mix per user.
+    conn.execute(
+        """
+        INSERT INTO user_quote_favorite (user_id, quote_id)
+        SELECT u, (%(quotes)s::integer[])[
+            1 + ((i * i + u * 7) %% cardinality(%(quotes)s::integer[]))]
+        FROM generate_series(%(first)s, %(first)s + %(users)s - 1) AS u,
+             generate_series(1, %(per_user)s) AS i
+        ON CONFLICT DO NOTHING
+        """,
+        {
+            "quotes": quotes,
+            "first": first_user,
+            "users": users,
+            "per_user": FAVORITES_PER_USER,
+        },
+    )
+    conn.execute("ANALYZE user_quote_favorite")
+    hottest, count = conn.execute(
+        "SELECT quote_id, COUNT(*) FROM user_quote_favorite "
+        "GROUP BY quote_id ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    return first_user, hottest, count
+
+
+def _plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _explain(conn, sql: str, params: dict) -> dict:
+    row = conn.execute(
+        "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params
+    ).fetchone()
+    plan = row[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def _check_plan(plan: dict, max_buffers: int) -> list[str]:
+    problems = []
+    for node in _plan_nodes(plan):
+        if (
+            node.get("Relation Name") == "user_quote_favorite"
+            and node["Node Type"] == "Seq Scan"
+        ):
+            problems.append("sequential scan of user_quote_favorite")
+        if node["Node Type"] == "Aggregate" and node.get("Strategy") in (
+            "Hashed",
+            "Sorted",
+        ):
+            problems.append(
+                f"grouped aggregate over {node['Actual Rows']} rows"
+            )
+    buffers = plan.get("Shared Hit Blocks", 0) + plan.get(
+        "Shared Read Blocks", 0
+    )
+    if buffers > max_buffers:
+        problems.append(f"{buffers} blocks touched (limit {max_buffers})")
+    return problems
+
+
+def _time(fn, iterations: int) -> float:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Quote detail query plan-regression check."
+    )
+    parser.add_argument("--favorites", type=int, default=10_000_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument(
+        "--slack-buffers",
+        type=int,
+        default=500,
+        help="Shared blocks the detail query may touch beyond one per favorite of the quote.",
+    )
+    args = parser.parse_args()
+
+    with db.get_connection() as conn:
+        try:
+            start = time.perf_counter()
+            viewer, hottest, favorite_count = _populate(conn, args.favorites)
+            print(
+                f"Inserted ~{args.favorites} favorites in "
+                f"{time.perf_counter() - start:.1f}s."
+            )
+            params = {"ids": [hottest], "user_id": viewer}
+            plan = _explain(conn, crud._QUOTES_BY_IDS_SQL, params)
+            problems = _check_plan(plan, favorite_count + args.slack_buffers)
+
+            with querytrace.trace() as t:
+                detail_ms = _time(
+                    lambda: crud.get_quote_details_for_page_entry(
+                        conn, hottest, viewer
+                    ),
+                    args.iterations,
+                )
+            t.assert_budget(max_queries=args.iterations)
+            legacy_ms = _time(
+                lambda: conn.execute(
+                    LEGACY_SQL, {"quote_id": hottest, "user_id": viewer}
+                ).fetchone(),
+                max(1, args.iterations // 10),
+            )
+            print(
+                f"Quote {hottest} ({favorite_count} favorites): detail query "
+                f"median {detail_ms:.2f} ms, "
+                f"previous query median {legacy_ms:.2f} ms"
+            )
+            for problem in problems:
+                print(f"  plan regression: {problem}")
+            if problems:
+                raise SystemExit(1)
+        finally:
+            conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare payload size and latency of quote list queries with and without the
+embedding column.
+
+Run from the backend directory against a populated database:
+
+    python -m benchmarks.quote_payload --iterations 50
+"""
+
+import argparse
+import statistics
+import time
+
+import app.crud as crud
+import app.db as db
+import app.model as model
+
+
+def _pick_author_with_most_quotes(conn) -> int:
+    row = conn.execute(
+        "SELECT author_id FROM quote GROUP BY author_id "
+        "ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    if row is None:
+        raise SystemExit("No quotes found; populate the database first.")
+    return row[0]
+
+
+def _measure(conn, author_id: int, include_embedding: bool, iterations: int):
+    timings = []
+    payload = b""
+    for _ in range(iterations):
+        start = time.perf_counter()
+        quotes = crud.get_quotes_by_author(
+            conn, author_id, include_embedding=include_embedding
+        )
+        if include_embedding:
+            response = model.QuoteCollection(quotes=quotes)
+        else:
+            response = model.QuoteSummaryCollection(quotes=quotes)
+        payload = response.model_dump_json().encode("utf-8")
+        timings.append((time.perf_counter() - start) * 1000)
+    return len(quotes), len(payload), timings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Quote list payload size/latency benchmark."
+    )
+    parser.add_argument("--author-id", type=int, default=None)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    with db.get_connection() as conn:
+        author_id = args.author_id or _pick_author_with_most_quotes(conn)
+        print(f"Author {author_id}, {args.iterations} iterations each.")
+        print(
+            f"{'variant':<18}{'quotes':>8}{'bytes':>12}{'bytes/quote':>14}"
+            f"{'p50 ms':>10}{'p95 ms':>10}"
+        )
+        for label, include_embedding in (
+            ("with embedding", True),
+            ("lean projection", False),
+        ):
+            n, size, timings = _measure(
+                conn, author_id, include_embedding, args.iterations
+            )
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(
+                f"{label:<18}{n:>8}{size:>12}{size // max(n, 1):>14}"
+                f"{statistics.median(timings):>10.2f}{p95:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Microbenchmark of list response serialization: the cost of turning a page of
+database rows into a JSON body, through FastAPI's default path (validated
+models, validated again against the response_model, encoded with json) and
+through responses.FastJSONResponse (unvalidated models encoded by orjson).
+
+Needs no database; rows are synthetic but shaped like _PAGE_ENTRY_COLUMNS:
+
+    python -m benchmarks.serialization --sizes 9 50 100 200
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+import app.crud as crud
+import app.model as model
+import app.responses as responses
+from benchmarks import synthetic
+
+_ADAPTER = TypeAdapter(model.CollectionQuotesPage)
+
+
+def _rows(n: int) -> list[tuple]:
+    words = synthetic.WORDS
+    return [
+        (
+            i,
+            f"On {words[i % len(words)]} and {words[(i * 7) % len(words)]}, "
+            f"a synthetic quote of about the usual length ({i}).",
+            1 + i % 97,
+            f"Synthetic Author {1 + i % 97}",
+            [words[(i * k) % len(words)] for k in (3, 5, 11)],
+            i % 13,
+            i % 4 == 0,
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def default_path(rows: list[tuple]) -> bytes:
+    """What the endpoints did before: validate, re-validate, json.dumps."""
+    quotes = [
+        model.QuotePageEntry(
+            id=row[0],
+            text=row[1],
+            authorId=row[2],
+            authorName=row[3],
+            tags=row[4],
+            favoriteCount=row[5],
+            isFavorited=row[6],
+        )
+        for row in rows
+    ]
+    content = model.CollectionQuotesPage(quotes=quotes, nextCursor=None)
+    # FastAPI's serialize_response: dump, validate against response_model,
+    # serialize to JSON-compatible values, then JSONResponse.render.
+    value = _ADAPTER.validate_python(content.model_dump())
+    return JSONResponse(_ADAPTER.dump_python(value, mode="json")).body
+
+
+def fast_path(rows: list[tuple]) -> bytes:
+    quotes = [crud._map_page_entry_row(row) for row in rows]
+    return responses.FastJSONResponse(
+        model.CollectionQuotesPage.model_construct(
+            quotes=quotes, nextCursor=None
+        )
+    ).body
+
+
+def _time(fn, rows, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="List response serialization microbenchmark."
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[9, 50, 100, 200]
+    )
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8}{'default us':>13}{'fast us':>10}{'speedup':>10}")
+    for size in args.sizes:
+        rows = _rows(size)
+        # Both paths must produce the same document.
+        if json.loads(default_path(rows)) != json.loads(fast_path(rows)):
+            raise SystemExit(f"Responses differ for {size} entries.")
+        default = statistics.median(_time(default_path, rows, args.repeat))
+        fast = statistics.median(_time(fast_path, rows, args.repeat))
+        print(f"{size:>8}{default:>13.1f}{fast:>10.1f}{default / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
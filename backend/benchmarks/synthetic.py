@@ -0,0 +1,215 @@
+"""
+Seed a database with synthetic authors, users, tags, quotes, collections and
+favorites at a configurable scale, for the load benchmark.
+
+The rows are generated by Postgres itself (generate_series), so seeding
+a million quotes takes minutes rather than hours. Embeddings are random
+vectors: searches return meaningless neighbours but do the same work as with
+real ones. Run from the backend directory against an empty, initialized
+database:
+
+    POSTGRES_DB=quoteweave_bench python -m benchmarks.synthetic --quotes 100000
+"""
+
+import argparse
+import time
+
+import app.db as db
+import app.embedding as embedding
+import app.security as security
+
+WORDS = [
+    "love",
+    "life",
+    "wisdom",
+    "hope",
+    "friendship",
+    "courage",
+    "time",
+    "happiness",
+    "truth",
+    "death",
+    "art",
+    "books",
+    "nature",
+    "faith",
+    "humor",
+    "success",
+    "dreams",
+    "change",
+    "poetry",
+    "freedom",
+]
+
+# Every synthetic user logs in as bench_user_<n> with this password.
+USER_PASSWORD = "Bench@123"
+
+QUOTES_PER_COLLECTION = 20
+FAVORITES_PER_USER = 25
+
+# Quotes are inserted in chunks so that a large seed commits progressively.
+CHUNK_SIZE = 100_000
+
+
+def user_name(n: int) -> str:
+    return f"bench_user_{n}"
+
+
+def _insert_quotes(conn, start: int, stop: int, n_authors: int) -> None:
+    conn.execute(
+        """
+        INSERT INTO quote (id, author_id, text, is_public, embedding,
+                           embedding_model)
+        SELECT
+            g,
+            1 + g %% %(n_authors)s,
+            'On ' || (%(words)s::text[])[1 + (g * 7) %% %(n_words)s] ||
+                ' and ' || (%(words)s::text[])[1 + (g * 11) %% %(n_words)s] ||
+                ', ' || (%(words)s::text[])[1 + (g * 13) %% %(n_words)s] ||
+                ' is the measure of ' ||
+                (%(words)s::text[])[1 + (g * 17) %% %(n_words)s] ||
+                ' (synthetic quote ' || g || ').',
+            g %% 10 <> 0,
+            (SELECT array_agg((random() - 0.5)::real)::vector
+             FROM generate_series(1, %(dim)s) WHERE g > 0),
+            %(model)s
+        FROM generate_series(%(start)s, %(stop)s - 1) AS g
+        """,
+        {
+            "n_authors": n_authors,
+            "words": WORDS,
+            "n_words": len(WORDS),
+            "dim": embedding.EMBEDDING_MODELS[embedding.EMBEDDING_MODEL_NAME],
+            "model": embedding.EMBEDDING_MODEL_NAME,
+            "start": start,
+            "stop": stop,
+        },
+    )
+
+
+def seed(conn, quotes: int, users: int) -> dict[str, int]:
+    """Fill an empty database; returns the number of rows per entity."""
+    if conn.execute("SELECT EXISTS (SELECT 1 FROM quote)").fetchone()[0]:
+        raise SystemExit("The database already has quotes; seed an empty one.")
+
+    counts = {
+        "authors": max(100, quotes // 20),
+        "users": users,
+        "tags": max(len(WORDS), quotes // 200),
+        "quotes": quotes,
+        "collections": max(1, quotes // 50),
+    }
+    n_authors = counts["authors"]
+    params = {**counts, "words": WORDS, "n_words": len(WORDS)}
+
+    # Building the HNSW index once at the end is far faster than
+    # maintaining it on every insert.
+    conn.execute("DROP INDEX IF EXISTS idx_quote_embedding_hnsw")
+
+    conn.execute(
+        "INSERT INTO author (id, name) "
+        "SELECT g, 'Synthetic Author ' || g "
+        "FROM generate_series(1, %(authors)s) AS g",
+        params,
+    )
+    # Users get their own authors, after the quote authors.
+    conn.execute(
+        "INSERT INTO author (id, name) "
+        "SELECT %(authors)s + g, 'bench_user_' || g "
+        "FROM generate_series(1, %(users)s) AS g",
+        params,
+    )
+    conn.execute(
+        'INSERT INTO "user" (id, author_id, email, password_hash) '
+        "SELECT g, %(authors)s + g, 'bench_user_' || g || '@example.com', "
+        "%(password_hash)s FROM generate_series(1, %(users)s) AS g",
+        {**params, "password_hash": security.hash_password(USER_PASSWORD)},
+    )
+    conn.execute(
+        "INSERT INTO tag (id, name) "
+        "SELECT g, (%(words)s::text[])[1 + g %% %(n_words)s] || '-' || g "
+        "FROM generate_series(1, %(tags)s) AS g",
+        params,
+    )
+    conn.commit()
+
+    for start in range(1, quotes + 1, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, quotes + 1)
+        _insert_quotes(conn, start, stop, n_authors)
+        conn.commit()
+        print(f"  quotes {start}..{stop - 1}")
+
+    conn.execute(
+        """
+        INSERT INTO taggedas (quote_id, tag_id)
+        SELECT q, 1 + (q * k) %% %(tags)s
+        FROM generate_series(1, %(quotes)s) AS q,
+             (VALUES (7), (13), (29)) AS m(k)  -- three tags per quote
+        ON CONFLICT DO NOTHING
+        """,
+        params,
+    )
+    conn.execute(
+        """
+        INSERT INTO collection (id, author_id, name, description, is_public)
+        SELECT g, %(authors)s + 1 + g %% %(users)s,
+               'Collection ' || g || ' about ' ||
+                   (%(words)s::text[])[1 + (g * 7) %% %(n_words)s],
+               'Synthetic collection ' || g,
+               g %% 5 <> 0
+        FROM generate_series(1, %(collections)s) AS g
+        """,
+        params,
+    )
+    conn.execute(
+        """
+        INSERT INTO collectioncontains (collection_id, quote_id)
+        SELECT c, 1 + (c * 31 + i * 997) %% %(quotes)s
+        FROM generate_series(1, %(collections)s) AS c,
+             generate_series(1, %(per_collection)s) AS i
+        ON CONFLICT DO NOTHING
+        """,
+        {**params, "per_collection": QUOTES_PER_COLLECTION},
+    )
+    conn.execute(
+        """
+        INSERT INTO user_quote_favorite (user_id, quote_id)
+        SELECT u, 1 + (u * 53 + i * 7919) %% %(quotes)s
+        FROM generate_series(1, %(users)s) AS u,
+             generate_series(1, %(per_user)s) AS i
+        ON CONFLICT DO NOTHING
+        """,
+        {**params, "per_user": FAVORITES_PER_USER},
+    )
+    for table in ("author", "tag", '"user"', "quote", "collection"):
+        conn.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"(SELECT MAX(id) FROM {table}))"
+        )
+    conn.commit()
+
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_quote_embedding_hnsw "
+        "ON quote USING hnsw (embedding vector_cosine_ops)"
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Seed an empty database with synthetic data."
+    )
+    parser.add_argument("--quotes", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+
+    with db.get_connection() as conn:
+        start = time.perf_counter()
+        counts = seed(conn, args.quotes, args.users)
+        print(f"Seeded {counts} in {time.perf_counter() - start:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,18 @@
 import argparse
 import os
+import sys
 
+import app.cache as cache
 import app.crud as crud
 import app.db as db
+import app.dedup as dedup
 import app.embedding as embedding  # For embedding generation
+import app.export as export
 import app.model as model
 import app.populate as populate
 import app.security as security
 import app.tagging as tagging  # For ML-based tagging
+import app.vector as vector
 from app.data.populate_db import generate_sql_from_csv  # New import
 
 # For backfill, load models once
@@ -32,6 +37,7 @@ def _ensure_models_loaded_for_cli_tasks():
 
 def backfill_quotes_embeddings_and_tags(conn, batch_size: int = 32):
     """Iterates through existing quotes, generates embeddings (in batches) and tags, and updates the DB."""
+    crud.sync_embedding_model(conn, wait=True)
     _ensure_models_loaded_for_cli_tasks()
     print(
         f"Starting backfill for quote embeddings and tags (batch size: {batch_size})..."
@@ -84,8 +90,12 @@ def backfill_quotes_embeddings_and_tags(conn, batch_size: int = 32):
 
                     try:
                         cur.execute(
-                            "UPDATE quote SET embedding = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
-                            (quote_embedding_vector, quote_id),
+                            "UPDATE quote SET embedding = %s, embedding_model = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                            (
+                                quote_embedding_vector,
+                                embedding.EMBEDDING_MODEL_NAME,
+                                quote_id,
+                            ),
                         )
 
                         input_for_tagger = tagging.create_input_text(
@@ -110,6 +120,9 @@ def backfill_quotes_embeddings_and_tags(conn, batch_size: int = 32):
                                     f"    Skipping tag '{tag_name}' for quote ID {quote_id} due to: {ve_tag}"
                                 )
 
+                        crud.refresh_quote_neighbors(
+                            conn, quote_id, embedding_changed=True
+                        )
                         conn.commit()
                         quotes_processed += 1
                     except Exception as e_quote:
@@ -125,11 +138,286 @@ def backfill_quotes_embeddings_and_tags(conn, batch_size: int = 32):
                 )
                 quotes_failed += len(batch_data)  # Mark all in batch as failed
 
+    cache.publish(conn, (cache.QUOTE, cache.TAG))
     print(
         f"Backfill complete. Processed: {quotes_processed}, Failed: {quotes_failed}."
     )
 
 
+def dedup_existing_quotes(
+    conn,
+    threshold: float,
+    action: str = "flag",
+    dry_run: bool = False,
+    batch_size: int = 1000,
+):
+    """
+    Finds near-duplicate quotes in the table and flags or merges them. Only
+    quotes of the same author are merged; duplicates across authors are
+    flagged instead, so that no one's quote is deleted or merged into a
+    quote of someone else.
+    """
+    print(
+        f"Scanning quotes for near-duplicates (threshold: {threshold}, action: {action}{', dry run' if dry_run else ''})..."
+    )
+
+    def rank(candidate: tuple[int, float, bool]):
+        # When merging, a duplicate by the same author beats a closer one by
+        # another author.
+        _, similarity, same_owner = candidate
+        return (action == "merge" and same_owner, similarity)
+
+    canonical: dict[int, int] = {}
+    found = 0
+    after_id = 0
+    while True:
+        pairs, last_id = crud.find_duplicate_pairs(
+            conn, threshold, after_id=after_id, batch_size=batch_size
+        )
+        if last_id is None:
+            break
+
+        best: dict[int, tuple[int, float, bool]] = {}
+        for quote_id, older_id, similarity, same_owner in sorted(pairs):
+            candidate = (older_id, similarity, same_owner)
+            if quote_id not in best or rank(candidate) > rank(best[quote_id]):
+                best[quote_id] = candidate
+
+        for quote_id, (older_id, similarity, same_owner) in sorted(
+            best.items()
+        ):
+            # Chains (c duplicates b duplicates a) all resolve to a. Merged
+            # quotes share their target's author, so same_owner holds for
+            # the target too.
+            target = canonical.get(older_id, older_id)
+            merge = action == "merge" and same_owner
+            if merge or action != "merge":
+                canonical[quote_id] = target
+            found += 1
+            print(
+                f"  Quote {quote_id} duplicates quote {target} (similarity {similarity:.3f})"
+            )
+            if action == "merge" and not same_owner:
+                print("    Different authors: flagged instead of merged.")
+            if dry_run:
+                continue
+            if merge:
+                crud.merge_quote_into(conn, quote_id, target)
+            else:
+                crud.record_quote_duplicate(conn, quote_id, target, similarity)
+        if dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+            if action == "merge":
+                # merge_quote_into writes raw SQL; tell the API workers.
+                cache.publish(
+                    conn,
+                    (cache.QUOTE, cache.TAG, cache.COLLECTION, cache.FAVORITE),
+                )
+        after_id = last_id
+
+    print(f"Dedup complete. Near-duplicates found: {found}.")
+
+
+def print_embedding_index_sizes(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_size_pretty(pg_table_size('quote'))")
+        print(f"  quote table (incl. TOAST): {cur.fetchone()[0]}")
+        for index_type, index_name in vector.INDEX_NAMES.items():
+            cur.execute(
+                "SELECT pg_size_pretty(pg_relation_size(to_regclass(%s)))",
+                (index_name,),
+            )
+            size = cur.fetchone()[0]
+            print(f"  {index_type:<8} index {index_name}: {size or 'missing'}")
+
+
+def quantize_embeddings(conn, index_type: str, drop: bool = False):
+    """Creates (or drops) a compact HNSW index for first-pass search."""
+    index_name = vector.INDEX_NAMES[index_type]
+    row = conn.execute(
+        "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+    ).fetchone()
+    version = tuple(int(part) for part in row[0].split(".")[:2]) if row else ()
+    if version < (0, 7):
+        print(
+            f"Error: halfvec and bit indexes need pgvector 0.7 or newer, found {row[0] if row else 'none'}."
+        )
+        return 1
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction.
+    conn.commit()
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        if drop:
+            print(f"Dropping index {index_name}...")
+            cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+        else:
+            print(
+                f"Building {index_type} index {index_name}, this can take a while..."
+            )
+            cur.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} "
+                f"ON {vector.INDEX_TARGETS[index_type]}"
+            )
+    print("Embedding index sizes:")
+    print_embedding_index_sizes(conn)
+    if not drop:
+        print(
+            f"Set VECTOR_SEARCH_INDEX={index_type} for the backend to search with it."
+        )
+
+
+def _fill_shadow_embeddings(
+    conn, model, model_name: str, batch_size: int, after_id: int = -1
+) -> int:
+    """Embeds quotes whose shadow vector is missing. Returns the count."""
+    filled = 0
+    with conn.cursor() as cur:
+        while True:
+            cur.execute(
+                "SELECT id, text FROM quote "
+                "WHERE embedding_next IS NULL AND id > %s "
+                "ORDER BY id LIMIT %s",
+                (after_id, batch_size),
+            )
+            rows = cur.fetchall()
+            if not rows:
+                return filled
+            vectors = embedding.generate_embeddings_batch(
+                [row[1] for row in rows], model=model
+            )
+            if len(vectors) != len(rows):
+                raise RuntimeError(
+                    f"Embedding failed for the batch starting at quote {rows[0][0]}."
+                )
+            # The text guard skips quotes edited meanwhile; their shadow
+            # vector stays NULL and is filled during the switchover.
+            cur.executemany(
+                "UPDATE quote SET embedding_next = %s, embedding_next_model = %s "
+                "WHERE id = %s AND text = %s",
+                [
+                    (vec, model_name, quote_id, text)
+                    for (quote_id, text), vec in zip(rows, vectors)
+                ],
+            )
+            conn.commit()
+            filled += len(rows)
+            after_id = rows[-1][0]
+            print(f"  Re-embedded {filled} quotes (up to id {after_id})...")
+
+
+def reembed_quotes(
+    conn, model_name: str, batch_size: int = 64, switch: bool = False
+):
+    """
+    Re-embeds every quote with `model_name` into the embedding_next shadow
+    column and indexes it. With `switch`, atomically makes the shadow
+    column the live one.
+    """
+    if model_name not in embedding.EMBEDDING_MODELS:
+        print(
+            f"Error: unknown embedding model '{model_name}'. Registered models: {', '.join(embedding.EMBEDDING_MODELS)}"
+        )
+        return 1
+    column_dim = conn.execute(
+        "SELECT atttypmod FROM pg_attribute "
+        "WHERE attrelid = 'quote'::regclass AND attname = 'embedding_next'"
+    ).fetchone()[0]
+    if embedding.EMBEDDING_MODELS[model_name] != column_dim:
+        print(
+            f"Error: {model_name} produces {embedding.EMBEDDING_MODELS[model_name]}-dimensional vectors, the embedding columns hold {column_dim}."
+        )
+        return 1
+
+    print(f"CLI: Loading embedding model {model_name}...")
+    model = embedding.create_embedding_model(model_name)
+
+    # Shadow vectors of an earlier, abandoned migration are not reusable.
+    conn.execute(
+        "UPDATE quote SET embedding_next = NULL, embedding_next_model = NULL "
+        "WHERE embedding_next_model IS DISTINCT FROM %s "
+        "AND embedding_next IS NOT NULL",
+        (model_name,),
+    )
+    conn.commit()
+
+    print(
+        f"Re-embedding quotes into the shadow column (batch size: {batch_size})..."
+    )
+    filled = _fill_shadow_embeddings(conn, model, model_name, batch_size)
+    print(f"Shadow column filled for {filled} quotes.")
+
+    print("Building the shadow HNSW index...")
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    conn.commit()
+    conn.autocommit = True
+    conn.execute(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_quote_embedding_next_hnsw "
+        "ON quote USING hnsw (embedding_next vector_cosine_ops)"
+    )
+    conn.autocommit = False
+
+    if not switch:
+        print(
+            f"Shadow embeddings ready. Run `python cli.py reembed --model {model_name} --switch` to switch over."
+        )
+        return
+
+    print("Switching over (writes to quote are blocked meanwhile)...")
+    with conn.cursor() as cur:
+        cur.execute("LOCK TABLE quote IN SHARE ROW EXCLUSIVE MODE")
+        late = 0
+        cur.execute(
+            "SELECT id, text FROM quote WHERE embedding_next IS NULL ORDER BY id"
+        )
+        rows = cur.fetchall()
+        if rows:
+            vectors = embedding.generate_embeddings_batch(
+                [row[1] for row in rows], model=model
+            )
+            if len(vectors) != len(rows):
+                conn.rollback()
+                print(
+                    "Error: could not embed quotes written during the migration."
+                )
+                return 1
+            cur.executemany(
+                "UPDATE quote SET embedding_next = %s, embedding_next_model = %s "
+                "WHERE id = %s",
+                [(vec, model_name, row[0]) for row, vec in zip(rows, vectors)],
+            )
+            late = len(rows)
+        for statement in (
+            "ALTER TABLE quote RENAME COLUMN embedding TO embedding_previous",
+            "ALTER TABLE quote RENAME COLUMN embedding_model TO embedding_previous_model",
+            "ALTER TABLE quote RENAME COLUMN embedding_next TO embedding",
+            "ALTER TABLE quote RENAME COLUMN embedding_next_model TO embedding_model",
+            # Also drops the indexes on the previous vectors.
+            "ALTER TABLE quote DROP COLUMN embedding_previous, DROP COLUMN embedding_previous_model",
+            f"ALTER TABLE quote ADD COLUMN embedding_next vector({column_dim}), ADD COLUMN embedding_next_model text",
+            "ALTER INDEX idx_quote_embedding_next_hnsw RENAME TO idx_quote_embedding_hnsw",
+        ):
+            cur.execute(statement)
+        # Running backends follow this row (crud.sync_embedding_model), so
+        # they switch models with the vectors, without a restart.
+        cur.execute(
+            "INSERT INTO app_setting (name, value) VALUES (%s, %s) "
+            "ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value",
+            (embedding.EMBEDDING_MODEL_SETTING, model_name),
+        )
+    conn.commit()
+    print(
+        f"Switched to {model_name} ({late} quotes embedded during the switch)."
+    )
+
+    count = crud.rebuild_quote_neighbors(conn)
+    print(f"Rebuilt similar-quote lists for {count} quotes.")
+    print(
+        f"Running backends start loading {model_name} in the background on their next semantic request, and keep using the previous model until it is ready. Rebuild compact indexes with `python cli.py quantize-embeddings` if you used them."
+    )
+
+
 def main():
     parser = argparse.ArgumentParser(description="Database CLI")
     subparsers = parser.add_subparsers(
@@ -162,6 +450,105 @@ def main():
         help="Number of quotes to process in each embedding batch (default: 32)",
     )
 
+    quantize_parser = subparsers.add_parser(
+        "quantize-embeddings",
+        help="Build a compact (halfvec or binary) HNSW index on quote embeddings for first-pass search.",
+    )
+    quantize_parser.add_argument(
+        "--type",
+        choices=["halfvec", "bit"],
+        required=True,
+        help="'halfvec' stores 16-bit floats; 'bit' stores one bit per dimension and relies on re-ranking.",
+    )
+    quantize_parser.add_argument(
+        "--drop",
+        action="store_true",
+        help="Drop the index instead of creating it.",
+    )
+
+    reembed_parser = subparsers.add_parser(
+        "reembed",
+        help="Re-embed all quotes with another registered model in a shadow column, optionally switching over.",
+    )
+    reembed_parser.add_argument(
+        "--model",
+        required=True,
+        help=f"Registered embedding model ({', '.join(embedding.EMBEDDING_MODELS)}).",
+    )
+    reembed_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=64,
+        help="Number of quotes to embed per batch (default: 64)",
+    )
+    reembed_parser.add_argument(
+        "--switch",
+        action="store_true",
+        help="After filling the shadow column, atomically make it the live embedding column.",
+    )
+
+    subparsers.add_parser(
+        "rebuild-neighbors",
+        help="Recompute the precomputed similar-quote lists of all quotes.",
+    )
+
+    subparsers.add_parser(
+        "reconcile-collection-counts",
+        help="Recompute the stored quote count of every collection.",
+    )
+
+    export_parser = subparsers.add_parser(
+        "export",
+        help="Stream public quotes, or an author's collections, as NDJSON or CSV.",
+    )
+    export_parser.add_argument(
+        "what", choices=["quotes", "collections"], help="What to export."
+    )
+    export_parser.add_argument(
+        "--format", choices=export.FORMATS, default="ndjson"
+    )
+    export_parser.add_argument(
+        "--include-embeddings",
+        action="store_true",
+        help="Also export each quote's embedding vector (quotes only).",
+    )
+    export_parser.add_argument(
+        "--author-id",
+        type=int,
+        help="Author whose collections to export (required for collections).",
+    )
+    export_parser.add_argument(
+        "--output", help="File to write to (default: standard output)."
+    )
+
+    dedup_parser = subparsers.add_parser(
+        "dedup-quotes",
+        help="Find near-duplicate quotes in the database and flag or merge them.",
+    )
+    dedup_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=dedup.DUPLICATE_SIMILARITY_THRESHOLD,
+        help=f"Cosine similarity at which quotes count as duplicates (default: {dedup.DUPLICATE_SIMILARITY_THRESHOLD})",
+    )
+    dedup_parser.add_argument(
+        "--action",
+        choices=["flag", "merge"],
+        default="flag",
+        help="'flag' records pairs in quote_duplicate; 'merge' moves tags, collections and favorites to the older quote and deletes the duplicate when both have the same author, and flags the pair otherwise.",
+    )
+    dedup_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report duplicates, change nothing.",
+    )
+    dedup_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Number of quotes to scan per transaction (default: 1000)",
+    )
+
     # New parser for populate-full
     populate_full_parser = subparsers.add_parser(
         "populate-full",
@@ -288,6 +675,9 @@ def main():
     if args.command == "init":
         with db.get_connection() as conn:
             populate.init_db(conn)
+            # Also changes every ETag after a deploy, whose responses may
+            # differ for the same data.
+            cache.publish(conn, cache.ENTITIES)
         print("Database initialized.")
     elif args.command == "populate":
         data_file_path = args.file
@@ -304,6 +694,7 @@ def main():
             populate.populate_if_necessary(
                 conn, data_file_path, args.n_entries
             )
+            cache.publish(conn, cache.ENTITIES)
     elif args.command == "populate-full":
         csv_relative_path = args.csv_file
         if not csv_relative_path.startswith("data/"):
@@ -369,6 +760,7 @@ def main():
                     with conn.cursor() as cur:
                         cur.execute(sql_commands)
                     conn.commit()
+                    cache.publish(conn, cache.ENTITIES)
                     print(
                         f"CLI: Successfully executed generated SQL from {sql_output_path}."
                     )
@@ -379,6 +771,60 @@ def main():
                 )
                 return 1
 
+    elif args.command == "dedup-quotes":
+        with db.get_connection() as conn:
+            dedup_existing_quotes(
+                conn,
+                threshold=args.threshold,
+                action=args.action,
+                dry_run=args.dry_run,
+                batch_size=args.batch_size,
+            )
+        return
+    elif args.command == "quantize-embeddings":
+        with db.get_connection() as conn:
+            return quantize_embeddings(conn, args.type, drop=args.drop)
+    elif args.command == "reembed":
+        with db.get_connection() as conn:
+            return reembed_quotes(
+                conn,
+                args.model,
+                batch_size=args.batch_size,
+                switch=args.switch,
+            )
+    elif args.command == "rebuild-neighbors":
+        with db.get_connection() as conn:
+            count = crud.rebuild_quote_neighbors(conn)
+        print(f"Rebuilt similar-quote lists for {count} quotes.")
+        return
+    elif args.command == "reconcile-collection-counts":
+        with db.get_connection() as conn:
+            fixed = crud.reconcile_collection_quote_counts(conn)
+        print(f"Corrected the quote count of {fixed} collections.")
+        return
+    elif args.command == "export":
+        if args.what == "collections" and args.author_id is None:
+            print("Error: --author-id is required to export collections.")
+            return 1
+        output = open(args.output, "wb") if args.output else sys.stdout.buffer
+        try:
+            with db.get_connection() as conn:
+                if args.what == "quotes":
+                    chunks = export.export_public_quotes(
+                        conn,
+                        fmt=args.format,
+                        include_embedding=args.include_embeddings,
+                    )
+                else:
+                    chunks = export.export_author_collections(
+                        conn, args.author_id, fmt=args.format
+                    )
+                for chunk in chunks:
+                    output.write(chunk)
+        finally:
+            if args.output:
+                output.close()
+        return
     elif args.command == "backfill-quotes":
         with db.get_connection() as conn:
             backfill_quotes_embeddings_and_tags(
@@ -431,10 +877,13 @@ def main():
                             text=args.text,
                             is_public=args.is_public,
                         )
-                        new_quote = crud.create_quote(
-                            conn, query, author_name=author.name
-                        )
-                        print(f"Created quote: {new_quote}")
+                        try:
+                            new_quote = crud.create_quote(
+                                conn, query, author_name=author.name
+                            )
+                            print(f"Created quote: {new_quote}")
+                        except dedup.DuplicateQuoteError as e:
+                            print(f"Error creating quote: {e}")
                     case "collection":
                         query = model.CreateCollectionQuery(
                             author_id=args.author_id,
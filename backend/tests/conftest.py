@@ -0,0 +1,130 @@
+"""
+Fixtures for tests against a real Postgres with pgvector and pg_trgm,
+reached through the usual POSTGRES_* settings (see app/db.py). Each session
+creates a scratch database, initializes it from schema.postgresql and drops
+it afterwards; tests that need it are skipped when no server is reachable.
+
+Requests go through the app without its lifespan, so no model is loaded
+and no invalidation listener is started. Quotes are inserted without
+embeddings.
+"""
+
+import uuid
+from dataclasses import dataclass
+from datetime import timedelta
+
+import psycopg
+import pytest
+from fastapi.testclient import TestClient
+
+import app.crud as crud
+import app.db as db
+import app.main as main
+import app.model as model
+import app.populate as populate
+import app.security as security
+
+
+def _admin_connection():
+    return psycopg.connect(
+        host=db.settings.host,
+        port=db.settings.port,
+        dbname="postgres",
+        user=db.settings.user,
+        password=db.settings.password,
+        autocommit=True,
+        connect_timeout=5,
+    )
+
+
+@pytest.fixture(scope="session")
+def database():
+    name = f"quoteweave_test_{uuid.uuid4().hex[:8]}"
+    try:
+        with _admin_connection() as admin:
+            admin.execute(f'CREATE DATABASE "{name}"')
+    except psycopg.OperationalError as e:
+        pytest.skip(f"Postgres is not reachable: {e}")
+    dbname = db.settings.dbname
+    db.settings.dbname = name
+    try:
+        with db.get_connection() as conn:
+            populate.init_db(conn)
+        yield name
+    finally:
+        db.settings.dbname = dbname
+        with _admin_connection() as admin:
+            admin.execute(f'DROP DATABASE "{name}" WITH (FORCE)')
+
+
+@pytest.fixture
+def conn(database):
+    with db.get_connection() as conn:
+        yield conn
+
+
+@pytest.fixture
+def client(database):
+    return TestClient(main.app)
+
+
+@dataclass
+class User:
+    id: int
+    author_id: int
+    headers: dict[str, str]
+
+
+@pytest.fixture
+def make_user(conn):
+    def make() -> User:
+        name = f"user_{uuid.uuid4().hex[:12]}"
+        created = crud.create_user(
+            conn,
+            model.CreateUserQuery(
+                username=name,
+                email=f"{name}@example.com",
+                password="Secret123!",
+            ),
+        )
+        author_id = conn.execute(
+            'SELECT author_id FROM "user" WHERE id = %s', (created.id,)
+        ).fetchone()[0]
+        token = security.create_access_token(
+            data={"sub": name}, expires_delta=timedelta(minutes=5)
+        )
+        return User(
+            created.id, author_id, {"Authorization": f"Bearer {token}"}
+        )
+
+    return make
+
+
+@pytest.fixture
+def make_quote(conn):
+    def make(
+        author_id: int, is_public: bool = True, text: str | None = None
+    ) -> int:
+        quote_id = conn.execute(
+            "INSERT INTO quote (author_id, text, is_public) "
+            "VALUES (%s, %s, %s) RETURNING id",
+            (author_id, text or f"Test quote {uuid.uuid4().hex}", is_public),
+        ).fetchone()[0]
+        conn.commit()
+        return quote_id
+
+    return make
+
+
+@pytest.fixture
+def make_collection(conn):
+    def make(author_id: int, is_public: bool = True) -> int:
+        collection_id = conn.execute(
+            "INSERT INTO collection (author_id, name, description, is_public) "
+            "VALUES (%s, %s, '', %s) RETURNING id",
+            (author_id, f"Collection {uuid.uuid4().hex[:8]}", is_public),
+        ).fetchone()[0]
+        conn.commit()
+        return collection_id
+
+    return make
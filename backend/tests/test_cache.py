@@ -0,0 +1,55 @@
+import app.cache as cache
+import app.crud as crud
+import app.model as model
+
+
+def _tag_version(conn) -> int:
+    row = conn.execute(
+        "SELECT version FROM cache_version WHERE entity = %s", (cache.TAG,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def test_etag_changes_after_a_write(client, conn, make_user, make_quote):
+    user = make_user()
+    quote_id = make_quote(user.author_id)
+    etag = client.get("/tags/all").headers["etag"]
+    unchanged = client.get("/tags/all", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+
+    crud.update_quote_with_client_payload(
+        conn,
+        quote_id,
+        model.UpdateQuoteClientPayload(tags=["etagtest"]),
+        user.author_id,
+    )
+    second = client.get("/tags/all", headers={"If-None-Match": etag})
+
+    assert second.status_code == 200
+    assert second.headers["etag"] != etag
+    assert "etagtest" in second.text
+
+
+def test_write_publishes_once_for_all_its_tags(conn, make_user, make_quote):
+    user = make_user()
+    quote_id = make_quote(user.author_id)
+    before = _tag_version(conn)
+
+    crud.update_quote_with_client_payload(
+        conn,
+        quote_id,
+        model.UpdateQuoteClientPayload(tags=["one", "two", "three"]),
+        user.author_id,
+    )
+
+    assert _tag_version(conn) == before + 1
+
+
+def test_mirror_reloaded_from_table_gives_the_same_etag(client, conn):
+    etag = client.get("/authors").headers["etag"]
+    with cache._versions_lock:
+        cache._versions.clear()
+
+    cache.load_versions(conn)
+
+    assert client.get("/authors").headers["etag"] == etag
@@ -0,0 +1,167 @@
+import app.crud as crud
+
+
+def _collection_quote_ids(conn, collection_id: int) -> list[int]:
+    rows = conn.execute(
+        "SELECT quote_id FROM collectioncontains "
+        "WHERE collection_id = %s ORDER BY quote_id",
+        (collection_id,),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def test_bulk_add_inserts_rows(
+    client, conn, make_user, make_quote, make_collection
+):
+    user = make_user()
+    collection_id = make_collection(user.author_id)
+    quote_ids = sorted(make_quote(user.author_id) for _ in range(3))
+
+    response = client.post(
+        f"/collections/{collection_id}/quotes/bulk-add",
+        json={"quote_ids": quote_ids},
+        headers=user.headers,
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "collection_id": collection_id,
+        "quote_ids": quote_ids,
+    }
+    assert _collection_quote_ids(conn, collection_id) == quote_ids
+
+
+def test_bulk_remove_deletes_rows(
+    client, conn, make_user, make_quote, make_collection
+):
+    user = make_user()
+    collection_id = make_collection(user.author_id)
+    quote_ids = sorted(make_quote(user.author_id) for _ in range(3))
+    client.post(
+        f"/collections/{collection_id}/quotes/bulk-add",
+        json={"quote_ids": quote_ids},
+        headers=user.headers,
+    )
+
+    response = client.post(
+        f"/collections/{collection_id}/quotes/bulk-remove",
+        json={"quote_ids": quote_ids[:2]},
+        headers=user.headers,
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["quote_ids"] == quote_ids[:2]
+    assert _collection_quote_ids(conn, collection_id) == quote_ids[2:]
+
+
+def test_bulk_add_requires_collection_owner(
+    client, make_user, make_quote, make_collection
+):
+    owner, other = make_user(), make_user()
+    collection_id = make_collection(owner.author_id)
+
+    response = client.post(
+        f"/collections/{collection_id}/quotes/bulk-add",
+        json={"quote_ids": [make_quote(other.author_id)]},
+        headers=other.headers,
+    )
+
+    assert response.status_code == 403
+
+
+def test_cannot_add_private_quotes_of_other_users(
+    client, conn, make_user, make_quote, make_collection
+):
+    owner, other = make_user(), make_user()
+    collection_id = make_collection(owner.author_id)
+    public_id = make_quote(other.author_id)
+    private_id = make_quote(other.author_id, is_public=False)
+
+    single = client.post(
+        f"/collections/{collection_id}/quotes/{private_id}",
+        headers=owner.headers,
+    )
+    bulk = client.post(
+        f"/collections/{collection_id}/quotes/bulk-add",
+        json={"quote_ids": [public_id, private_id]},
+        headers=owner.headers,
+    )
+
+    assert single.status_code == 404
+    assert bulk.json()["quote_ids"] == [public_id]
+    assert _collection_quote_ids(conn, collection_id) == [public_id]
+
+
+def test_collection_page_shows_private_quotes_to_their_owner_only(
+    client, conn, make_user, make_quote, make_collection
+):
+    owner, other = make_user(), make_user()
+    collection_id = make_collection(owner.author_id)
+    public_id = make_quote(owner.author_id)
+    own_private_id = make_quote(owner.author_id, is_public=False)
+    # E.g. added while public, then made private by its author.
+    foreign_private_id = make_quote(other.author_id, is_public=False)
+    conn.execute(
+        "INSERT INTO collectioncontains (collection_id, quote_id) "
+        "SELECT %s, unnest(%s::integer[])",
+        (collection_id, [public_id, own_private_id, foreign_private_id]),
+    )
+    conn.commit()
+
+    def page_ids(headers=None):
+        response = client.get(
+            f"/collections/{collection_id}/quotes", headers=headers
+        )
+        assert response.status_code == 200, response.text
+        return sorted(q["id"] for q in response.json()["quotes"])
+
+    assert page_ids() == [public_id]
+    assert page_ids(owner.headers) == [public_id, own_private_id]
+    assert page_ids(other.headers) == [public_id, foreign_private_id]
+
+
+def test_quote_count_and_etag_follow_writes(
+    client, make_user, make_quote, make_collection
+):
+    user = make_user()
+    collection_id = make_collection(user.author_id)
+    quote_ids = [make_quote(user.author_id) for _ in range(3)]
+    first = client.get(f"/collections/{collection_id}")
+    assert first.json()["quoteCount"] == 0
+
+    client.post(
+        f"/collections/{collection_id}/quotes/bulk-add",
+        json={"quote_ids": quote_ids},
+        headers=user.headers,
+    )
+    client.post(
+        f"/collections/{collection_id}/quotes/bulk-remove",
+        json={"quote_ids": quote_ids[:1]},
+        headers=user.headers,
+    )
+    second = client.get(
+        f"/collections/{collection_id}",
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    assert second.json()["quoteCount"] == 2
+
+
+def test_reconcile_repairs_drifted_counts(
+    conn, make_user, make_quote, make_collection
+):
+    user = make_user()
+    collection_id = make_collection(user.author_id)
+    crud.user_add_quotes_to_collection(
+        conn, user.id, [make_quote(user.author_id)], collection_id
+    )
+    conn.execute(
+        "UPDATE collection SET quote_count = 7 WHERE id = %s",
+        (collection_id,),
+    )
+    conn.commit()
+
+    assert crud.reconcile_collection_quote_counts(conn) >= 1
+    assert crud.get_collection_by_id(conn, collection_id).quote_count == 1
@@ -0,0 +1,44 @@
+import uuid
+
+import cli
+
+
+def _quote_ids(conn, *quote_ids: int) -> list[int]:
+    rows = conn.execute(
+        "SELECT id FROM quote WHERE id = ANY(%s) ORDER BY id",
+        (list(quote_ids),),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def _flagged(conn, quote_id: int) -> list[int]:
+    rows = conn.execute(
+        "SELECT duplicate_of FROM quote_duplicate WHERE quote_id = %s",
+        (quote_id,),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def test_merge_keeps_duplicates_of_other_authors(conn, make_user, make_quote):
+    owner, other = make_user(), make_user()
+    text = f"Only the wise know {uuid.uuid4().hex}."
+    original = make_quote(owner.author_id, is_public=False, text=text)
+    duplicate = make_quote(other.author_id, text=text.upper())
+
+    cli.dedup_existing_quotes(conn, threshold=0.97, action="merge")
+
+    assert _quote_ids(conn, original, duplicate) == [original, duplicate]
+    assert _flagged(conn, duplicate) == [original]
+
+
+def test_merge_folds_duplicates_of_the_same_author(
+    conn, make_user, make_quote
+):
+    owner = make_user()
+    text = f"Only the wise know {uuid.uuid4().hex}."
+    original = make_quote(owner.author_id, text=text)
+    duplicate = make_quote(owner.author_id, text=f"  {text}!")
+
+    cli.dedup_existing_quotes(conn, threshold=0.97, action="merge")
+
+    assert _quote_ids(conn, original, duplicate) == [original]
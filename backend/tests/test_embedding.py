@@ -0,0 +1,53 @@
+import threading
+
+import numpy as np
+import pytest
+
+import app.embedding as embedding
+
+
+class FakeModel:
+    def __init__(self, model_name: str, value: float):
+        self.model_name = model_name
+        self.value = value
+
+    def embed(self, texts):
+        for _ in texts:
+            yield np.full(384, self.value, dtype=np.float32)
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    loading = threading.Event()
+    release = threading.Event()
+
+    def create(model_name):
+        loading.set()
+        assert release.wait(5)
+        return FakeModel(model_name, 2.0)
+
+    monkeypatch.setattr(embedding, "create_embedding_model", create)
+    monkeypatch.setattr(embedding, "embedding_model", FakeModel("old", 1.0))
+    monkeypatch.setattr(embedding, "EMBEDDING_MODEL_NAME", "old")
+    monkeypatch.setattr(embedding, "CSV_QUOTE_EMBEDDINGS", None)
+    return loading, release
+
+
+def test_background_switch_keeps_serving_the_current_model(fake_models):
+    loading, release = fake_models
+
+    embedding.request_model("new")
+    assert loading.wait(5)
+    vector, model_name = embedding.generate_embedding_with_model("text")
+
+    assert model_name == "old"
+    assert vector[0] == 1.0
+
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "embedding-switch":
+            thread.join(5)
+    vector, model_name = embedding.generate_embedding_with_model("text")
+
+    assert model_name == "new"
+    assert vector[0] == 2.0
@@ -0,0 +1,61 @@
+def test_cannot_favorite_private_quote_of_another_user(
+    client, make_user, make_quote
+):
+    owner, other = make_user(), make_user()
+    private_id = make_quote(owner.author_id, is_public=False)
+
+    response = client.post(
+        f"/quotes/{private_id}/favorite", headers=other.headers
+    )
+
+    assert response.status_code == 404
+
+
+def test_bulk_add_skips_private_quotes_of_other_users(
+    client, make_user, make_quote
+):
+    owner, other = make_user(), make_user()
+    public_id = make_quote(owner.author_id)
+    private_id = make_quote(owner.author_id, is_public=False)
+
+    response = client.post(
+        "/users/me/favorites/bulk-add",
+        json={"quote_ids": [public_id, private_id]},
+        headers=other.headers,
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["quote_ids"] == [public_id]
+
+
+def test_favorites_listing_hides_quotes_made_private(
+    client, conn, make_user, make_quote
+):
+    owner, other = make_user(), make_user()
+    kept_id = make_quote(owner.author_id)
+    hidden_id = make_quote(owner.author_id)
+    client.post(
+        "/users/me/favorites/bulk-add",
+        json={"quote_ids": [kept_id, hidden_id]},
+        headers=other.headers,
+    )
+    conn.execute(
+        "UPDATE quote SET is_public = FALSE WHERE id = %s", (hidden_id,)
+    )
+    conn.commit()
+
+    response = client.get("/users/me/favorites", headers=other.headers)
+
+    assert response.status_code == 200, response.text
+    assert [q["id"] for q in response.json()["quotes"]] == [kept_id]
+
+
+def test_owner_can_favorite_own_private_quote(client, make_user, make_quote):
+    owner = make_user()
+    private_id = make_quote(owner.author_id, is_public=False)
+
+    response = client.post(
+        f"/quotes/{private_id}/favorite", headers=owner.headers
+    )
+
+    assert response.status_code == 204
@@ -0,0 +1,58 @@
+import app.querytrace as querytrace
+
+
+def test_quote_details_stay_within_query_budget(
+    client, conn, make_user, make_quote, make_collection
+):
+    user = make_user()
+    fans = [make_user() for _ in range(3)]
+    quote_id = make_quote(user.author_id)
+    collection_id = make_collection(user.author_id)
+    conn.execute(
+        "INSERT INTO user_quote_favorite (user_id, quote_id) "
+        "SELECT unnest(%s::integer[]), %s",
+        ([u.id for u in (user, *fans)], quote_id),
+    )
+    conn.execute(
+        "INSERT INTO collectioncontains (collection_id, quote_id) "
+        "VALUES (%s, %s)",
+        (collection_id, quote_id),
+    )
+    conn.commit()
+
+    with querytrace.trace() as t:
+        response = client.get(f"/quotes/{quote_id}", headers=user.headers)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["favoriteCount"] == 4
+    assert body["isFavorited"] is True
+    assert [c["id"] for c in body["userCollections"]] == [collection_id]
+    # The current user, then the quote with everything shown next to it.
+    t.assert_budget(max_queries=2, max_repeats=1)
+
+
+def test_similar_quotes_of_a_private_quote_are_its_owners_only(
+    client, conn, make_user, make_quote
+):
+    owner, other = make_user(), make_user()
+    private_id = make_quote(owner.author_id, is_public=False)
+    neighbor_id = make_quote(other.author_id)
+    unlisted_id = make_quote(other.author_id, is_public=False)
+    conn.execute(
+        "INSERT INTO quote_neighbor (quote_id, neighbor_id, distance) "
+        "VALUES (%s, %s, 0.1)",
+        (private_id, neighbor_id),
+    )
+    conn.commit()
+
+    def similar(quote_id, headers=None):
+        return client.get(f"/quotes/{quote_id}/similar", headers=headers)
+
+    assert similar(private_id).status_code == 404
+    assert similar(private_id, other.headers).status_code == 404
+    # Without a neighbor list, through the live query.
+    assert similar(unlisted_id, owner.headers).status_code == 404
+    response = similar(private_id, owner.headers)
+    assert response.status_code == 200
+    assert [q["id"] for q in response.json()] == [neighbor_id]
@@ -0,0 +1,58 @@
+import numpy as np
+
+import app.crud as crud
+import app.embedding as embedding
+import app.vector as vector
+
+DIM = embedding.EMBEDDING_MODELS[embedding.EMBEDDING_MODEL_NAME]
+
+
+def _insert_embedded_quotes(conn, author_id: int, vectors, is_public=True):
+    with conn.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO quote (author_id, text, is_public, embedding, "
+            "embedding_model) VALUES (%s, %s, %s, %s, %s)",
+            [
+                (
+                    author_id,
+                    f"Embedded quote {i}",
+                    is_public,
+                    vector.to_vector(v),
+                    embedding.EMBEDDING_MODEL_NAME,
+                )
+                for i, v in enumerate(vectors)
+            ],
+        )
+    conn.commit()
+
+
+def _exact_public_ranking(conn, query: np.ndarray) -> list[int]:
+    rows = conn.execute(
+        "SELECT id, embedding FROM quote "
+        "WHERE is_public AND embedding_model = %s",
+        (embedding.EMBEDDING_MODEL_NAME,),
+    ).fetchall()
+    ids = np.array([row[0] for row in rows])
+    matrix = embedding.normalize_rows(np.stack([row[1] for row in rows]))
+    distances = 1 - matrix @ embedding.normalize_rows(query)
+    return ids[np.lexsort((ids, distances))].tolist()
+
+
+def test_deep_pages_are_ranked_exactly(conn, make_user):
+    rng = np.random.default_rng(33)
+    owner, other = make_user(), make_user()
+    count = crud.ANN_MAX_CANDIDATES + 50
+    _insert_embedded_quotes(
+        conn, owner.author_id, rng.normal(size=(count, DIM))
+    )
+    # Dropped after the index scan for anonymous searches.
+    _insert_embedded_quotes(
+        conn, other.author_id, rng.normal(size=(20, DIM)), is_public=False
+    )
+    query = vector.to_vector(rng.normal(size=DIM))
+    expected = _exact_public_ranking(conn, query)
+
+    skip, limit = crud.ANN_MAX_CANDIDATES - 10, 20
+    page = crud.search_quotes_semantic(conn, query, limit=limit, skip=skip)
+
+    assert [q.id for q in page] == expected[skip : skip + limit]
@@ -10,6 +10,7 @@ import { Dialog, DialogTrigger } from "@/components/ui/dialog";
 import QuoteDetailModal from '@/components/quote-detail-modal';
 import {
   getCollectionById,
+  getCollectionQuotesPage,
   CollectionDetails,
   QuotePageEntry,
   favoriteQuote,
@@ -130,6 +131,25 @@ export default function CollectionDetailsPage() {
   const [selectedQuote, setSelectedQuote] = useState<QuotePageEntry | null>(null);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+
+  const handleLoadMoreQuotes = () => {
+    if (!collection || !collection.nextCursor) return;
+    setIsLoadingMore(true);
+    getCollectionQuotesPage(collection.id, collection.nextCursor, authToken)
+      .then(page => {
+        setCollection(prevCollection => {
+          if (!prevCollection) return null;
+          return {
+            ...prevCollection,
+            quotes: [...prevCollection.quotes, ...page.quotes],
+            nextCursor: page.nextCursor,
+          };
+        });
+      })
+      .catch(err => console.error(`Failed to load more quotes for collection ${collection.id}:`, err))
+      .finally(() => setIsLoadingMore(false));
+  };
 
   const handleQuoteUpdateInCollection = (updatedQuote: QuotePageEntry) => {
     setCollection(prevCollection => {
@@ -342,7 +362,7 @@ export default function CollectionDetailsPage() {
           <div className="mt-6 text-sm text-muted-foreground flex items-center justify-center gap-x-4 gap-y-1 flex-wrap">
             <span>
               <QuoteIcon className="inline-block h-4 w-4 mr-1.5 align-middle" />
-              {collection.quotes?.length || 0} {(collection.quotes?.length || 0) === 1 ? "Quote" : "Quotes"}
+              {collection.quoteCount ?? collection.quotes?.length ?? 0} {(collection.quoteCount ?? collection.quotes?.length ?? 0) === 1 ? "Quote" : "Quotes"}
             </span>
             {collection.createdAt && (
               <span>Created: {new Date(collection.createdAt).toLocaleDateString()}</span>
@@ -354,6 +374,7 @@ export default function CollectionDetailsPage() {
         </header>
 
         {hasQuotes ? (
+          <>
           <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-x-6 gap-y-8">
             {collection.quotes.map((quote) => (
               <CollectionQuoteCard
@@ -366,6 +387,15 @@ export default function CollectionDetailsPage() {
               />
             ))}
           </div>
+          {collection.nextCursor && (
+            <div className="mt-10 flex justify-center">
+              <Button variant="outline" onClick={handleLoadMoreQuotes} disabled={isLoadingMore}>
+                {isLoadingMore && <Loader2 className="mr-2 h-4 w-4 animate-spin" />}
+                Load More Quotes
+              </Button>
+            </div>
+          )}
+          </>
         ) : (
           <div className="text-center py-16">
             <QuoteIcon className="mx-auto h-16 w-16 text-muted-foreground/50 mb-6" />
@@ -209,6 +209,18 @@ export const getQuoteById = async (quoteId: number, token?: string | null): Prom
   }
 };
 
+// Many quotes in one request, in the order of quoteIds; missing quotes are
+// left out. The backend accepts up to 100 ids per call.
+export const getQuotesByIds = async (quoteIds: number[], token?: string | null): Promise<QuotePageEntry[]> => {
+  if (quoteIds.length === 0) return [];
+  const params = new URLSearchParams();
+  quoteIds.forEach((id) => params.append('ids', String(id)));
+  return fetchApi<QuotePageEntry[]>(`/quotes/batch?${params.toString()}`, {
+    method: 'GET',
+    token,
+  });
+};
+
 export const getMyQuotes = async (token: string | null): Promise<QuoteCollectionResponse> => {
   if (!token) throw new Error('Authentication token is required to fetch user quotes.');
   return fetchApi<QuoteCollectionResponse>('/quotes/me', {
@@ -240,6 +252,44 @@ export const unfavoriteQuote = async (quoteId: number, token: string | null): Pr
   });
 };
 
+export interface FavoriteQuotesPage {
+  quotes: QuotePageEntry[];
+  nextCursor?: number | null;
+}
+
+// The current user's favorites, newest quotes first; pass the returned
+// nextCursor to get the following page.
+export const getMyFavorites = async (cursor: number | null, token: string | null): Promise<FavoriteQuotesPage> => {
+  if (!token) throw new Error('Authentication token is required to fetch favorites.');
+  const params = new URLSearchParams();
+  if (cursor !== null) params.append('cursor', String(cursor));
+  return fetchApi<FavoriteQuotesPage>(`/users/me/favorites?${params.toString()}`, {
+    method: 'GET',
+    token,
+  });
+};
+
+// Both resolve to the ids whose favorite state actually changed.
+export const favoriteQuotes = async (quoteIds: number[], token: string | null): Promise<number[]> => {
+  if (!token) throw new Error('Authentication token is required to favorite quotes.');
+  const response = await fetchApi<{ quoteIds: number[] }>('/users/me/favorites/bulk-add', {
+    method: 'POST',
+    body: JSON.stringify({ quoteIds }),
+    token,
+  });
+  return response.quoteIds;
+};
+
+export const unfavoriteQuotes = async (quoteIds: number[], token: string | null): Promise<number[]> => {
+  if (!token) throw new Error('Authentication token is required to unfavorite quotes.');
+  const response = await fetchApi<{ quoteIds: number[] }>('/users/me/favorites/bulk-remove', {
+    method: 'POST',
+    body: JSON.stringify({ quoteIds }),
+    token,
+  });
+  return response.quoteIds;
+};
+
 export const searchCollections = async (
   query: string,
   limit: number = 10,
@@ -271,8 +321,14 @@ export interface CollectionEntry {
   updatedAt?: string;
 }
 
+export interface CollectionQuotesPage {
+  quotes: QuotePageEntry[];
+  nextCursor?: string | null;
+}
+
 export interface CollectionDetails extends CollectionEntry {
   quotes: QuotePageEntry[];
+  nextCursor?: string | null;
 }
 
 export interface CreateCollectionPayload {
@@ -347,11 +403,28 @@ export const getMyCollections = async (token: string | null): Promise<Collection
   });
 };
 
+export const getCollectionQuotesPage = async (
+  collectionId: number,
+  cursor: string | null,
+  token: string | null
+): Promise<CollectionQuotesPage> => {
+  const params = new URLSearchParams();
+  if (cursor) params.append('cursor', cursor);
+  return fetchApi<CollectionQuotesPage>(`/collections/${collectionId}/quotes?${params.toString()}`, {
+    method: 'GET',
+    token,
+  });
+};
+
+// The collection header plus the first page of its quotes; load further
+// pages with getCollectionQuotesPage and the returned nextCursor.
 export const getCollectionById = async (collectionId: number, token: string | null): Promise<CollectionDetails> => {
-  return fetchApi<CollectionDetails>(`/collections/${collectionId}`, {
+  const header = await fetchApi<CollectionEntry>(`/collections/${collectionId}`, {
     method: 'GET',
     token,
   });
+  const firstPage = await getCollectionQuotesPage(collectionId, null, token);
+  return { ...header, quotes: firstPage.quotes, nextCursor: firstPage.nextCursor };
 };
 
 export interface UserProfileResponse {